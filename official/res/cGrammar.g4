@@ -1,13 +1,7 @@
 
 grammar cGrammar;
 
-program
-	: program functiondecl
-	| program function
-	| program global_declaration ';'
-	| program include_file  
-	|
-	;
+program : (functiondecl | function | global_declaration ';' | include_file)*;
 
 include_file : INCLUDE_FILE;
 
@@ -18,18 +12,14 @@ functiondecl : returntype ID '(' initialfunctionargument ')' ';';
 initialfunctionargument
 	: type_argument type_arguments
 	| ;
-type_arguments
-	: ',' type_argument type_arguments
-	| ;
+type_arguments : (',' type_argument)*;
 type_argument : dec_type OPERATOR_ADDROF? ID;
 
 
 function_body : statements;
 
 
-statements 
-	: statement statements
-	| ;
+statements : statement*;
 statement
 	: expression ';'
 	| declaration ';'
@@ -49,42 +39,30 @@ break_stmt : 'break';
 continue_stmt : 'continue';
 return_stmt : RETURN expression?;
 
+// One rule for all operators, the alternatives are listed from high to low precedence.
+// The labels are shared by the alternatives that build the same kind of AST node.
 expression
-	: add_sub
-	| condition
-	| rvalue
-	;
-
-
-add_sub
-	: add_sub OPERATOR_PLUS add_sub
-	| add_sub OPERATOR_MINUS add_sub
-	| rvalue_identifier
-	| rvalue
-	| mul_div
-	;
-
-mul_div
-	: mul_div OPERATOR_MUL mul_div
-	| mul_div OPERATOR_DIV mul_div
-	| rvalue_identifier
-	| rvalue
-	| minus_expr
+	: OPERATOR_MINUS expression					# minus_expr
+	| OPERATOR_MUL+ expression					# dereference_expr
+	| expression OPERATOR_MUL expression		# mul_div
+	| expression OPERATOR_DIV expression		# mul_div
+	| expression OPERATOR_PLUS expression		# add_sub
+	| expression OPERATOR_MINUS expression		# add_sub
+	| expression comparator expression			# comparison
+	| OPERATOR_NOT expression					# condition_not
+	| expression OPERATOR_AND expression		# condition_and
+	| expression OPERATOR_OR expression			# condition_or
+	| LBRACKET expression RBRACKET				# bracket_expression
+	| CHARVALUE									# charvalue
+	| (floatvalue | intvalue)					# numericalvalue	// NOTE: no differentiation between int value and pointer value, would match the same anyways
+	| ID '(' call_argument_initial ')'			# functioncall
+	| arrayelement								# arrayelement_rvalue
+	| OPERATOR_ADDROF lvalue					# address_value
+	| ID										# rvalue_identifier
+	| TRUE										# true
+	| FALSE										# false
 	;
 
-minus_expr
-	: OPERATOR_MINUS minus_expr
-	| dereference_expr
-	;
-
-dereference_expr
-	: OPERATOR_MUL+ dereference_expr
-	| OPERATOR_MUL+ rvalue
-	| bracket_expression
-	;
-
-bracket_expression : LBRACKET expression RBRACKET;
-
 
 //////////////////////////////////////////////////////////
 // If-else stuff and boolean conditions					//
@@ -92,7 +70,6 @@ bracket_expression : LBRACKET expression RBRACKET;
 
 
 lvalue_identifier : ID;
-rvalue_identifier : ID;
 
 ifelse
 	: 'if' '(' condition ')' '{' first_true_statements '}'
@@ -114,34 +91,7 @@ first_true_statement : statement;
 first_false_statement : statement;
 first_false_statements : statements;
 
-condition : condition_or;
-
-condition_or
-	: condition_or OPERATOR_OR condition_or
-	| condition_and
-	| rvalue
-	| comparison
-	;
-
-condition_and
-	: condition_and OPERATOR_AND condition_and
-	| condition_not
-	| comparison
-	| rvalue
-	;
-
-condition_not
-	: OPERATOR_NOT comparison
-	| OPERATOR_NOT rvalue
-	| bracket_condition
-	;
-
-bracket_condition
-	: LBRACKET condition_or RBRACKET
-	| OPERATOR_NOT LBRACKET condition_or RBRACKET
-	;
-
-comparison : add_sub comparator add_sub;
+condition : expression;
 
 comparator
 	: OPERATOR_EQ
@@ -201,27 +151,21 @@ printf : 'printf' '(' format_string call_arguments ')';
 
 format_string : STRING;
 
-scanf_call_arguments
-	: ',' lvalue scanf_call_arguments 
-	| ;
+scanf_call_arguments : (',' lvalue)*;
 
 //////////////////////////////////////////////////////////
 // Function calls 										//
 //////////////////////////////////////////////////////////
-functioncall : ID '(' call_argument_initial ')';
 
 call_argument_initial
 	: expression call_arguments
 	| ;
 
-call_arguments
-	: ',' call_argument call_arguments
-	| ;
+call_arguments : (',' call_argument)*;
 
 call_argument : expression;
 
 
-
 //////////////////////////////////////////////////////////
 // Declarations and assignments							//
 //////////////////////////////////////////////////////////
@@ -244,8 +188,6 @@ initialization : OPERATOR_AS expression;
 global_declaration : declaration;
 
 
-
-
 //////////////////////////////////////////////////////////
 // LValues and RValues									//
 //////////////////////////////////////////////////////////
@@ -259,28 +201,12 @@ lvalue
 
 lvalue_brackets : LBRACKET lvalue RBRACKET;
 
-rvalue 
-	: charvalue
-	| numericalvalue 		// NOTE: no differentiation between int value and pointer value, would match the same anyways
-	| functioncall
-	| arrayelement_rvalue
-	| address_value
-	| rvalue_identifier
-	| true
-	| false
-	| OPERATOR_MINUS rvalue // Here in order to give priority to rvalue with a minus operator, instead of whole expressions
-	;
 
-
-arrayelement_rvalue : arrayelement;
 arrayelement_lvalue : arrayelement;
 
 arrayelement : ID LSQUAREBRACKET expression RSQUAREBRACKET;
 
 
-charvalue : CHARVALUE;
-numericalvalue : floatvalue | intvalue;
-
 intvalue : DIGIT DIGIT*;
 floatvalue : digits? '.' digits;
 
@@ -289,7 +215,6 @@ floatvalue : digits? '.' digits;
 // Pointers and addresses								//
 //////////////////////////////////////////////////////////
 
-address_value : OPERATOR_ADDROF lvalue;
 
 pointer_dereference
 	: dereference_bracket
@@ -316,9 +241,6 @@ dec_type
 	| BOOL ptr
 	;
 
-true : TRUE;
-false : FALSE;
-
 
 //////////////////////////////////////////////////////////
 // Lexer Rules											//
@@ -1,24 +1,70 @@
 import sys
 from src.py.runCompiler import runCompiler
+from src.py.UTIL.ParserCache import loadParserCache
+
+batchUsage = "Please run the batch mode as: python3 c2p.py --batch [--jobs=<n>] [--out=<directory>] [--dot] [-O] <cfile or directory> ..., with <n> at least 1."
+
+def translateBatch(argv):
+	# Only the batch mode needs multiprocessing, a single compile doesn't pay for importing it
+	from src.py.batchCompiler import compileBatch
+
+	jobs = None
+	outputDirectory = "data"
+	paths = []
+	for arg in argv[1:]:
+		if arg.startswith("--jobs="):
+			jobs = arg[len("--jobs="):]
+			if not jobs.isdigit() or int(jobs) == 0:
+				print(batchUsage)
+				return
+			jobs = int(jobs)
+		elif arg.startswith("--out="):
+			outputDirectory = arg[len("--out="):]
+		elif arg not in ["--batch", "--dot", "-O"]:
+			paths.append(arg)
+
+	if len(paths) == 0:
+		print(batchUsage)
+		return
+
+	try:
+		compileBatch(paths, outputDirectory, jobs, "--dot" in argv, optimize="-O" in argv)
+	except Exception as inst:
+		print(inst)
 
 def translateProgram(argv):
+	if "--batch" in argv:
+		translateBatch(argv)
+		return
+
 	cFilename = ""
 	pFilename = ""
+	dotFilename = None
+	optimize = "-O" in argv
+	argv = [arg for arg in argv if arg != "-O"]
+	if "--dot" in argv:
+		# The AST is only written in dot format on request
+		dotFilename = "data/output.dot"
+		argv = [arg for arg in argv if arg != "--dot"]
+
 	if len(argv) == 2:
 		# For own convenience
 		pFilename = "data/program.p"
 	elif len(argv) != 3:
-		print("Please run this program with 2 arguments: the c program filename and the p output filename.")
+		print("Please run this program with 2 arguments: the c program filename and the p output filename (add --dot to write the AST to data/output.dot, -O to optimize the program).")
 		return
 	else:
 		pFilename = argv[2]
-	
+
 	cFilename = argv[1]
 
+	# Start with the lexer and parser as warmed up by 'make build', if the cache is there
+	loadParserCache()
+
 	try:
-		runCompiler(cFilename, pFilename)
+		runCompiler(cFilename, pFilename, dotFilename=dotFilename, optimize=optimize)
 	except Exception as inst:
 		print(inst)
-		
+
 if __name__ == "__main__":
 	translateProgram(sys.argv)
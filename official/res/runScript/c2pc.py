@@ -0,0 +1,43 @@
+import sys
+from src.py.compileClient import compileOnServer, getDefaultSocketPath, stopCompileServer
+
+def translateProgram(argv):
+	# Same arguments as c2p.py, the compilation is done by a running c2pd.py
+	socketPath = getDefaultSocketPath()
+	for arg in argv:
+		if arg.startswith("--socket="):
+			socketPath = arg[len("--socket="):]
+	argv = [arg for arg in argv if not arg.startswith("--socket=")]
+
+	if "--stop" in argv:
+		stopCompileServer(socketPath)
+		return
+
+	cFilename = ""
+	pFilename = ""
+	dotFilename = None
+	optimize = "-O" in argv
+	argv = [arg for arg in argv if arg != "-O"]
+	if "--dot" in argv:
+		# The AST is only written in dot format on request
+		dotFilename = "data/output.dot"
+		argv = [arg for arg in argv if arg != "--dot"]
+
+	if len(argv) == 2:
+		# For own convenience
+		pFilename = "data/program.p"
+	elif len(argv) != 3:
+		print("Please run this program with 2 arguments: the c program filename and the p output filename (add --dot to write the AST to data/output.dot, -O to optimize the program).")
+		return
+	else:
+		pFilename = argv[2]
+
+	cFilename = argv[1]
+
+	try:
+		compileOnServer(socketPath, cFilename, pFilename, dotFilename, optimize)
+	except Exception as inst:
+		print(inst)
+
+if __name__ == "__main__":
+	translateProgram(sys.argv)
@@ -0,0 +1,11 @@
+import sys
+from src.py.compileServer import runCompileServer
+
+if __name__ == "__main__":
+	# The socket can be given as argument, c2pc.py uses the same default
+	try:
+		runCompileServer(sys.argv[1] if len(sys.argv) > 1 else None)
+	except KeyboardInterrupt:
+		pass
+	except Exception as inst:
+		print(inst)
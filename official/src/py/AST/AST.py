@@ -1,15 +1,28 @@
 
-from src.py.AST.ASTNode import ASTNode, ASTNodeType, getStringOfArray, pointerType
+import io
+
+from antlr4.tree.Tree import TerminalNode
+
+from src.py.AST.ASTNode import ASTNode, ASTNodeType, getStringOfArray, pointerType, writeDot
 
 
 class AST:
-	def __init__(self, tokenStream):
+	def __init__(self):
 		self.root = ASTNode(ASTNodeType.Program)
 		self.currentPointer = self.root
-		self.tokenStream = tokenStream
 
 	def __str__(self):
-		return "digraph AST {\n" + str(self.root) + "}"
+		dotText = io.StringIO()
+		self.writeDot(dotText)
+		return dotText.getvalue()
+
+	def writeDot(self, dotFile):
+		"""
+			Writes the AST in dot format to dotFile, without building the whole text first.
+		"""
+		dotFile.write("digraph AST {\n")
+		writeDot(self.root, dotFile)
+		dotFile.write("}")
 
 
 
@@ -105,7 +118,7 @@ class AST:
 			self.currentPointer = self.currentPointer.addChild(ASTNodeType.RValueFloat, self.getPosition(ctx))
 
 	def addCharValue(self, ctx):
-		self.currentPointer.addChild(ASTNodeType.RValueChar, self.getPosition(ctx), ctx.CHARVALUE())
+		self.currentPointer.addChild(ASTNodeType.RValueChar, self.getPosition(ctx), str(ctx.CHARVALUE()))
 
 	def setIntValueNode(self, ctx):
 		self.currentPointer.value = int(getStringOfArray(ctx.DIGIT()))
@@ -143,9 +156,11 @@ class AST:
 		self.currentPointer = self.currentPointer.addChild(ASTNodeType.RValueAddress, self.getPosition(ctx))
 
 
-	def addDereference(self, ctx):
+	def addDereference(self, ctx, starCount=None):
 		value = "*"
-		if type(ctx.OPERATOR_MUL()) is list:
+		if starCount != None:
+			value = "*" * starCount
+		elif type(ctx.OPERATOR_MUL()) is list:
 			value = "".join(["*" for i in range(len(ctx.OPERATOR_MUL()))])
 
 		self.currentPointer = self.currentPointer.addChild(ASTNodeType.Dereference, self.getPosition(ctx), value)
@@ -453,5 +468,6 @@ class AST:
 
 
 	def getPosition(self, ctx):
-		firstToken = self.tokenStream.get(ctx.getSourceInterval()[0])
+		# Taken from the context itself, so the AST doesn't need the token stream
+		firstToken = ctx.getSymbol() if isinstance(ctx, TerminalNode) else ctx.start
 		return (firstToken.line, firstToken.column)
@@ -1,15 +1,21 @@
 
+from antlr4.error.ErrorListener import ErrorListener
+from antlr4.tree.Tree import ParseTreeListener, ParseTreeWalker
+
 from src.cGrammarListener import cGrammarListener
 from src.cGrammarParser import *
 from src.py.AST.AST import AST
 
 class ASTCreator(cGrammarListener):
-	def __init__(self, stream):
+	def __init__(self, astClass=AST):
+		"""
+			astClass is the class of the created AST, AST or ArrayAST.
+		"""
 		self.AST = None
-		self.tokenStream = stream
+		self.astClass = astClass
 
 	def enterProgram(self, ctx:cGrammarParser.ProgramContext):
-		self.AST = AST(self.tokenStream)
+		self.AST = self.astClass()
 
 
 	#################################################
@@ -109,14 +115,6 @@ class ASTCreator(cGrammarListener):
 	def exitFunctioncall(self, ctx:cGrammarParser.FunctioncallContext):
 		self.AST.climbTree()
 
-	def enterRvalue(self, ctx):
-		if ctx.OPERATOR_MINUS() != None:
-			self.AST.addNegate(ctx)
-
-	def exitRvalue(self, ctx):
-		if ctx.OPERATOR_MINUS() != None:
-			self.AST.climbTree()
-
 	def enterTrue(self, ctx):
 		self.AST.addTrue(ctx)
 
@@ -143,13 +141,19 @@ class ASTCreator(cGrammarListener):
 		if ctx.OPERATOR_MINUS() != None:
 			self.AST.climbTree()
 
-	def enterDereference_expr(self, ctx):
-		if len(ctx.OPERATOR_MUL()) != 0:
+	def isSplitDereference(self, ctx):
+		# The last '*' before anything but brackets gets a Dereference node of its own (e.g. '***a' -> '**' and '*')
+		return len(ctx.OPERATOR_MUL()) > 1 and not isinstance(ctx.expression(), cGrammarParser.Bracket_expressionContext)
+
+	def enterDereference_expr(self, ctx:cGrammarParser.Dereference_exprContext):
+		if self.isSplitDereference(ctx):
+			self.AST.addDereference(ctx, len(ctx.OPERATOR_MUL()) - 1)
+			self.AST.addDereference(ctx.OPERATOR_MUL()[-1], 1)
+		else:
 			self.AST.addDereference(ctx)
 
-	def exitDereference_expr(self, ctx):
-		if len(ctx.OPERATOR_MUL()) != 0:
-			self.AST.climbTree()
+	def exitDereference_expr(self, ctx:cGrammarParser.Dereference_exprContext):
+		self.AST.climbTree(2 if self.isSplitDereference(ctx) else 1)
 
 	def enterAssigment(self, ctx):
 		self.AST.enterAssignment(ctx)
@@ -174,12 +178,11 @@ class ASTCreator(cGrammarListener):
 			self.AST.climbTree()
 
 	def enterBracket_expression(self, ctx:cGrammarParser.Bracket_expressionContext):
-		if ctx.LBRACKET() != None:
-			self.AST.makeBrackets(ctx)
+		# Brackets right after a not become a single NegateBrackets node
+		self.AST.makeBrackets(ctx, isinstance(ctx.parentCtx, cGrammarParser.Condition_notContext))
 
 	def exitBracket_expression(self, ctx:cGrammarParser.Bracket_expressionContext):
-		if ctx.LBRACKET() != None:
-			self.AST.climbTree()
+		self.AST.climbTree()
 
 
 
@@ -240,42 +243,63 @@ class ASTCreator(cGrammarListener):
 	def exitCondition(self, ctx:cGrammarParser.ConditionContext):
 		self.AST.climbTree()
 
-	def enterCondition_or(self, ctx):
+	def isInCondition(self, ctx):
+		"""
+			Returns wether the expression ctx is a part of a condition: the operand of a logical operator,
+			the condition of an if or while, or in brackets in one of those.
+		"""
+		parent = ctx.parentCtx
+		while isinstance(parent, cGrammarParser.Bracket_expressionContext):
+			parent = parent.parentCtx
+		return isinstance(parent, (cGrammarParser.ConditionContext, cGrammarParser.Condition_notContext, \
+			cGrammarParser.Condition_andContext, cGrammarParser.Condition_orContext))
+
+	# Logical operators that are not part of a condition (e.g. in an assignment) start a new condition
+	def enterConditionOperator(self, ctx):
+		if not self.isInCondition(ctx):
+			self.AST.enterCondition(ctx)
+
+	def exitConditionOperator(self, ctx):
+		if not self.isInCondition(ctx):
+			self.AST.climbTree()
+
+	def enterCondition_or(self, ctx:cGrammarParser.Condition_orContext):
+		self.enterConditionOperator(ctx)
 		self.AST.enterCondition_or(ctx)
 
-	def exitCondition_or(self, ctx):
-		if ctx.OPERATOR_OR() != None:
-			self.AST.climbTree()
+	def exitCondition_or(self, ctx:cGrammarParser.Condition_orContext):
+		self.AST.climbTree()
+		self.exitConditionOperator(ctx)
 
 	def enterCondition_and(self, ctx:cGrammarParser.Condition_andContext):
+		self.enterConditionOperator(ctx)
 		self.AST.enterCondition_and(ctx)
 
 	def exitCondition_and(self, ctx:cGrammarParser.Condition_andContext):
 		self.AST.exitCondition_and(ctx)
+		self.exitConditionOperator(ctx)
 
 
 	def enterCondition_not(self, ctx:cGrammarParser.Condition_notContext):
-		self.AST.enterCondition_not(ctx)
+		self.enterConditionOperator(ctx)
+		# A not before brackets is part of the NegateBrackets node
+		if not isinstance(ctx.expression(), cGrammarParser.Bracket_expressionContext):
+			self.AST.enterCondition_not(ctx)
 
 	def exitCondition_not(self, ctx:cGrammarParser.Condition_notContext):
-		self.AST.exitCondition_not(ctx)
+		if not isinstance(ctx.expression(), cGrammarParser.Bracket_expressionContext):
+			self.AST.exitCondition_not(ctx)
+		self.exitConditionOperator(ctx)
 
 
 	def enterComparison(self, ctx:cGrammarParser.ComparisonContext):
+		self.enterConditionOperator(ctx)
 		self.AST.enterComparison(ctx)
 
 
 	def exitComparison(self, ctx:cGrammarParser.ComparisonContext):
 		self.AST.exitComparison(ctx)
-
-	def enterBracket_condition(self, ctx:cGrammarParser.Bracket_conditionContext):
-		if ctx.OPERATOR_NOT() != None:
-			self.AST.makeBrackets(ctx, True)
-		else:
-			self.AST.makeBrackets(ctx, False)
-
-	def exitBracket_condition(self, ctx:cGrammarParser.Bracket_conditionContext):
-		self.AST.climbTree()
+		self.exitConditionOperator(ctx)
 
 
 
@@ -456,11 +480,103 @@ class ASTCreator(cGrammarListener):
 		return str(self.AST)
 
 	def toDot(self, filename):
-		dotFile = open(filename, 'w')
-		dotFile.write(str(self.AST))
-		dotFile.close()
+		with open(filename, 'w') as dotFile:
+			self.AST.writeDot(dotFile)
 
 	
 	def getAST(self):
 		return self.AST
 
+
+
+class ASTParseListener(ParseTreeListener, ErrorListener):
+	"""
+		Parse listener that builds the AST with an ASTCreator while the program is parsed,
+		instead of walking the parse tree afterwards.
+		The parser enters a context before it has any children, so the ASTCreator can't get the events right away.
+		Instead every statement (and every top level function, declaration and include) is walked as soon as it is parsed,
+		and removed from the parse tree again. The contexts around it (the function, loops, ...) are entered
+		as far as they are parsed then, and exited when the parser has left them.
+		So only the statement being parsed and the contexts around it are kept of the parse tree.
+		It's also added as error listener of the parser, before the listener that reports the syntax errors,
+		so it knows about a syntax error while the parser exits its rules.
+	"""
+	def __init__(self, ASTbuilder, parser):
+		self.ASTbuilder = ASTbuilder
+		self.parser = parser
+		self.walker = ParseTreeWalker()
+		# The contexts that are entered but not exited yet, from the program down,
+		# with the index of their first child that isn't walked yet
+		self.entered = []
+		self.failed = False
+
+	def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+		self.failed = True
+
+	def exitEveryRule(self, ctx):
+		parent = ctx.parentCtx
+		if parent != None and not isinstance(parent, (cGrammarParser.ProgramContext, cGrammarParser.StatementsContext)):
+			# Part of a statement, it's walked with the statement
+			return
+		if self.failed or ctx.exception != None:
+			# The parser is bailing out of a syntax error, the contexts are incomplete
+			return
+
+		try:
+			if parent == None:
+				# The end of the program
+				if len(self.entered) == 0:
+					self.walker.walk(self.ASTbuilder, ctx)
+				self.exitEntered(0)
+			else:
+				self.walkStatement(ctx)
+		except Exception:
+			# An error in the program, the parser exits its rules before it reaches the caller
+			self.failed = True
+			raise
+
+	def walkStatement(self, ctx):
+		path = []
+		parent = ctx.parentCtx
+		while parent != None:
+			path.append(parent)
+			parent = parent.parentCtx
+		path.reverse()
+
+		# A statement that contains statements has been entered already, it only has to be exited
+		wasEntered = len(self.entered) > len(path) and self.entered[len(path)][0] is ctx
+
+		# Exit the contexts the parser has left, and enter the ones around the statement
+		depth = 0
+		while depth < len(self.entered) and depth < len(path) and self.entered[depth][0] is path[depth]:
+			depth += 1
+		self.exitEntered(depth)
+
+		for i in range(len(path)):
+			if i >= depth:
+				self.walker.enterRule(self.ASTbuilder, path[i])
+				self.entered.append([path[i], 0])
+			# The child on the path is the last one, the ones before it are parsed already
+			entry = self.entered[i]
+			children = path[i].children
+			for child in children[entry[1]:-1]:
+				self.walker.walk(self.ASTbuilder, child)
+			entry[1] = len(children)
+
+		if not wasEntered:
+			self.walker.walk(self.ASTbuilder, ctx)
+
+		# The statement is in the AST now, so the parse tree doesn't need it anymore
+		path[-1].children.pop()
+		self.entered[-1][1] = len(path[-1].children)
+
+	def exitEntered(self, depth):
+		"""
+			Exits the entered contexts below depth, after walking the children they got since they were entered.
+		"""
+		while len(self.entered) > depth:
+			context, walked = self.entered.pop()
+			if context.children != None:
+				for child in context.children[walked:]:
+					self.walker.walk(self.ASTbuilder, child)
+			self.walker.exitRule(self.ASTbuilder, context)
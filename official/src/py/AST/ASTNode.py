@@ -1,5 +1,8 @@
+import io
 from enum import Enum
 
+from src.py.CompileContext import getCompileContext
+
 class AutoNumber(Enum):
 	def __new__(cls):
 		value = len(cls.__members__) + 1
@@ -77,10 +80,21 @@ class ASTNodeType(AutoNumber):
 	Condition = ()
 	Dereference = ()
 	ByReference = ()
+	# Kind of the nodes that declare a variable, their declared type is a pointerType
+	Declaration = ()
+
+# The node types indexed by their integer code
+nodeTypes = [None] + list(ASTNodeType)
 
 
 class ASTNode:
-	ID = 0
+	"""
+		Node of the AST. The node type is stored as an integer code (kind), declarations have the kind
+		ASTNodeType.Declaration and keep their declared type (a pointerType) in declType.
+		The type attribute still gives the ASTNodeType or the pointerType of the node.
+	"""
+	__slots__ = ["kind", "declType", "children", "parent", "value", "packedPosition", "uniqueID", "useless", \
+		"symbol", "followLinkCount", "nestingDifference", "deducedType"]
 
 	def __init__(self, _type, position=(0,0), parent=None, value=None):
 		self.type = _type
@@ -89,27 +103,88 @@ class ASTNode:
 		self.value = value
 		self.position = position
 
-		self.uniqueID = ASTNode.ID
-		ASTNode.ID += 1
+		self.uniqueID = getCompileContext().newNodeID()
 
 		# Attribute that specifies wether the node (and its subnodes) should be kept on the stack of the p machine
 		self.useless = False
 
+		# Attributes set by the NameResolver for nodes that refer to a symbol:
+		#	symbol = the SymbolMapping (type and address) the node refers to
+		#	followLinkCount = 1 if a global symbol is used inside a function, 0 otherwise
+		#	nestingDifference = difference between the scope depth of the node and the scope depth of the symbol
+		self.symbol = None
+		self.followLinkCount = 0
+		self.nestingDifference = 0
+
+		# The type of the node, once it has been deducted by the TypeDeductor
+		self.deducedType = None
+
+	@property
+	def type(self):
+		if self.declType != None:
+			return self.declType
+		return nodeTypes[self.kind]
+
+	@type.setter
+	def type(self, _type):
+		if isinstance(_type, pointerType):
+			self.kind = ASTNodeType.Declaration.value
+			self.declType = _type
+		else:
+			self.kind = _type.value
+			self.declType = None
+
+	@property
+	def position(self):
+		""" Tuple (line, column), packed into a single integer. """
+		return (self.packedPosition >> 32, self.packedPosition & 0xffffffff)
+
+	@position.setter
+	def position(self, position):
+		self.packedPosition = (position[0] << 32) | position[1]
+
 	def __str__(self):
 		''' 
 		Returns the dot representation of this node and all its children.
 		In this representation the node will have its value displayed aswell if its value is not None.
 		'''
-		return str(self.uniqueID) + ' [label="' + str(self.type.name) + ( (' \\n' + str(self.value)) if self.value != None else '') + '"];\n' \
-			+ getStringOfArray(self.children) \
-			+ ''.join([(str(self.uniqueID) + " -> " + str(child.uniqueID) + ";\n") for child in self.children])
+		dotText = io.StringIO()
+		writeDot(self, dotText)
+		return dotText.getvalue()
 
 	def addChild(self, type, position=(0,0), value=None):
 		self.children.append(ASTNode(type, position, self, value))
 		return self.children[-1]
 
+	def makeValue(self, type, value):
+		""" Turns the node into a leaf of the given type and value (see ConstantFolder). """
+		self.type = type
+		self.value = value
+		self.children = []
+
 	
 		
+def writeDot(node, dotFile):
+	"""
+		Writes the dot representation of node and all its children to dotFile, one line at a time.
+		Every node is written as its label, then its children, then the edges to its children.
+		The tree is walked with a stack, so deep trees don't hit the recursion limit.
+	"""
+	# The stack stores tuples of: the node, and wether its children have been written already
+	stack = [(node, False)]
+
+	while (len(stack) != 0):
+		node, exiting = stack.pop()
+		if exiting:
+			for child in node.children:
+				dotFile.write(str(node.uniqueID) + " -> " + str(child.uniqueID) + ";\n")
+			continue
+
+		value = node.value
+		dotFile.write(str(node.uniqueID) + ' [label="' + str(node.type.name) + ( (' \\n' + str(value)) if value != None else '') + '"];\n')
+		stack.append((node, True))
+		stack.extend([(child, False) for child in reversed(node.children)])
+
 def getStringOfArray(array):
 	return ''.join([str(item) for item in array])
 
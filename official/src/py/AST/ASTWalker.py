@@ -1,22 +1,50 @@
+from enum import Enum
 
 from src.py.AST.AST import AST
 from src.py.AST.ASTNode import *
 
+class WalkEvent(Enum):
+	Enter = 1
+	Exit = 2
+
 class ASTWalker:
 	def __init__(self, ast):
 		self.nodes = []
 		self.AST = ast
 
-	def traverseDepthFirst(self):
-		# The queue stores tuples of: the node, and the level on which the node belongs in the AST
-		queue = []
-		queue.append((self.AST.root, 0))
+	def iterDepthFirst(self):
+		"""
+			Generator over the nodes of the AST in pre-order, yields tuples of the form (NODE, LEVEL), where
+				NODE = The node in the AST
+				LEVEL = The level in the AST where the node was found
+		"""
+		# The stack stores tuples of: the node, and the level on which the node belongs in the AST
+		stack = [(self.AST.root, 0)]
 
-		while (len(queue) != 0):
-			currentNode = queue.pop(0)
-			for node in reversed(currentNode[0].children):
-				queue.insert(0,(node, currentNode[1] + 1))
-			self.nodes.append(currentNode)
+		while (len(stack) != 0):
+			node, level = stack.pop()
+			yield (node, level)
+			stack.extend([(child, level + 1) for child in reversed(node.children)])
+
+	def iterEvents(self):
+		"""
+			Generator over the nodes of the AST in depth first order, yields tuples of the form (EVENT, NODE, LEVEL), where
+				EVENT = WalkEvent.Enter before the children of the node are visited, WalkEvent.Exit after
+				NODE = The node in the AST
+				LEVEL = The level in the AST where the node was found
+		"""
+		stack = [(WalkEvent.Enter, self.AST.root, 0)]
+
+		while (len(stack) != 0):
+			event, node, level = stack.pop()
+			yield (event, node, level)
+
+			if event == WalkEvent.Enter:
+				stack.append((WalkEvent.Exit, node, level))
+				stack.extend([(WalkEvent.Enter, child, level + 1) for child in reversed(node.children)])
+
+	def traverseDepthFirst(self):
+		self.nodes = list(self.iterDepthFirst())
 
 	def getNodesDepthFirst(self):
 		"""
@@ -26,4 +54,3 @@ class ASTWalker:
 		"""
 		self.traverseDepthFirst()
 		return self.nodes
-			
\ No newline at end of file
@@ -0,0 +1,222 @@
+import io
+from array import array
+
+from src.py.AST.AST import AST
+from src.py.AST.ASTNode import ASTNodeType, nodeTypes, pointerType, writeDot
+from src.py.CompileContext import getCompileContext
+
+
+class ArrayAST(AST):
+	"""
+		AST that stores its nodes as a struct of arrays instead of as ASTNode objects.
+		Node i is described by the i-th entry of every column:
+			kinds = integer code of the ASTNodeType
+			declTypes = index of the declared pointerType in values, -1 if the node is no declaration
+			parents, firstChildren, nextSiblings, lastChildren = indices of the related nodes, -1 if there are none
+			valueIndices = index of the value in values, -1 if the node has no value
+			lines, columns = position of the node in the source
+			uniqueIDs = the node ID the CompileContext gave to the node, used in the dot output
+			useless = 1 if the node is useless (see UselessDecorator)
+		Equal values are stored once. The annotations of the analysis are only stored for the nodes that have them.
+		The nodes are handed out as ArrayASTNode views, that have the same interface as ASTNode.
+	"""
+	def __init__(self):
+		self.context = getCompileContext()
+
+		self.kinds = array('B')
+		self.declTypes = array('i')
+		self.parents = array('i')
+		self.firstChildren = array('i')
+		self.nextSiblings = array('i')
+		self.lastChildren = array('i')
+		self.valueIndices = array('i')
+		self.lines = array('i')
+		self.columns = array('i')
+		self.uniqueIDs = array('q')
+		self.useless = bytearray()
+
+		self.values = []
+		self.valueLookup = {}
+
+		self.symbols = {}
+		self.followLinkCounts = {}
+		self.nestingDifferences = {}
+		self.deducedTypes = {}
+
+		self.root = ArrayASTNode(self, self.appendNode(ASTNodeType.Program, (0,0), -1, None))
+		self.currentPointer = self.root
+
+	def __len__(self):
+		return len(self.kinds)
+
+	def internValue(self, value):
+		"""
+			Returns the index of value in values, the value is added if it isn't present yet.
+		"""
+		if isinstance(value, pointerType):
+			# pointerTypes are compared by identity, intern them by what they describe
+			key = (pointerType, value.type, value.ptrCount)
+		else:
+			# The type is part of the key, so that True, 1 and 1.0 stay different values
+			key = (type(value), value)
+
+		index = self.valueLookup.get(key)
+		if index == None:
+			index = len(self.values)
+			self.values.append(value)
+			self.valueLookup[key] = index
+		return index
+
+	def appendNode(self, _type, position, parent, value):
+		"""
+			Adds a node as last child of the node with index parent and returns the index of the new node.
+		"""
+		index = len(self.kinds)
+		if isinstance(_type, pointerType):
+			self.kinds.append(ASTNodeType.Declaration.value)
+			self.declTypes.append(self.internValue(_type))
+		else:
+			self.kinds.append(_type.value)
+			self.declTypes.append(-1)
+
+		self.parents.append(parent)
+		self.firstChildren.append(-1)
+		self.nextSiblings.append(-1)
+		self.lastChildren.append(-1)
+		self.valueIndices.append(-1 if value == None else self.internValue(value))
+		self.lines.append(position[0])
+		self.columns.append(position[1])
+		self.uniqueIDs.append(self.context.newNodeID())
+		self.useless.append(0)
+
+		if parent != -1:
+			if self.lastChildren[parent] == -1:
+				self.firstChildren[parent] = index
+			else:
+				self.nextSiblings[self.lastChildren[parent]] = index
+			self.lastChildren[parent] = index
+		return index
+
+	def childIndices(self, index):
+		child = self.firstChildren[index]
+		while child != -1:
+			yield child
+			child = self.nextSiblings[child]
+
+
+class ArrayASTNode:
+	"""
+		View on a node of an ArrayAST, behaves like an ASTNode.
+		Views are created on demand, two views on the same node are equal.
+	"""
+	__slots__ = ["tree", "index"]
+
+	def __init__(self, tree, index):
+		self.tree = tree
+		self.index = index
+
+	def __eq__(self, other):
+		return isinstance(other, ArrayASTNode) and self.index == other.index and self.tree is other.tree
+
+	def __hash__(self):
+		return self.index
+
+	@property
+	def kind(self):
+		return self.tree.kinds[self.index]
+
+	@property
+	def declType(self):
+		declType = self.tree.declTypes[self.index]
+		return self.tree.values[declType] if declType != -1 else None
+
+	@property
+	def type(self):
+		declType = self.tree.declTypes[self.index]
+		if declType != -1:
+			return self.tree.values[declType]
+		return nodeTypes[self.tree.kinds[self.index]]
+
+	@property
+	def children(self):
+		tree = self.tree
+		return [ArrayASTNode(tree, child) for child in tree.childIndices(self.index)]
+
+	@property
+	def parent(self):
+		parent = self.tree.parents[self.index]
+		return ArrayASTNode(self.tree, parent) if parent != -1 else None
+
+	@property
+	def value(self):
+		valueIndex = self.tree.valueIndices[self.index]
+		return self.tree.values[valueIndex] if valueIndex != -1 else None
+
+	@value.setter
+	def value(self, value):
+		self.tree.valueIndices[self.index] = -1 if value == None else self.tree.internValue(value)
+
+	@property
+	def position(self):
+		return (self.tree.lines[self.index], self.tree.columns[self.index])
+
+	@property
+	def uniqueID(self):
+		return self.tree.uniqueIDs[self.index]
+
+	@property
+	def useless(self):
+		return self.tree.useless[self.index] == 1
+
+	@useless.setter
+	def useless(self, useless):
+		self.tree.useless[self.index] = 1 if useless else 0
+
+	@property
+	def symbol(self):
+		return self.tree.symbols.get(self.index)
+
+	@symbol.setter
+	def symbol(self, symbol):
+		self.tree.symbols[self.index] = symbol
+
+	@property
+	def followLinkCount(self):
+		return self.tree.followLinkCounts.get(self.index, 0)
+
+	@followLinkCount.setter
+	def followLinkCount(self, count):
+		self.tree.followLinkCounts[self.index] = count
+
+	@property
+	def nestingDifference(self):
+		return self.tree.nestingDifferences.get(self.index, 0)
+
+	@nestingDifference.setter
+	def nestingDifference(self, difference):
+		self.tree.nestingDifferences[self.index] = difference
+
+	@property
+	def deducedType(self):
+		return self.tree.deducedTypes.get(self.index)
+
+	@deducedType.setter
+	def deducedType(self, deducedType):
+		self.tree.deducedTypes[self.index] = deducedType
+
+	def addChild(self, type, position=(0,0), value=None):
+		return ArrayASTNode(self.tree, self.tree.appendNode(type, position, self.index, value))
+
+	def makeValue(self, type, value):
+		""" Turns the node into a leaf of the given type and value (see ConstantFolder), the old children stay in the arrays unreachable. """
+		tree = self.tree
+		tree.kinds[self.index] = type.value
+		tree.declTypes[self.index] = -1
+		self.value = value
+		tree.firstChildren[self.index] = -1
+		tree.lastChildren[self.index] = -1
+
+	def __str__(self):
+		dotText = io.StringIO()
+		writeDot(self, dotText)
+		return dotText.getvalue()
@@ -0,0 +1,43 @@
+import threading
+
+
+class CompileContext:
+	"""
+		The state of one compilation, so compilations on different threads don't share anything:
+			nextNodeID = the uniqueID the next ASTNode gets, the IDs of the dot output start at 0 for every compilation
+			errorOutput = the stream the lexer writes its messages to, sys.stderr if it is None
+		A context is active in the thread that entered it ('with CompileContext():'), until it is exited.
+		A thread without an active context uses a default context of its own.
+	"""
+	def __init__(self, errorOutput=None):
+		self.nextNodeID = 0
+		self.errorOutput = errorOutput
+
+	def newNodeID(self):
+		nodeID = self.nextNodeID
+		self.nextNodeID += 1
+		return nodeID
+
+	def __enter__(self):
+		getContextStack().append(self)
+		return self
+
+	def __exit__(self, exceptionType, exception, traceback):
+		getContextStack().pop()
+
+
+# Every thread has its own stack of active contexts, with the default context of the thread at the bottom
+threadState = threading.local()
+
+def getContextStack():
+	try:
+		return threadState.contexts
+	except AttributeError:
+		threadState.contexts = [CompileContext()]
+		return threadState.contexts
+
+def getCompileContext():
+	"""
+		Returns the context of the compilation that runs on this thread.
+	"""
+	return getContextStack()[-1]
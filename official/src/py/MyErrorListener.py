@@ -1,3 +1,4 @@
+from antlr4.Token import Token
 from antlr4.error.ErrorListener import ErrorListener
 
 toHumanLanguage = {
@@ -53,17 +54,35 @@ toHumanLanguage = {
     "function" : "function"
     }
 
+# Rules that only match a single value or name, errors in them are reported for the rule they are part of
+valueRules = {"intvalue", "floatvalue", "digits"}
+
+class StreamErrorListener(ErrorListener):
+    """
+        Writes the messages of the lexer to a stream, in the format of the ConsoleErrorListener.
+    """
+    def __init__(self, stream):
+        super(StreamErrorListener, self).__init__()
+        self.stream = stream
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.stream.write("line " + str(line) + ":" + str(column) + " " + msg + "\n")
+
+
 class MyErrorListener( ErrorListener ):
 
-    def __init__(self, filename):
+    def __init__(self, source):
         super(MyErrorListener, self).__init__()
 
-        with open(filename, 'r') as myfile:
-            self.data = myfile.read().split("\n")
+        # The lines of the program, with the line endings of any platform
+        self.data = source.replace("\r\n", "\n").replace("\r", "\n").split("\n")
 
 
     def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
-        stack = recognizer.getRuleInvocationStack()[0]
+        stack = [rule for rule in recognizer.getRuleInvocationStack() if rule not in valueRules][0]
+        if stack == "function" and offendingSymbol.type == Token.EOF:
+            # The program ends before the '}' of the function, so while its statements are parsed
+            stack = "statements"
 
         ex_msg = str(line) + ":" + str(column) + ": " + "Error while/after parsing " + toHumanLanguage[str(stack)] + "\n"
         ex_msg += str(self.data[line - 1]) + "\n"
@@ -85,6 +104,10 @@ class MyErrorListener( ErrorListener ):
                 ex_msg += msg
             else:
                 ex_msg += "Braces don't match"
+        elif msg[0:len("mismatched input")] == "mismatched input" and \
+            not (matching_braces(str(self.data[line - 1]), "(", ")") and matching_braces(str(self.data[line - 1]), "{", "}")):
+            # An unexpected token in a line with unbalanced braces, e.g. where a ')' is missing at the end of an expression
+            ex_msg += "Braces don't match"
         else:
             ex_msg += msg + "\n"
 
@@ -0,0 +1,28 @@
+from src.py.PCODE.PInstruction import PInstruction, PLabel, serializeProgram
+
+
+class PEmitter:
+	"""
+		Collects the generated p code as a list of PInstructions and PLabels, so the program can still be
+		analysed and changed after it has been generated.
+		The program text is only materialized once, when it is requested (e.g. when saving the program).
+	"""
+
+	def __init__(self):
+		self.program = []
+
+	def emit(self, opcode, *operands):
+		"""
+			Appends a single instruction, e.g. emit("lod", "i", 0, 5) results in the line "lod i 0 5".
+		"""
+		self.program.append(PInstruction.fromOperands(opcode, operands))
+
+	def emitLabel(self, label):
+		self.program.append(PLabel(label))
+
+	def getText(self):
+		return serializeProgram(self.program)
+
+	def save(self, filename):
+		with open(filename, 'w') as programFile:
+			programFile.write(self.getText())
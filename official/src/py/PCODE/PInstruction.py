@@ -0,0 +1,79 @@
+# Opcodes whose first operand is the p machine type they work on, conv has a second type as its only other operand
+typedOpcodes = {"ldc", "lod", "str", "ldo", "sro", "ind", "sto", "inc", "dec", "dpl", "add", "sub", "mul", "div", "neg", \
+	"equ", "neq", "grt", "geq", "les", "leq", "conv", "in", "out"}
+
+# Opcodes whose last operand is a label they jump to
+jumpOpcodes = {"ujp", "fjp", "cup"}
+
+
+class PInstruction:
+	"""
+		A single p code instruction, e.g. "lod i 0 5":
+			opcode = "lod"
+			type = "i", None for instructions that don't work on a type
+			operands = (0, 5), the values as the translator gave them (int, float, str)
+	"""
+	__slots__ = ["opcode", "type", "operands"]
+
+	def __init__(self, opcode, type=None, operands=()):
+		self.opcode = opcode
+		self.type = type
+		self.operands = tuple(operands)
+
+	@staticmethod
+	def fromOperands(opcode, operands):
+		"""
+			Makes the instruction for the operands as they are written after the opcode, e.g. ("lod", ["i", 0, 5]).
+		"""
+		if opcode in typedOpcodes:
+			return PInstruction(opcode, operands[0], operands[1:])
+		return PInstruction(opcode, None, operands)
+
+	@property
+	def target(self):
+		"""
+			The label a jump or call goes to, None for other instructions.
+		"""
+		return self.operands[-1] if self.opcode in jumpOpcodes else None
+
+	def __eq__(self, other):
+		return isinstance(other, PInstruction) and self.opcode == other.opcode and self.type == other.type and self.operands == other.operands
+
+	def __hash__(self):
+		return hash((self.opcode, self.type, self.operands))
+
+	def __str__(self):
+		words = [self.opcode] if self.type == None else [self.opcode, self.type]
+		return " ".join(words + [str(operand) for operand in self.operands])
+
+	def __repr__(self):
+		return "PInstruction(" + str(self) + ")"
+
+
+class PLabel:
+	"""
+		The definition of a label, the next instruction is where a jump to the label goes to.
+	"""
+	__slots__ = ["name"]
+
+	def __init__(self, name):
+		self.name = name
+
+	def __eq__(self, other):
+		return isinstance(other, PLabel) and self.name == other.name
+
+	def __hash__(self):
+		return hash(self.name)
+
+	def __str__(self):
+		return self.name + ":"
+
+	def __repr__(self):
+		return "PLabel(" + self.name + ")"
+
+
+def serializeProgram(program):
+	"""
+		Returns the text of a .p file for program, a list of PInstructions and PLabels: one per line.
+	"""
+	return "".join([str(line) + "\n" for line in program])
@@ -0,0 +1,232 @@
+from src.py.PCODE.PInstruction import PInstruction, PLabel
+
+
+# Instructions that only compute a value on the stack: they don't read or write memory by name, don't jump and have no side effects
+pureOpcodes = {"ldc", "lda", "ixa", "add", "sub", "mul", "div", "neg", "equ", "neq", "grt", "geq", "les", "leq", \
+	"and", "or", "not", "conv"}
+
+# Instructions after which the next instruction is only reached by a jump
+unconditionalOpcodes = {"ujp", "retf", "retp", "hlt"}
+
+# Conversions that can be undone without losing anything, (from, to)
+losslessConversions = {("i", "a"), ("a", "i"), ("i", "r"), ("c", "i"), ("b", "i")}
+
+
+class PeepholeOptimizer:
+	"""
+		Removes wasted instructions from a program (a list of PInstructions and PLabels), by looking at a few instructions at a time.
+		The passes are repeated until none of them changes the program anymore, as one change often makes another one possible.
+	"""
+	def __init__(self):
+		self.passes = [self.removeUnreachable, self.threadJumps, self.removeUnusedLabels, self.applyWindowRules]
+		self.windowRules = [self.jumpToNext, self.constantCondition, self.selfAssignment, self.conversionPair, \
+			self.overwrittenStore, self.uselessExpression, self.procedureStackReset]
+
+	def optimize(self, program):
+		changed = True
+		while changed:
+			changed = False
+			for optimizationPass in self.passes:
+				optimized = optimizationPass(program)
+				# A pass can also change instructions without removing any (a jump that gets another target)
+				if optimized != program:
+					changed = True
+				program = optimized
+		return program
+
+
+	#################################################
+	# Passes over the whole program					#
+	#################################################
+
+	def removeUnreachable(self, program):
+		"""
+			Removes the instructions after an unconditional jump, return or hlt, up to the next label.
+		"""
+		optimized = []
+		reachable = True
+		for line in program:
+			if isinstance(line, PLabel):
+				reachable = True
+			if reachable:
+				optimized.append(line)
+			if isinstance(line, PInstruction) and line.opcode in unconditionalOpcodes:
+				reachable = False
+		return optimized
+
+	def threadJumps(self, program):
+		"""
+			A jump to a label that is followed by 'ujp L' goes to L right away.
+		"""
+		forwards = {}
+		following = None
+		# Backwards, so the instruction that follows a label is known when the label is reached
+		for line in reversed(program):
+			if isinstance(line, PLabel):
+				if following != None and following.opcode == "ujp":
+					forwards[line.name] = following.target
+			else:
+				following = line
+
+		optimized = []
+		for line in program:
+			if isinstance(line, PInstruction) and (line.opcode == "ujp" or line.opcode == "fjp") and line.target in forwards:
+				target = line.target
+				# A chain of jumps can end in a loop (for(;;) {}), stop when it comes back
+				seen = {target}
+				while target in forwards and forwards[target] not in seen:
+					target = forwards[target]
+					seen.add(target)
+				line = PInstruction(line.opcode, None, (target,))
+			optimized.append(line)
+		return optimized
+
+	def removeUnusedLabels(self, program):
+		"""
+			Removes the labels no instruction jumps to, so they don't keep unreachable code alive.
+		"""
+		targets = {line.target for line in program if isinstance(line, PInstruction) and line.target != None}
+		return [line for line in program if not isinstance(line, PLabel) or line.name in targets]
+
+	def applyWindowRules(self, program):
+		"""
+			Slides over the program, the first window rule that matches at an instruction replaces the instructions it matched.
+		"""
+		self.labelIndices = {line.name: index for index, line in enumerate(program) if isinstance(line, PLabel)}
+		self.functionReturns = {}
+		optimized = []
+		index = 0
+		while index < len(program):
+			for rule in self.windowRules:
+				match = rule(program, index)
+				if match != None:
+					length, replacement = match
+					optimized += replacement
+					index += length
+					break
+			else:
+				optimized.append(program[index])
+				index += 1
+		return optimized
+
+
+	#################################################
+	# Window rules									#
+	#################################################
+	# A rule gets the program and the index of the first instruction of the window,
+	# and returns None or (amount of matched lines, lines to replace them with)
+
+	def jumpToNext(self, program, index):
+		# ujp L, L: -> L:
+		line = program[index]
+		if not self.isInstruction(line, "ujp"):
+			return None
+		next = index + 1
+		while next < len(program) and isinstance(program[next], PLabel):
+			if program[next].name == line.target:
+				return 1, []
+			next += 1
+		return None
+
+	def constantCondition(self, program, index):
+		# ldc b t, fjp L -> (nothing), the condition is always true
+		# ldc b f, fjp L -> ujp L
+		if index + 1 >= len(program) or not self.isInstruction(program[index], "ldc") or program[index].type != "b" \
+			or not self.isInstruction(program[index + 1], "fjp"):
+			return None
+		if program[index].operands[0] == "t":
+			return 2, []
+		return 2, [PInstruction("ujp", None, (program[index + 1].target,))]
+
+	def selfAssignment(self, program, index):
+		# lod T p q, str T p q -> (nothing)
+		if index + 1 >= len(program) or not self.isInstruction(program[index], "lod") or not self.isInstruction(program[index + 1], "str"):
+			return None
+		if program[index].type == program[index + 1].type and program[index].operands == program[index + 1].operands:
+			return 2, []
+		return None
+
+	def conversionPair(self, program, index):
+		# conv A B, conv B A -> (nothing), if converting to B loses nothing
+		if index + 1 >= len(program) or not self.isInstruction(program[index], "conv") or not self.isInstruction(program[index + 1], "conv"):
+			return None
+		first = program[index]
+		second = program[index + 1]
+		if (first.type, first.operands[0]) in losslessConversions and first.type == second.operands[0] and first.operands[0] == second.type:
+			return 2, []
+		return None
+
+	def overwrittenStore(self, program, index):
+		# ldc T c, str T p q, (pure instructions and loads of other variables), str T p q -> the value c is never read
+		if index + 1 >= len(program) or not self.isInstruction(program[index], "ldc") or not self.isInstruction(program[index + 1], "str"):
+			return None
+		storeType = program[index + 1].type
+		address = program[index + 1].operands
+		next = index + 2
+		while next < len(program):
+			line = program[next]
+			if not isinstance(line, PInstruction):
+				return None
+			if line.opcode == "str" and line.type == storeType and line.operands == address:
+				return 2, []
+			if line.opcode in pureOpcodes or (line.opcode == "lod" and line.operands != address):
+				next += 1
+			else:
+				return None
+		return None
+
+	def uselessExpression(self, program, index):
+		# (pure instructions and loads), ssp n -> ssp n: the values are thrown away anyway
+		next = index
+		while next < len(program) and isinstance(program[next], PInstruction) and \
+			(program[next].opcode in pureOpcodes or program[next].opcode == "lod" or program[next].opcode == "ind"):
+			next += 1
+		if next == index or next == len(program) or not self.isInstruction(program[next], "ssp"):
+			return None
+		return next - index, []
+
+	def procedureStackReset(self, program, index):
+		# cup p L, ssp n -> cup p L, if L is a procedure: it leaves nothing on the stack to throw away
+		if index + 1 >= len(program) or not self.isInstruction(program[index], "cup") or not self.isInstruction(program[index + 1], "ssp"):
+			return None
+		label = program[index].target
+		if label not in self.functionReturns:
+			self.functionReturns[label] = self.returnOpcodes(program, label)
+		if self.functionReturns[label] == {"retp"}:
+			return 2, [program[index]]
+		return None
+
+
+	#################################################
+	# Helpers										#
+	#################################################
+
+	def isInstruction(self, line, opcode):
+		return isinstance(line, PInstruction) and line.opcode == opcode
+
+	def returnOpcodes(self, program, label):
+		"""
+			The return instructions (retf, retp) the function at label can end with, following its jumps.
+		"""
+		labelIndices = self.labelIndices
+		returns = set()
+		visited = set()
+		todo = [labelIndices[label]]
+		while len(todo) != 0:
+			index = todo.pop()
+			while index < len(program) and index not in visited:
+				visited.add(index)
+				line = program[index]
+				if isinstance(line, PInstruction):
+					if line.opcode == "retf" or line.opcode == "retp":
+						returns.add(line.opcode)
+						break
+					elif line.opcode == "hlt":
+						break
+					elif line.opcode == "ujp":
+						todo.append(labelIndices[line.target])
+						break
+					elif line.opcode == "fjp":
+						todo.append(labelIndices[line.target])
+				index += 1
+		return returns
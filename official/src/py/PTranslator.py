@@ -1,23 +1,42 @@
 
-from src.py.AST.ASTWalker import ASTWalker
 from src.py.AST.ASTNode import ASTNodeType, ASTNode, pointerType
-from src.py.ST.SymbolTableBuilder import SymbolTableBuilder
-from src.py.ST.SymbolTable import SymbolTable
+from src.py.AST.ASTWalker import ASTWalker
 from src.py.SA.TypeChecker import TypeChecker
 from src.py.SA.ExistenceChecker import ExistenceChecker
 from src.py.UTIL.TypeDeductor import TypeDeductor
 from src.py.UTIL.VarTypes import *
 from src.py.UTIL.MapToVarType import *
 from src.py.SA.UselessDecorator import UselessDecorator
-from copy import deepcopy
+from src.py.SA.SemanticAnalyzer import SemanticAnalyzer
+from src.py.SA.NameResolver import NameResolver
+from src.py.PCODE.PEmitter import PEmitter
+from src.py.PCODE.PeepholeOptimizer import PeepholeOptimizer
+from src.py.UTIL.ConstantFolder import ConstantFolder
+
+import os, re
+from collections import deque
+
+# Arrays with at least this many elements are initialized by a loop instead of a store per element
+defaultArrayLoopSize = 256
+# The amount of elements one iteration of that loop sets
+arrayLoopBlockSize = 8
+# Char arrays with at least this many elements are printed (%s) and read by a shared routine instead of an instruction sequence per element
+stringLoopSize = 8
+
+def getArrayLoopSize():
+    arrayLoopSize = os.environ.get("C2P_ARRAY_LOOP_SIZE", str(defaultArrayLoopSize))
+    if not arrayLoopSize.isdigit() or int(arrayLoopSize) == 0:
+        # Reported like the errors in the program, instead of a traceback
+        raise Exception("C2P_ARRAY_LOOP_SIZE should be a number of elements of at least 1, not '" + arrayLoopSize + "'.")
+    return int(arrayLoopSize)
 
-import re
 
 class PTranslator:
-    def __init__(self):
+    def __init__(self, arrayLoopSize=None):
         self.AST = None
-        self.programText = ""
-        self.fringe = []
+        self.symbolTable = None
+        self.emitter = PEmitter()
+        self.fringe = deque()
 
         # These arrays contain  tuple of begin and end labels of the loops
         # This is needed for break and continue statements (they must know where to jump to)
@@ -31,50 +50,45 @@ class PTranslator:
 
         # For readability, include this in the label of while loops, for loops, ifelse,...
         self.currentFunction = ""
+        self.currentFunctionType = None
         self.functionSSPMap = {}
 
+        self.arrayLoopSize = arrayLoopSize if arrayLoopSize != None else getArrayLoopSize()
 
-    def doExistenceChecking(self, nodes):
-        symbolTable = SymbolTable()
-        symbolTableBuilder = SymbolTableBuilder(symbolTable)
-        existenceChecker = ExistenceChecker(symbolTable)
-
+        # Text of the format strings that is stored once, as global data: text -> address
+        self.stringPool = {}
+        # The shared routines (see setCharsRoutine) the program calls
+        self.charsRoutines = set()
 
-        # Existence checking (main, assignment of variables, ...)
-        ExistenceChecker.checkMainExistence(nodes)
-        for (node, nodeLevel) in nodes:
-            symbolTableBuilder.processNode(node, nodeLevel)
-            existenceChecker.checkExistence(node)
 
+    def analyse(self):
+        # Existence checking (main, assignment of variables, ...), type checking and decorating of useless statements
+        # all happen in the same traversal of the AST
+        analyzer = SemanticAnalyzer()
+        # The names have to be resolved before the other visitors use them
+        analyzer.addVisitor(NameResolver(analyzer.symbolTable))
+        analyzer.addVisitor(ExistenceChecker(analyzer.symbolTable))
+        analyzer.addVisitor(TypeChecker(analyzer.symbolTable))
+        analyzer.addVisitor(UselessDecorator())
 
-    def doTypeCheckingDecorating(self, nodes):
-        symbolTable = SymbolTable()
-        symbolTableBuilder = SymbolTableBuilder(symbolTable)
-        typeChecker = TypeChecker(symbolTable)
-        uselessDecorator = UselessDecorator()
+        # Functions can only be defined at the top level of the program
+        ExistenceChecker.checkMainExistence([(node, 1) for node in self.AST.root.children])
 
-        # Type checking + decorating of useless statements
-        for (node, nodeLevel) in nodes:
-            symbolTableBuilder.processNode(node, nodeLevel)
-            typeChecker.checkType(node)
-            # Decorate nodes for uselessness
-            uselessDecorator.checkUselessness(node, nodeLevel)
+        return analyzer.analyse(self.AST)
 
-
-    def translate(self, ast, translate = True):
+    def translate(self, ast, translate = True, optimize = False):
         self.AST = ast
-        astwalker = ASTWalker(self.AST)
-        nodes = astwalker.getNodesDepthFirst()
 
-        # Syntax analysis
-        self.doExistenceChecking(nodes)
-        self.doTypeCheckingDecorating(nodes)
+        # Syntax analysis, the resulting symbol table contains all global symbols and function signatures
+        self.symbolTable = self.analyse()
+
+        # Compute the constant expressions before they are translated (-O)
+        if optimize:
+            ConstantFolder().fold(self.AST)
 
         # Actual translation
         if translate:
-            symbolTable = SymbolTable()
-            self.symbolTableBuilder = SymbolTableBuilder(symbolTable)
-            self.fringe.append(nodes[0])
+            self.fringe.append((self.AST.root, 0))
             self.parseExpression()
 
 
@@ -85,9 +99,9 @@ class PTranslator:
 
         node = self.fringe[0][0]
         nodeLevel = self.fringe[0][1]
-        self.symbolTableBuilder.processNode(node, nodeLevel)
+        nodeType = node.type
 
-        if node.type == ASTNodeType.Program:
+        if nodeType == ASTNodeType.Program:
 
             self.setGlobalDeclarations(node, nodeLevel)
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
@@ -95,43 +109,44 @@ class PTranslator:
                 if not isinstance(self.fringe[0][0].type, pointerType) and self.fringe[0][0].type != ASTNodeType.ArrayDecl:
                     self.parseExpression()
                 else:
-                    self.symbolTableBuilder.processNode(self.fringe[0][0], nodeLevel + 1)
-                    del self.fringe[0]
+                    # Global declarations are already initialized
+                    self.fringe.popleft()
+
+            for routine in sorted(self.charsRoutines):
+                self.setCharsRoutine(routine)
 
 
 
         #################################
         # Functions                     #
         #################################
-        elif node.type == ASTNodeType.Function:
+        elif nodeType == ASTNodeType.Function:
             # Set the current function name
             self.currentFunction = node.value
-
-            # Process the arguments
-            self.processFunctionArgs(node.children[1], nodeLevel + 2)
+            self.currentFunctionType = node.symbol.type
 
             # calculate the amout of space needed
             declarations, declarationsWithArrays = self.getAmoutOfDeclarations(node)
 
             if node.value == "main":
-                self.setMain()
+                self.setMain(node)
 
-            self.programText += "label_" + node.value + ":\n"
+            self.emitter.emitLabel("label_" + node.value)
             # We know that according to the slides, this only includes the static part, but we saw no other way to do this with arrays
-            self.programText += "ssp " + str(declarationsWithArrays + 5) + "\n"
+            self.emitter.emit("ssp", declarationsWithArrays + 5)
 
             self.functionSSPMap[node.value] = declarationsWithArrays + 5
 
-            self.programText += "sep " + str(max(self.calculateEP(node), 1)) + "\n"
+            self.emitter.emit("sep", max(self.calculateEP(node), 1))
             # Local procedure declarations are not possible in C so some things can be skipped
 
             # Set default return value
-            returnType = self.symbolTableBuilder.symbolTable.lookupSymbol(node.value).type.returnType
+            returnType = node.symbol.type.returnType
             if isinstance(returnType, PointerType):
                 # not necessary if the return type is void
                 if returnType != VoidType():
-                    self.programText += "ldc " + returnType.getPString() + " " + returnType.getDefaultValue() + "\n"
-                    self.programText += "str " + returnType.getPString() + " 0 0\n"
+                    self.emitter.emit("ldc", returnType.getPString(), returnType.getDefaultValue())
+                    self.emitter.emit("str", returnType.getPString(), 0, 0)
 
             self.nextArrayAddress = declarations + 5
 
@@ -139,57 +154,52 @@ class PTranslator:
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
             self.parseExpression()
 
-        elif node.type == ASTNodeType.FunctionCall:
-            del self.fringe[0]
+        elif nodeType == ASTNodeType.FunctionCall:
+            self.fringe.popleft()
 
             # calculate the amout of space needed
-            arguments = len(self.symbolTableBuilder.symbolTable.lookupSymbol(node.value).type.arguments)
-
-            # Get defining occurence difference from symbol table
-            definingOccurrence = self.symbolTableBuilder.symbolTable.getDefOcc(node.value)
+            arguments = len(node.symbol.type.arguments)
 
-            # Get applied occurrence
-            appliedOccurrence = self.symbolTableBuilder.symbolTable.getAppOcc()
-
-
-            self.programText += "mst " + str(appliedOccurrence - definingOccurrence) + "\n"
+            # Difference between the applied and the defining occurrence
+            self.emitter.emit("mst", node.nestingDifference)
 
             # Set the arguments:
             self.setFunctionArguments(node, nodeLevel)
 
             # Jump to the function
-            self.programText += "cup " + str(arguments) + " label_" + node.value + "\n"
+            self.emitter.emit("cup", arguments, "label_" + node.value)
 
-        elif node.type == ASTNodeType.ReturnType:
+        elif nodeType == ASTNodeType.ReturnType:
             self.parseChildrenFirst(node, nodeLevel)
 
-        elif node.type == ASTNodeType.FunctionBody:
+        elif nodeType == ASTNodeType.FunctionBody:
             self.parseChildrenFirst(node, nodeLevel)
             if node.parent.children[0].value.type == ASTNodeType.Void:
-                self.programText += "retp\n"
+                self.emitter.emit("retp")
             else:
-                self.programText += "retf\n"
+                self.emitter.emit("retf")
 
-        elif node.type == ASTNodeType.Return:
+        elif nodeType == ASTNodeType.Return:
             self.parseChildrenFirst(node, nodeLevel)
 
             if len(node.children) != 0:
-                myType = TypeDeductor.deductType(node.children[0], self.symbolTableBuilder.symbolTable)
-                self.programText += "str " + myType.getPString() + " 0 0\nretf\n"
+                myType = TypeDeductor.deductType(node.children[0])
+                self.emitter.emit("str", myType.getPString(), 0, 0)
+                self.emitter.emit("retf")
             else:
-                returnType = self.symbolTableBuilder.symbolTable.lookupSymbol(self.currentFunction).type.returnType
+                returnType = self.currentFunctionType.returnType
 
                 if isinstance(returnType, PointerType) and isinstance(returnType.type, VoidType):
-                    self.programText += "retp\n"
+                    self.emitter.emit("retp")
                 else:
-                    self.programText += "retf\n"
+                    self.emitter.emit("retf")
 
         #################################
         # Declarations                  #
         #################################
-        elif isinstance(node.type, pointerType) and \
-            (node.type.type == ASTNodeType.FloatDecl or node.type.type == ASTNodeType.IntDecl or \
-             node.type.type == ASTNodeType.CharDecl or node.type.type == ASTNodeType.BoolDecl):
+        elif isinstance(nodeType, pointerType) and \
+            (nodeType.type == ASTNodeType.FloatDecl or nodeType.type == ASTNodeType.IntDecl or \
+             nodeType.type == ASTNodeType.CharDecl or nodeType.type == ASTNodeType.BoolDecl):
             child_amount = len(node.children)
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
 
@@ -197,78 +207,78 @@ class PTranslator:
                 self.parseExpression()
             else:
                 # Give a default value
-                mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(node.value)
-                followLinkCount = self.getFollowLinkCount(node.value)
-                self.programText += "ldc " + mapping.type.getPString() + " " + mapping.type.getDefaultValue() + "\n"
-                self.programText += "str " + mapping.type.getPString() + " " + str(followLinkCount) + " " + str(mapping.address + 5) + "\n"
+                mapping = node.symbol
+                followLinkCount = node.followLinkCount
+                self.emitter.emit("ldc", mapping.type.getPString(), mapping.type.getDefaultValue())
+                self.emitter.emit("str", mapping.type.getPString(), followLinkCount, mapping.address + 5)
 
 
         #################################
         # Operations                    #
         #################################
-        elif node.type == ASTNodeType.Initialization:
+        elif nodeType == ASTNodeType.Initialization:
             # Set the rhs
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
             self.parseExpression()
 
-            mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(node.parent.value)
-            followLinkCount = self.getFollowLinkCount(node.parent.value)
+            mapping = node.parent.symbol
+            followLinkCount = node.parent.followLinkCount
 
             # Conversion between int to address if necessary
-            typeRhs = TypeDeductor.deductType(node.children[0], self.symbolTableBuilder.symbolTable)
+            typeRhs = TypeDeductor.deductType(node.children[0])
             if typeRhs.getPString() == 'i' and mapping.type.getPString() == 'a':
-                self.programText += "conv i a\n"
+                self.emitter.emit("conv", "i", "a")
 
-            self.programText += "str " + mapping.type.getPString() + " " + str(followLinkCount) + " " + str(mapping.address + 5) + "\n"
+            self.emitter.emit("str", mapping.type.getPString(), followLinkCount, mapping.address + 5)
 
-        elif node.type == ASTNodeType.Addition:
-            myType0 = TypeDeductor.deductType(node.children[0], self.symbolTableBuilder.symbolTable)
-            myType1 = TypeDeductor.deductType(node.children[1], self.symbolTableBuilder.symbolTable)
+        elif nodeType == ASTNodeType.Addition:
+            myType0 = TypeDeductor.deductType(node.children[0])
+            myType1 = TypeDeductor.deductType(node.children[1])
 
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
 
             if isinstance(myType0, PointerType) and myType0.ptrCount != 0:
                 self.parseMultipleExpressions(2)
-                self.programText += "ixa 1\n"
+                self.emitter.emit("ixa", 1)
 
             elif isinstance(myType1, PointerType) and myType1.ptrCount != 0:
                 self.fringe[0], self.fringe[1] = self.fringe[1], self.fringe[0]
 
                 self.parseMultipleExpressions(2)
-                self.programText += "ixa 1\n"
+                self.emitter.emit("ixa", 1)
 
             else:
                 self.parseMultipleExpressions(2)
-                myType = TypeDeductor.deductType(node, self.symbolTableBuilder.symbolTable)
-                self.programText += "add " + myType.getPString() + "\n"
+                myType = TypeDeductor.deductType(node)
+                self.emitter.emit("add", myType.getPString())
 
-        elif node.type == ASTNodeType.Subtraction:
+        elif nodeType == ASTNodeType.Subtraction:
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
             self.parseExpression()
             self.parseExpression()
 
-            myType = TypeDeductor.deductType(node, self.symbolTableBuilder.symbolTable)
-            self.programText += "sub " + myType.getPString() + "\n"
+            myType = TypeDeductor.deductType(node)
+            self.emitter.emit("sub", myType.getPString())
 
-        elif node.type == ASTNodeType.Mul:
+        elif nodeType == ASTNodeType.Mul:
             self.parseChildrenFirst(node, nodeLevel)
 
-            myType = TypeDeductor.deductType(node, self.symbolTableBuilder.symbolTable)
-            self.programText += "mul " + myType.getPString() + "\n"
+            myType = TypeDeductor.deductType(node)
+            self.emitter.emit("mul", myType.getPString())
 
-        elif node.type == ASTNodeType.Div:
+        elif nodeType == ASTNodeType.Div:
             self.parseChildrenFirst(node, nodeLevel)
 
-            myType = TypeDeductor.deductType(node, self.symbolTableBuilder.symbolTable)
-            self.programText += "div " + myType.getPString() + "\n"
+            myType = TypeDeductor.deductType(node)
+            self.emitter.emit("div", myType.getPString())
 
-        elif node.type == ASTNodeType.Assignment:
-            myType = TypeDeductor.deductType(node.children[0], self.symbolTableBuilder.symbolTable)
+        elif nodeType == ASTNodeType.Assignment:
+            myType = TypeDeductor.deductType(node.children[0])
             if node.children[0].type == ASTNodeType.LValueArrayElement:
                 self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
 
-                mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(node.children[0].value)
-                followLinkCount = self.getFollowLinkCount(node.children[0].value)
+                mapping = node.children[0].symbol
+                followLinkCount = node.children[0].followLinkCount
 
                 # Set the value of the lhs
                 self.parseExpression()
@@ -276,11 +286,11 @@ class PTranslator:
                 # Set the value of the rhs
                 self.parseExpression()
                 # Conversion between int to address if necessary
-                typeRhs = TypeDeductor.deductType(node.children[1], self.symbolTableBuilder.symbolTable)
+                typeRhs = TypeDeductor.deductType(node.children[1])
                 if typeRhs.getPString() == 'i' and myType.getPString() == 'a':
-                    self.programText += "conv i a\n"
+                    self.emitter.emit("conv", "i", "a")
 
-                self.programText += "sto " + myType.getPString() + "\n"
+                self.emitter.emit("sto", myType.getPString())
 
             elif node.children[0].type == ASTNodeType.Dereference:
                 derefNode = node.children[0]
@@ -294,176 +304,167 @@ class PTranslator:
                 self.parseExpression()
                 # Dereference (not all! we need the address)
                 for i in range(len(derefNode.value) - 1):
-                    self.programText += "ind a\n"
+                    self.emitter.emit("ind", "a")
 
                 # Set the value of the rhs
                 self.parseExpression()
 
                 # Conversion between int to address if necessary
-                typeRhs = TypeDeductor.deductType(node.children[1], self.symbolTableBuilder.symbolTable)
+                typeRhs = TypeDeductor.deductType(node.children[1])
                 if typeRhs.getPString() == 'i' and myType.type.getPString() == 'a':
-                    self.programText += "conv i a\n"
+                    self.emitter.emit("conv", "i", "a")
 
-                self.programText += "sto " + myType.type.getPString() + "\n"
+                self.emitter.emit("sto", myType.type.getPString())
 
             elif isinstance(myType, ReferenceType):
                 self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
                 # delete the reference node, we don't need to evaluate it
-                del self.fringe[0]
+                self.fringe.popleft()
 
                 # Set address of the reference on the stack
-                mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(node.children[0].value)
-                followLinkCount = self.getFollowLinkCount(node.value)
-                self.programText += "lod a " + str(followLinkCount) + " " + str(mapping.address + 5) + "\n"
+                mapping = node.children[0].symbol
+                followLinkCount = node.children[0].followLinkCount
+                self.emitter.emit("lod", "a", followLinkCount, mapping.address + 5)
 
                 # evaluate the lhs
                 self.parseExpression()
 
                 # Conversion between int to address if necessary
-                typeRhs = TypeDeductor.deductType(node.children[1], self.symbolTableBuilder.symbolTable)
+                typeRhs = TypeDeductor.deductType(node.children[1])
                 if typeRhs.getPString() == 'i' and myType.getPString() == 'a':
-                    self.programText += "conv i a\n"
-                self.programText += "sto " + myType.getPString() + "\n"
+                    self.emitter.emit("conv", "i", "a")
+                self.emitter.emit("sto", myType.getPString())
 
             elif node.children[0].type != ASTNodeType.Dereference and not isinstance(myType, ReferenceType):
                 self.parseChildrenFirst(node, nodeLevel)
-                mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(node.children[0].value)
-                followLinkCount = self.getFollowLinkCount(node.children[0].value)
+                mapping = node.children[0].symbol
+                followLinkCount = node.children[0].followLinkCount
 
                 # Conversion between int to address if necessary
-                typeRhs = TypeDeductor.deductType(node.children[1], self.symbolTableBuilder.symbolTable)
+                typeRhs = TypeDeductor.deductType(node.children[1])
                 if typeRhs.getPString() == 'i' and mapping.type.getPString() == 'a':
-                    self.programText += "conv i a\n"
+                    self.emitter.emit("conv", "i", "a")
 
-                self.programText += "str " + mapping.type.getPString() + " " + str(followLinkCount) + " " + str(mapping.address + 5) + "\n"
+                self.emitter.emit("str", mapping.type.getPString(), followLinkCount, mapping.address + 5)
 
 
 
-        elif node.type == ASTNodeType.Negate:
-            myType = TypeDeductor.deductType(node.children[0], self.symbolTableBuilder.symbolTable)
+        elif nodeType == ASTNodeType.Negate:
+            myType = TypeDeductor.deductType(node.children[0])
             self.addChildrenToFringe(node, nodeLevel, True)
             self.parseMultipleExpressions(len(node.children))
-            self.programText += "neg " + myType.getPString() + "\n"
+            self.emitter.emit("neg", myType.getPString())
 
         #################################
         # Values                        #
         #################################
-        elif node.type == ASTNodeType.RValueInt:
-            self.programText += "ldc i " + str(node.value) + "\n"
-            del self.fringe[0]
+        elif nodeType == ASTNodeType.RValueInt:
+            self.emitter.emit("ldc", "i", node.value)
+            self.fringe.popleft()
 
-        elif node.type == ASTNodeType.RValueChar:
-            self.programText += "ldc c " + str(node.value) + "\n"
-            del self.fringe[0]
+        elif nodeType == ASTNodeType.RValueChar:
+            self.emitter.emit("ldc", "c", node.value)
+            self.fringe.popleft()
 
-        elif node.type == ASTNodeType.RValueFloat:
-            self.programText += "ldc r " + str(node.value) + "\n"
-            del self.fringe[0]
+        elif nodeType == ASTNodeType.RValueFloat:
+            self.emitter.emit("ldc", "r", node.value)
+            self.fringe.popleft()
 
-        elif node.type == ASTNodeType.RValueBool:
-            self.programText += "ldc b " + ("t" if node.value == True else "f") + "\n"
-            del self.fringe[0]
+        elif nodeType == ASTNodeType.RValueBool:
+            self.emitter.emit("ldc", "b", "t" if node.value == True else "f")
+            self.fringe.popleft()
 
-        elif node.type == ASTNodeType.RValueID:
-            myType = TypeDeductor.deductType(node, self.symbolTableBuilder.symbolTable)
-            mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(node.value)
-            followLinkCount = self.getFollowLinkCount(node.value)
+        elif nodeType == ASTNodeType.RValueID:
+            myType = TypeDeductor.deductType(node)
+            mapping = node.symbol
+            followLinkCount = node.followLinkCount
 
             if isinstance(myType, ReferenceType):
                 # delete the reference node, we don't need to evaluate it
-                del self.fringe[0]
+                self.fringe.popleft()
 
                 # Set address of the reference on the stack
-                mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(node.value)
-                followLinkCount = self.getFollowLinkCount(node.value)
-                self.programText += "lod a " + str(followLinkCount) + " " + str(mapping.address + 5) + "\n"
+                self.emitter.emit("lod", "a", followLinkCount, mapping.address + 5)
 
                 # Get its value
-                self.programText += "ind " + myType.getPString() + "\n"
+                self.emitter.emit("ind", myType.getPString())
             elif isinstance(myType, ArrayType) or (isinstance(myType, PointerType) and myType.ptrCount != 0):
-                self.programText += "lod a " + str(followLinkCount) + " " + str(mapping.address + 5) + "\n"
-                del self.fringe[0]
+                self.emitter.emit("lod", "a", followLinkCount, mapping.address + 5)
+                self.fringe.popleft()
             else:
-                self.programText += "lod " + mapping.type.getPString() + " " + str(followLinkCount) + " " + str(mapping.address + 5) + "\n"
-                del self.fringe[0]
+                self.emitter.emit("lod", mapping.type.getPString(), followLinkCount, mapping.address + 5)
+                self.fringe.popleft()
 
-        elif node.type == ASTNodeType.RValueAddress:
+        elif nodeType == ASTNodeType.RValueAddress:
             if node.children[0].type != ASTNodeType.LValueArrayElement:
-                del self.fringe[0]
+                self.fringe.popleft()
 
                 # The argument should be (and will be because of error detection) an lvalue
-                mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(node.children[0].value)
-                followLinkCount = self.getFollowLinkCount(node.children[0].value)
-                self.programText += "lda " + str(followLinkCount) + " " + str(mapping.address + 5) + "\n"
+                mapping = node.children[0].symbol
+                followLinkCount = node.children[0].followLinkCount
+                self.emitter.emit("lda", followLinkCount, mapping.address + 5)
 
             else:
-                mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(node.children[0].value)
-                followLinkCount = self.getFollowLinkCount(node.children[0].value)
-                self.programText += "lod a " + str(followLinkCount) + " " + str(mapping.address + 5) + "\n"
+                mapping = node.children[0].symbol
+                followLinkCount = node.children[0].followLinkCount
+                self.emitter.emit("lod", "a", followLinkCount, mapping.address + 5)
 
                 self.parseChildrenFirst(node.children[0], nodeLevel + 1, deleteFirst=True)
-                self.programText += "ixa 1\n"
+                self.emitter.emit("ixa", 1)
 
 
-        elif node.type == ASTNodeType.LValue:
+        elif nodeType == ASTNodeType.LValue:
             # When here, we expect
-            del self.fringe[0]
+            self.fringe.popleft()
 
-        elif node.type == ASTNodeType.RValueArrayElement:
+        elif nodeType == ASTNodeType.RValueArrayElement:
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
 
-            mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(node.value)
-            followLinkCount = self.getFollowLinkCount(node.value)
-            self.programText += "lod a " + str(followLinkCount) + " " + str(mapping.address + 5) + "\n"
+            mapping = node.symbol
+            followLinkCount = node.followLinkCount
+            self.emitter.emit("lod", "a", followLinkCount, mapping.address + 5)
             self.parseExpression()
-            self.programText += "ixa 1\n"
-            self.programText += "ind " + mapping.type.type.getPString() + "\n"
+            self.emitter.emit("ixa", 1)
+            self.emitter.emit("ind", mapping.type.type.getPString())
 
-        elif node.type == ASTNodeType.LValueArrayElement:
+        elif nodeType == ASTNodeType.LValueArrayElement:
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
 
-            mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(node.value)
-            followLinkCount = self.getFollowLinkCount(node.value)
-            self.programText += "lod a " + str(followLinkCount) + " " + str(mapping.address + 5) + "\n"
+            mapping = node.symbol
+            followLinkCount = node.followLinkCount
+            self.emitter.emit("lod", "a", followLinkCount, mapping.address + 5)
 
             self.parseExpression()
 
-            self.programText += "ixa 1\n"
+            self.emitter.emit("ixa", 1)
 
         ##################################
         # Pointers and arrays#
         ##################################
-        elif node.type == ASTNodeType.Dereference:
+        elif nodeType == ASTNodeType.Dereference:
             child_amount = len(node.children)
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
             self.parseMultipleExpressions(child_amount)
 
-            myType = TypeDeductor.deductType(node, self.symbolTableBuilder.symbolTable)
+            myType = TypeDeductor.deductType(node)
             for i in range(len(node.value) - 1):
-                self.programText += "ind a\n"
-
-            self.programText += "ind " + myType.getPString() + "\n"
+                self.emitter.emit("ind", "a")
 
-        elif node.type == ASTNodeType.ArrayDecl:
-            del self.fringe[0]
+            self.emitter.emit("ind", myType.getPString())
 
-            mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(node.value)
-            followLinkCount = self.getFollowLinkCount(node.parent.value)
-            self.programText += "lda " + str(followLinkCount) + " " + str(self.nextArrayAddress) + "\n"
-            self.programText += "str a " + str(followLinkCount) + " " + str(mapping.address + 5) + "\n"
+        elif nodeType == ASTNodeType.ArrayDecl:
+            self.fringe.popleft()
 
-            if isinstance(node.children[0].value, pointerType):
-                Type = PointerType(IntType(), 1) if node.children[0].value.ptrCount != 0 else mapTypeToVarType(node.children[0].value.type)
-
-                for i in range(int(node.children[1].value)):
-                    self.programText += "ldc " + Type.getPString() + " " + Type.getDefaultValue() + "\n" + \
-                        "str " + Type.getPString() + " " + str(followLinkCount) + " " + str(self.nextArrayAddress) + "\n"
-                    self.nextArrayAddress += 1
+            mapping = node.symbol
+            followLinkCount = node.followLinkCount
+            size = int(node.children[1].value)
+            self.setArray(node, followLinkCount, mapping.address + 5, self.nextArrayAddress, self.currentFunction)
+            self.nextArrayAddress += size
 
         #################################
         # While Loops                   #
         #################################
-        elif node.type == ASTNodeType.While:
+        elif nodeType == ASTNodeType.While:
             self.mostRecentLoop = "while"
 
             loopBegin = self.currentFunction + "_while_" + str(self.nextLabelNumber)
@@ -474,26 +475,26 @@ class PTranslator:
 
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
 
-            self.programText += loopBegin + ":\n"
+            self.emitter.emitLabel(loopBegin)
             self.parseExpression()
-            self.programText += "fjp " + skipLoopLabel + "\n"
+            self.emitter.emit("fjp", skipLoopLabel)
             self.parseExpression()
 
             del self.currentWhileLoops[-1]
 
-        elif node.type == ASTNodeType.WhileBody:
+        elif nodeType == ASTNodeType.WhileBody:
             child_amount = len(node.children)
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
             self.parseMultipleExpressions(child_amount)
 
-            self.programText += "ujp " + self.currentWhileLoops[-1][0] + "\n"
-            self.programText += self.currentWhileLoops[-1][1] + ":\n"
+            self.emitter.emit("ujp", self.currentWhileLoops[-1][0])
+            self.emitter.emitLabel(self.currentWhileLoops[-1][1])
 
 
         #################################
         # For Loops                     #
         #################################
-        elif node.type == ASTNodeType.For:
+        elif nodeType == ASTNodeType.For:
             self.mostRecentLoop = "for"
 
             loopBegin = self.currentFunction + "_for_" + str(self.nextLabelNumber)
@@ -506,30 +507,30 @@ class PTranslator:
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
 
             self.parseExpression()
-            self.programText += loopBegin + ":\n"
+            self.emitter.emitLabel(loopBegin)
             self.parseExpression()
-            self.programText += "fjp " + skipLoopLabel + "\n"
+            self.emitter.emit("fjp", skipLoopLabel)
 
             # swap the body with the third for statement, as the third for statement has to be executed AFTER the body
             self.fringe[0], self.fringe[1] = self.fringe[1], self.fringe[0]
             self.parseExpression()
             self.parseExpression()
 
-            self.programText += "ujp " + self.currentForloops[-1][0] + "\n"
-            self.programText += self.currentForloops[-1][1] + ":\n"
+            self.emitter.emit("ujp", self.currentForloops[-1][0])
+            self.emitter.emitLabel(self.currentForloops[-1][1])
 
             del self.currentForloops[-1]
 
-        elif node.type == ASTNodeType.ForStmt1 or node.type == ASTNodeType.ForStmt2 or node.type == ASTNodeType.ForStmt3:
+        elif nodeType == ASTNodeType.ForStmt1 or nodeType == ASTNodeType.ForStmt2 or nodeType == ASTNodeType.ForStmt3:
             child_amount = len(node.children)
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
 
             if child_amount != 0:
                 self.parseExpression()
-            elif node.type == ASTNodeType.ForStmt2:
-                self.programText += "ldc b t\n"
+            elif nodeType == ASTNodeType.ForStmt2:
+                self.emitter.emit("ldc", "b", "t")
 
-        elif node.type == ASTNodeType.ForBody:
+        elif nodeType == ASTNodeType.ForBody:
             child_amount = len(node.children)
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
             self.parseMultipleExpressions(child_amount)
@@ -537,28 +538,26 @@ class PTranslator:
         #################################
         # Break and continue            #
         #################################
-        elif node.type == ASTNodeType.Break:
-            del self.fringe[0]
+        elif nodeType == ASTNodeType.Break:
+            self.fringe.popleft()
 
-            self.programText += "ujp "
             if self.mostRecentLoop == "for":
-                self.programText += self.currentForloops[-1][1] + "\n"
+                self.emitter.emit("ujp", self.currentForloops[-1][1])
             else:
-                self.programText += self.currentWhileLoops[-1][1] + "\n"
+                self.emitter.emit("ujp", self.currentWhileLoops[-1][1])
 
-        elif node.type == ASTNodeType.Continue:
-            del self.fringe[0]
+        elif nodeType == ASTNodeType.Continue:
+            self.fringe.popleft()
 
-            self.programText += "ujp "
             if self.mostRecentLoop == "for":
-                self.programText += self.currentForloops[-1][0] + "\n"
+                self.emitter.emit("ujp", self.currentForloops[-1][0])
             else:
-                self.programText += self.currentWhileLoops[-1][0] + "\n"
+                self.emitter.emit("ujp", self.currentWhileLoops[-1][0])
 
         #################################
         # If-else                       #
         #################################
-        elif node.type == ASTNodeType.IfElse:
+        elif nodeType == ASTNodeType.IfElse:
             ifElseFalse = self.currentFunction + "_ifelse_" + str(self.nextLabelNumber) + "_false"
             ifElseEnd = self.currentFunction + "_ifelse_" + str(self.nextLabelNumber) + "_end"
 
@@ -567,19 +566,18 @@ class PTranslator:
             self.nextLabelNumber += 1
 
             child_amount = len(node.children)
-            self.addChildrenToFringe(node, nodeLevel)
-            del self.fringe[child_amount]
+            self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
 
             self.parseExpression()
-            self.programText += "fjp " + ifElseFalse + "\n"
+            self.emitter.emit("fjp", ifElseFalse)
             self.parseExpression()
-            self.programText += "ujp " + ifElseEnd + "\n"
-            self.programText += ifElseFalse + ":\n"
+            self.emitter.emit("ujp", ifElseEnd)
+            self.emitter.emitLabel(ifElseFalse)
             if child_amount == 3:
                 self.parseExpression()
-            self.programText += ifElseEnd + ":\n"
+            self.emitter.emitLabel(ifElseEnd)
 
-        elif node.type == ASTNodeType.IfTrue or node.type == ASTNodeType.IfFalse:
+        elif nodeType == ASTNodeType.IfTrue or nodeType == ASTNodeType.IfFalse:
             child_amount = len(node.children)
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
             self.parseMultipleExpressions(child_amount)
@@ -587,37 +585,37 @@ class PTranslator:
         #################################
         # Booleans and conditions       #
         #################################
-        elif node.type == ASTNodeType.Condition:
+        elif nodeType == ASTNodeType.Condition:
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
             self.parseExpression()
 
-        elif node.type == ASTNodeType.Not or node.type == ASTNodeType.NegateBrackets or node.type == ASTNodeType.And or node.type == ASTNodeType.Or:
+        elif nodeType == ASTNodeType.Not or nodeType == ASTNodeType.NegateBrackets or nodeType == ASTNodeType.And or nodeType == ASTNodeType.Or:
             child_amount = len(node.children)
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
             self.parseMultipleExpressions(child_amount)
 
-            operators = {ASTNodeType.Not: "not\n", ASTNodeType.NegateBrackets: "not\n", ASTNodeType.And: "and\n", ASTNodeType.Or: "or\n"}
-            self.programText += operators[node.type]
+            operators = {ASTNodeType.Not: "not", ASTNodeType.NegateBrackets: "not", ASTNodeType.And: "and", ASTNodeType.Or: "or"}
+            self.emitter.emit(operators[nodeType])
         
-        elif node.type == ASTNodeType.Equals or node.type == ASTNodeType.NotEquals or node.type == ASTNodeType.Greater or \
-            node.type == ASTNodeType.GreaterOrEqual or node.type == ASTNodeType.Less or node.type == ASTNodeType.LessOrEqual:
+        elif nodeType == ASTNodeType.Equals or nodeType == ASTNodeType.NotEquals or nodeType == ASTNodeType.Greater or \
+            nodeType == ASTNodeType.GreaterOrEqual or nodeType == ASTNodeType.Less or nodeType == ASTNodeType.LessOrEqual:
 
             child_amount = len(node.children)
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
             self.parseMultipleExpressions(child_amount)
 
-            operators = {ASTNodeType.Equals: "equ ", ASTNodeType.NotEquals: "neq ", ASTNodeType.Greater: "grt ", ASTNodeType.GreaterOrEqual: "geq ",
-                ASTNodeType.Less: "les ", ASTNodeType.LessOrEqual: "leq "}
+            operators = {ASTNodeType.Equals: "equ", ASTNodeType.NotEquals: "neq", ASTNodeType.Greater: "grt", ASTNodeType.GreaterOrEqual: "geq",
+                ASTNodeType.Less: "les", ASTNodeType.LessOrEqual: "leq"}
 
-            myType = TypeDeductor.deductType(node, self.symbolTableBuilder.symbolTable)
-            self.programText += operators[node.type] + myType.getPString() + "\n"
+            myType = TypeDeductor.deductType(node)
+            self.emitter.emit(operators[nodeType], myType.getPString())
 
         #################################
         # Other                         #
         #################################
 
         # Printf
-        elif node.type == ASTNodeType.Printf:
+        elif nodeType == ASTNodeType.Printf:
             sequenceList = self.getPrintSequence(node)
             argumentIndex = 1
             for item in sequenceList:
@@ -628,43 +626,47 @@ class PTranslator:
                     argument = node.children[argumentIndex]
                     
                     requiredType = item.getType()
-                    givenType = TypeDeductor.deductType(argument, self.symbolTableBuilder.symbolTable)
+                    givenType = TypeDeductor.deductType(argument)
                     if not(strictEqual(givenType, requiredType)):
                         ErrorMsgHandler.typeFormatWrong(argument, requiredType, givenType, argumentIndex)
                     # Special case for strings -> char array
                     if item.type == "s":
-                        mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(argument.value)
-                        followLinkCount = self.getFollowLinkCount(argument.value)
+                        mapping = argument.symbol
+                        followLinkCount = argument.followLinkCount
 
-                        self.programText += "\n".join([ \
-                            "lod a " + str(followLinkCount) + " " + str(mapping.address + 5) + "\nldc i " + str(i) + "\nixa 1\nind c\nout c" \
-                            for i in range(mapping.type.size)])
-                        self.programText += "\n"
+                        if mapping.type.size >= stringLoopSize:
+                            self.emitter.emit("mst", 0)
+                            self.emitter.emit("lod", "a", followLinkCount, mapping.address + 5)
+                            self.callCharsRoutine("print_chars", mapping.type.size)
+                        else:
+                            for i in range(mapping.type.size):
+                                self.emitter.emit("lod", "a", followLinkCount, mapping.address + 5)
+                                self.emitter.emit("ldc", "i", i)
+                                self.emitter.emit("ixa", 1)
+                                self.emitter.emit("ind", "c")
+                                self.emitter.emit("out", "c")
 
                     else:
-                        self.fringe = [(argument, nodeLevel+1)] + self.fringe
+                        self.fringe.appendleft((argument, nodeLevel+1))
                         self.parseExpression()
-                        self.programText += "out " + item.type + "\n"
+                        self.emitter.emit("out", item.type)
 
                     argumentIndex += 1
                 # In case it is the normal char from the formatstring
+                elif item in self.stringPool:
+                    self.emitter.emit("mst", 0)
+                    # The pool is global data, printf is always inside a function
+                    self.emitter.emit("lda", 1, self.stringPool[item])
+                    self.callCharsRoutine("print_chars", len(self.getCharacters(item)))
                 else:
-                    # Little hack for escaped characters --> python escapes the backslash parsed from the program
-                    listIndex = 0
-                    characterList = list(filter(lambda a: a != '',re.split('(.)', item)))
-                    while listIndex < len(characterList):
-                        if characterList[listIndex] == '\\':
-                            listIndex += 1
-                            self.programText += "ldc c '\\" + characterList[listIndex] + "'\n"
-                        else:
-                            self.programText += "ldc c '" + characterList[listIndex] + "'\n"
-                        self.programText += "out c\n"
-                        listIndex += 1
+                    for character in self.getCharacters(item):
+                        self.emitter.emit("ldc", "c", character)
+                        self.emitter.emit("out", "c")
 
-            del self.fringe[0]
+            self.fringe.popleft()
 
         # Scanf
-        elif node.type == ASTNodeType.Scanf:
+        elif nodeType == ASTNodeType.Scanf:
             sequenceList = self.getScanSequence(node)
             listIndex = 1
 
@@ -672,65 +674,72 @@ class PTranslator:
                 argument = node.children[listIndex]
                 
                 requiredType = item.getType()
-                givenType = TypeDeductor.deductType(argument, self.symbolTableBuilder.symbolTable)
+                givenType = TypeDeductor.deductType(argument)
                 if not(strictEqual(givenType, requiredType)):
                     ErrorMsgHandler.typeFormatWrong(node, requiredType, givenType, listIndex)
 
-                if item.type == "s":
-                    mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(argument.value)
-                    followLinkCount = self.getFollowLinkCount(argument.value)
+                if item.type == "s" and argument.symbol.type.size >= stringLoopSize:
+                    self.emitter.emit("mst", 0)
+                    self.emitter.emit("lod", "a", argument.followLinkCount, argument.symbol.address + 5)
+                    self.callCharsRoutine("read_chars", argument.symbol.type.size)
 
-                    self.programText += "\n".join([ \
-                        "lod a " + str(followLinkCount) + " " + str(mapping.address + 5) + "\nldc i " + str(i) + "\nixa 1\nin c\nsto c" \
-                        for i in range(mapping.type.size)])
-                    self.programText += "\n"
+                elif item.type == "s":
+                    mapping = argument.symbol
+                    followLinkCount = argument.followLinkCount
+
+                    for i in range(mapping.type.size):
+                        self.emitter.emit("lod", "a", followLinkCount, mapping.address + 5)
+                        self.emitter.emit("ldc", "i", i)
+                        self.emitter.emit("ixa", 1)
+                        self.emitter.emit("in", "c")
+                        self.emitter.emit("sto", "c")
 
                 elif argument.type == ASTNodeType.LValueArrayElement:
-                    self.fringe = [(node.children[listIndex], nodeLevel+1)] + self.fringe
+                    self.fringe.appendleft((node.children[listIndex], nodeLevel+1))
                     self.parseExpression()
 
-                    self.programText += "in " + item.type + "\n"
-                    self.programText += "sto " + item.type + "\n"
+                    self.emitter.emit("in", item.type)
+                    self.emitter.emit("sto", item.type)
 
                 elif argument.type == ASTNodeType.Dereference:
-                    self.fringe = [(node.children[listIndex].children[0], nodeLevel+1)] + self.fringe
+                    self.fringe.appendleft((node.children[listIndex].children[0], nodeLevel+1))
                     self.parseExpression()
 
                     for i in range(len(argument.value) - 1):
-                        self.programText += "ind a\n"
+                        self.emitter.emit("ind", "a")
 
-                    self.programText += "in " + item.type + "\n"
-                    self.programText += "sto " + item.type + "\n"
+                    self.emitter.emit("in", item.type)
+                    self.emitter.emit("sto", item.type)
 
                 elif argument.type != ASTNodeType.Dereference:
-                    mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(argument.value)
-                    followLinkCount = self.getFollowLinkCount(argument.value)
+                    mapping = argument.symbol
+                    followLinkCount = argument.followLinkCount
                     
-                    self.programText += "in " + item.type + "\n"
-                    self.programText += "str " + item.type + " " + str(followLinkCount) + " " + str(mapping.address + 5) + "\n"
+                    self.emitter.emit("in", item.type)
+                    self.emitter.emit("str", item.type, followLinkCount, mapping.address + 5)
                 
                 listIndex += 1
             
-            del self.fringe[0]
+            self.fringe.popleft()
 
-        elif node.type == ASTNodeType.Brackets:
+        elif nodeType == ASTNodeType.Brackets:
             child_amount = len(node.children)
             self.addChildrenToFringe(node, nodeLevel, deleteFront=True)
             self.parseMultipleExpressions(child_amount)
 
         else:
-            del self.fringe[0]
+            self.fringe.popleft()
 
         if node.useless:
-            self.programText += "ssp " + str(self.functionSSPMap[self.currentFunction]) + "\n"
+            self.emitter.emit("ssp", self.functionSSPMap[self.currentFunction])
 
     def addChildrenToFringe(self, node, nodeLevel, deleteFront=False):
-        childAmount = len(node.children)
-        for child in reversed(node.children):
-            self.fringe = [(child, nodeLevel + 1)] + self.fringe
-
+        # The node itself is at the front of the fringe, so it has to be removed before its children are put in front of it
         if deleteFront:
-            del self.fringe[childAmount]
+            self.fringe.popleft()
+
+        # extendleft reverses the order, so the first child ends up at the front
+        self.fringe.extendleft([(child, nodeLevel + 1) for child in reversed(node.children)])
 
     def parseChildrenFirst(self, node, nodeLevel, deleteFirst=True):
         child_amount = len(node.children)
@@ -763,15 +772,15 @@ class PTranslator:
 
     def setFunctionArguments(self, functionNode, nodeLevel):
 
-        arguments = self.symbolTableBuilder.symbolTable.lookupSymbol(functionNode.value).type.arguments
+        arguments = functionNode.symbol.type.arguments
 
         for argument, argumentType in zip(functionNode.children, arguments):
             if isinstance(argumentType, ReferenceType):
-                mapping = self.symbolTableBuilder.symbolTable.lookupSymbol(argument.value)
-                followLinkCount = self.getFollowLinkCount(argument.value)
-                self.programText += "lda " + str(followLinkCount) + " " + str(mapping.address + 5) + "\n"
+                mapping = argument.symbol
+                followLinkCount = argument.followLinkCount
+                self.emitter.emit("lda", followLinkCount, mapping.address + 5)
             else:
-                self.fringe = [(argument, nodeLevel + 1)] + self.fringe
+                self.fringe.appendleft((argument, nodeLevel + 1))
                 self.parseExpression()
 
 
@@ -796,53 +805,105 @@ class PTranslator:
         return returnList
 
 
-    def processFunctionArgs(self, functionNode, nodeLevel):
-        for arg in functionNode.children:
-            if arg.type == ASTNodeType.ByReference:
-                self.processFunctionArgs(arg, nodeLevel + 1)
-            self.symbolTableBuilder.processNode(arg, nodeLevel)
-
-    def getFollowLinkCount(self, variableName):
-        # Get defining occurence difference from symbol table
-            definingOccurrence = self.symbolTableBuilder.symbolTable.getDefOcc(variableName)
-
-            # Get defining occurence difference from symbol table
-            appliedOccurrence = self.symbolTableBuilder.symbolTable.getAppOcc()
-
-            if definingOccurrence == 0 and appliedOccurrence != 0:
-                # The scope is global
-                return 1
+    def getCharacters(self, text):
+        """
+            Returns the characters of text from a format string as constants for ldc c: 'a', '\\n'.
+        """
+        # Little hack for escaped characters --> python escapes the backslash parsed from the program
+        characters = []
+        listIndex = 0
+        characterList = list(filter(lambda a: a != '',re.split('(.)', text)))
+        while listIndex < len(characterList):
+            if characterList[listIndex] == '\\':
+                listIndex += 1
+                characters.append("'\\" + characterList[listIndex] + "'")
             else:
-                # Look for the symbol locally, thank you C for being this easy
-                return 0
-
-    def setMain(self):
+                characters.append("'" + characterList[listIndex] + "'")
+            listIndex += 1
+        return characters
+
+    def getStringPool(self, firstAddress):
+        """
+            Gives an address from firstAddress on to the text of the format strings that is printed more than once,
+            if storing it once and printing it with the print_chars routine takes fewer instructions than printing it in place.
+            Returns the amount of characters in the pool.
+        """
+        occurrences = {}
+        for (node, nodeLevel) in ASTWalker(self.AST).iterDepthFirst():
+            if node.type == ASTNodeType.Printf:
+                for item in self.getPrintSequence(node):
+                    if type(item) is str:
+                        occurrences[item] = occurrences.get(item, 0) + 1
+
+        address = firstAddress
+        for text, count in occurrences.items():
+            length = len(self.getCharacters(text))
+            # ldc c, out c for every character everywhere, against ldc c, str c for every character once and 4 instructions per call
+            if 2 * length * count > 2 * length + 4 * count:
+                self.stringPool[text] = address
+                address += length
+        return address - firstAddress
+
+    def callCharsRoutine(self, routine, size):
+        # The address of the first character is on the stack, after the mst
+        self.charsRoutines.add(routine)
+        self.emitter.emit("ldc", "i", size)
+        self.emitter.emit("cup", 2, routine)
+
+    def setCharsRoutine(self, routine):
+        """
+            Emits a shared routine that loops over an array of characters: print_chars prints them, read_chars reads them.
+            The arguments are the address of the first character and the amount of characters.
+        """
+        self.emitter.emitLabel(routine)
+        self.emitter.emit("ssp", 7)
+        self.emitter.emit("sep", 2)
+        self.emitter.emitLabel(routine + "_loop")
+        self.emitter.emit("lod", "i", 0, 6)
+        self.emitter.emit("ldc", "i", 0)
+        self.emitter.emit("grt", "i")
+        self.emitter.emit("fjp", routine + "_end")
+        self.emitter.emit("lod", "a", 0, 5)
+        if routine == "print_chars":
+            self.emitter.emit("ind", "c")
+            self.emitter.emit("out", "c")
+        else:
+            self.emitter.emit("in", "c")
+            self.emitter.emit("sto", "c")
+        # Next character
+        self.emitter.emit("lod", "a", 0, 5)
+        self.emitter.emit("ldc", "i", 1)
+        self.emitter.emit("ixa", 1)
+        self.emitter.emit("str", "a", 0, 5)
+        self.emitter.emit("lod", "i", 0, 6)
+        self.emitter.emit("ldc", "i", 1)
+        self.emitter.emit("sub", "i")
+        self.emitter.emit("str", "i", 0, 6)
+        self.emitter.emit("ujp", routine + "_loop")
+        self.emitter.emitLabel(routine + "_end")
+        self.emitter.emit("retp")
+
+    def setMain(self, mainNode):
         # calculate the amout of space needed
-        args = self.symbolTableBuilder.symbolTable.lookupSymbol("main").type.arguments
+        args = mainNode.symbol.type.arguments
         arguments = len(args)
 
-        # Get defining occurence difference from symbol table
-        definingOccurrence = self.symbolTableBuilder.symbolTable.getDefOcc("main")
-
-        # Get applied occurrence
-        appliedOccurrence = self.symbolTableBuilder.symbolTable.getAppOcc()
+        self.emitter.emitLabel("main")
 
-        self.programText += "main:\n"
-
-        self.programText += "mst 0\n"
+        self.emitter.emit("mst", 0)
 
         # Set the arguments:
         for arg in reversed(args):
-            self.programText += "ldc " + arg.getPString() + " " + arg.getDefaultValue() + "\n"
+            self.emitter.emit("ldc", arg.getPString(), arg.getDefaultValue())
 
         # Jump to the function
-        self.programText += "cup " + str(arguments) + " label_main\n"
+        self.emitter.emit("cup", arguments, "label_main")
 
         # Stop
-        self.programText += "hlt\n"
+        self.emitter.emit("hlt")
 
     def setGlobalDeclarations(self, node, nodeLevel):
-        del self.fringe[0]
+        self.fringe.popleft()
         globalDataSize = 0
         dataSizeNoArray = 0
         for child in node.children:
@@ -855,20 +916,17 @@ class PTranslator:
                 globalDataSize += 1
 
 
-        # Dirty things here
-        old_programText = deepcopy(self.programText)
-        self.programText = ""
+        # The program node is translated first, so the global initialization is the start of the program
         nextArrayAddress = 5 + dataSizeNoArray
 
-        self.programText = "ssp " + str(5 + globalDataSize) + "\n"
+        # The text of the format strings that is stored once comes after the global variables
+        globalDataSize += self.getStringPool(5 + globalDataSize)
 
-        self.symbolTableBuilder.processNode(node, nodeLevel)
+        self.emitter.emit("ssp", 5 + globalDataSize)
 
         # initialize them
         offset = 5
         for child in node.children:
-            self.symbolTableBuilder.processNode(child, nodeLevel + 1)
-
             if isinstance(child.type, pointerType):
                 Type = PointerType(IntType(), 1) if child.type.ptrCount != 0 else mapTypeToVarType(child.type.type)
 
@@ -877,37 +935,85 @@ class PTranslator:
                     self.addChildrenToFringe(child.children[0], nodeLevel + 1, deleteFront=False)
                     self.parseExpression()
 
-                    self.programText += "str " + Type.getPString() + " 0 " + str(offset) + "\n"
+                    self.emitter.emit("str", Type.getPString(), 0, offset)
                     offset += 1
 
                 else:
-                    self.programText += "ldc " + Type.getPString() + " " + Type.getDefaultValue() + "\n"
-                    self.programText += "str " + Type.getPString() + " 0 " + str(offset) + "\n"
+                    self.emitter.emit("ldc", Type.getPString(), Type.getDefaultValue())
+                    self.emitter.emit("str", Type.getPString(), 0, offset)
                     offset += 1
 
 
             elif child.type == ASTNodeType.ArrayDecl:
-                self.programText += "lda 0 " + str(nextArrayAddress) + "\n"
-                self.programText += "str a 0 " + str(offset) + "\n"
+                self.setArray(child, 0, offset, nextArrayAddress, "global")
                 offset += 1
+                nextArrayAddress += int(child.children[1].value)
 
-                line = ""
-                if isinstance(child.children[0].value, pointerType):
-                    Type = PointerType(IntType(), 1) if child.children[0].value.ptrCount != 0 else mapTypeToVarType(child.children[0].value.type)
+        for text, address in self.stringPool.items():
+            for character in self.getCharacters(text):
+                self.emitter.emit("ldc", "c", character)
+                self.emitter.emit("str", "c", 0, address)
+                address += 1
 
-                    for i in range(int(child.children[1].value)):
-                        self.programText += "ldc " + Type.getPString() + " " + Type.getDefaultValue() + "\n" + \
-                            "str " + Type.getPString() + " 0 " + str(nextArrayAddress) + "\n"
-                        nextArrayAddress += 1
+        self.emitter.emit("ujp", "main")
+        self.fringe.append((node, 0))
 
-        self.programText += "ujp main\n"
-        self.programText = self.programText + old_programText
+    def setArray(self, node, level, pointerAddress, firstAddress, labelPrefix):
+        """
+            Stores the address of the elements of the array declared by node in its variable, and gives every element the default value.
+            Arrays with at least arrayLoopSize elements are filled by a loop that uses the variable as counter and sets
+            arrayLoopBlockSize elements per iteration, smaller ones get a store per element.
+        """
+        if not isinstance(node.children[0].value, pointerType):
+            self.emitter.emit("lda", level, firstAddress)
+            self.emitter.emit("str", "a", level, pointerAddress)
+            return
 
-        # Reset the symboltable
-        symbolTable = SymbolTable()
-        self.symbolTableBuilder = SymbolTableBuilder(symbolTable)
-        self.symbolTableBuilder.processNode(node, 0)
-        self.fringe.append((node, 0))
+        Type = PointerType(IntType(), 1) if node.children[0].value.ptrCount != 0 else mapTypeToVarType(node.children[0].value.type)
+        size = int(node.children[1].value)
+
+        if size < self.arrayLoopSize:
+            self.emitter.emit("lda", level, firstAddress)
+            self.emitter.emit("str", "a", level, pointerAddress)
+            for i in range(size):
+                self.emitter.emit("ldc", Type.getPString(), Type.getDefaultValue())
+                self.emitter.emit("str", Type.getPString(), level, firstAddress + i)
+            return
+
+        loopBegin = labelPrefix + "_array_" + str(self.nextLabelNumber)
+        loopEnd = labelPrefix + "_array_" + str(self.nextLabelNumber) + "_end"
+        self.nextLabelNumber += 1
+
+        # Count down from the end of the last block, every iteration sets the block of elements that starts at the counter
+        blocks = size // arrayLoopBlockSize
+        self.emitter.emit("ldc", "i", blocks * arrayLoopBlockSize)
+        self.emitter.emit("str", "i", level, pointerAddress)
+        self.emitter.emitLabel(loopBegin)
+        self.emitter.emit("lod", "i", level, pointerAddress)
+        self.emitter.emit("ldc", "i", 0)
+        self.emitter.emit("grt", "i")
+        self.emitter.emit("fjp", loopEnd)
+        self.emitter.emit("lod", "i", level, pointerAddress)
+        self.emitter.emit("ldc", "i", arrayLoopBlockSize)
+        self.emitter.emit("sub", "i")
+        self.emitter.emit("str", "i", level, pointerAddress)
+        for i in range(arrayLoopBlockSize):
+            self.emitter.emit("lda", level, firstAddress + i)
+            self.emitter.emit("lod", "i", level, pointerAddress)
+            self.emitter.emit("ixa", 1)
+            self.emitter.emit("ldc", Type.getPString(), Type.getDefaultValue())
+            self.emitter.emit("sto", Type.getPString())
+        self.emitter.emit("ujp", loopBegin)
+        self.emitter.emitLabel(loopEnd)
+
+        # The elements after the last block
+        for i in range(blocks * arrayLoopBlockSize, size):
+            self.emitter.emit("ldc", Type.getPString(), Type.getDefaultValue())
+            self.emitter.emit("str", Type.getPString(), level, firstAddress + i)
+
+        # The counter is done, the variable gets its real value
+        self.emitter.emit("lda", level, firstAddress)
+        self.emitter.emit("str", "a", level, pointerAddress)
 
     def calculateEP(self, node, level = 0):
         maximum = 0
@@ -990,10 +1096,21 @@ class PTranslator:
             return False
                 
 
+    @property
+    def program(self):
+        # The generated p code as PInstructions and PLabels
+        return self.emitter.program
+
+    def optimizeProgram(self):
+        # Peephole optimizations on the generated program (-O)
+        self.emitter.program = PeepholeOptimizer().optimize(self.emitter.program)
+
+    @property
+    def programText(self):
+        return self.emitter.getText()
+
     def saveProgram(self, filename):
-        programFile = open(filename, 'w')
-        programFile.write(self.programText)
-        programFile.close()
+        self.emitter.save(filename)
 
 
 
@@ -0,0 +1,15 @@
+class AnalysisVisitor:
+	"""
+		Base class for the checks that plug into the SemanticAnalyzer.
+		The analyzer calls enterNode before the children of a node are visited and exitNode after them,
+		at that moment the symbol table contains all symbols visible from the node.
+		finish is called once the whole AST has been visited.
+	"""
+	def enterNode(self, node, nodeLevel):
+		pass
+
+	def exitNode(self, node, nodeLevel):
+		pass
+
+	def finish(self):
+		pass
@@ -1,12 +1,16 @@
 from src.py.AST.ASTNode import ASTNode, ASTNodeType
 from src.py.ST.SymbolTable import SymbolTable
 from src.py.SA.ErrorMsgHandler import ErrorMsgHandler
+from src.py.SA.AnalysisVisitor import AnalysisVisitor
 
-class ExistenceChecker:
+class ExistenceChecker(AnalysisVisitor):
 	def __init__(self, symbolTable):
 		self.symbolTable = symbolTable
 		self.stdioIncluded = False
 
+	def enterNode(self, node, nodeLevel):
+		self.checkExistence(node)
+
 	def checkExistence(self, node):
 		if node.type == ASTNodeType.LValue \
 			or node.type == ASTNodeType.LValueArrayElement \
@@ -0,0 +1,31 @@
+from src.py.AST.ASTNode import ASTNodeType, pointerType
+from src.py.SA.AnalysisVisitor import AnalysisVisitor
+
+
+class NameResolver(AnalysisVisitor):
+	"""
+		Resolves the names used in the AST while the symbol table is being built, and stores the result on the nodes.
+		This way, later passes don't need to look up symbols anymore.
+	"""
+	def __init__(self, symbolTable):
+		self.symbolTable = symbolTable
+
+		self.identifierNodes = [ASTNodeType.LValue, ASTNodeType.LValueArrayElement, ASTNodeType.RValueArrayElement, \
+			ASTNodeType.RValueID, ASTNodeType.FunctionCall, ASTNodeType.Function, ASTNodeType.FunctionDecl, ASTNodeType.ArrayDecl]
+
+	def enterNode(self, node, nodeLevel):
+		if node.type in self.identifierNodes or isinstance(node.type, pointerType):
+			self.resolve(node)
+
+	def resolve(self, node):
+		node.symbol = self.symbolTable.lookupSymbol(node.value)
+		if node.symbol == None:
+			# Reported by the ExistenceChecker
+			return
+
+		definingOccurrence = self.symbolTable.getDefOcc(node.value)
+		appliedOccurrence = self.symbolTable.getAppOcc()
+
+		node.nestingDifference = appliedOccurrence - definingOccurrence
+		# The scope is global
+		node.followLinkCount = 1 if definingOccurrence == 0 and appliedOccurrence != 0 else 0
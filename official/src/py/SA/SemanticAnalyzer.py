@@ -0,0 +1,33 @@
+from src.py.AST.ASTWalker import ASTWalker, WalkEvent
+from src.py.ST.SymbolTable import SymbolTable
+from src.py.ST.SymbolTableBuilder import SymbolTableBuilder
+
+
+class SemanticAnalyzer:
+	"""
+		Builds the symbol table in a single traversal of the AST and runs all plugged in visitors (see AnalysisVisitor) during that traversal.
+	"""
+	def __init__(self):
+		self.symbolTable = SymbolTable()
+		self.symbolTableBuilder = SymbolTableBuilder(self.symbolTable)
+		self.visitors = []
+
+	def addVisitor(self, visitor):
+		self.visitors.append(visitor)
+
+	def analyse(self, ast):
+		"""
+			Analyses the AST and returns the resulting symbol table.
+		"""
+		for (event, node, nodeLevel) in ASTWalker(ast).iterEvents():
+			if event == WalkEvent.Enter:
+				self.symbolTableBuilder.processNode(node, nodeLevel)
+				for visitor in self.visitors:
+					visitor.enterNode(node, nodeLevel)
+			else:
+				for visitor in self.visitors:
+					visitor.exitNode(node, nodeLevel)
+
+		for visitor in self.visitors:
+			visitor.finish()
+		return self.symbolTable
@@ -4,33 +4,47 @@ from src.py.ST.SymbolTableBuilder import SymbolTableBuilder
 from src.py.UTIL.VarTypes import *
 from src.py.UTIL.TypeDeductor import TypeDeductor
 from src.py.SA.ErrorMsgHandler import ErrorMsgHandler
+from src.py.SA.AnalysisVisitor import AnalysisVisitor
 
 
-class TypeChecker:
+class TypeChecker(AnalysisVisitor):
 	def __init__(self, symbolTable):
 		self.symbolTable = symbolTable
+		self.typeError = None
+
+	def exitNode(self, node, nodeLevel):
+		# Checked after the children, so they already passed the existence checks
+		if self.typeError != None:
+			return
+		try:
+			self.checkType(node)
+		except Exception as error:
+			# Reported after the whole AST passed the existence checks, which come first
+			self.typeError = error
+
+	def finish(self):
+		if self.typeError != None:
+			raise self.typeError
 
 	def checkType(self, node):
 		"""
 			Do type checking dependent on the provided node.
 		"""
+		nodeType = node.type
 
 		#=======================================================
 		# Type checking for assignment between lvalue and rvalue
 		#=======================================================
-		if node.type == ASTNodeType.Assignment:
+		if nodeType == ASTNodeType.Assignment:
 			# Exception for Dereference -> search the Symbol and dereference enough times
 			leftType = None
 			if node.children[0].type == ASTNodeType.Dereference:
-				leftType = TypeDeductor.checkDereferenceValidity(node.children[0], self.symbolTable)
+				leftType = TypeDeductor.deductType(node.children[0])
 			else:
-				leftType = self.symbolTable.lookupSymbol(node.children[0].value).type
+				leftType = node.children[0].symbol.type
 			
-			rightType = None
-			if node.children[1].type == ASTNodeType.Dereference:
-				rightType = TypeDeductor.checkDereferenceValidity(node.children[1], self.symbolTable)
-			else:
-				rightType = TypeDeductor.deductType(node.children[1], self.symbolTable)
+			# Dereferences are checked while their type is deducted
+			rightType = TypeDeductor.deductType(node.children[1])
 
 			if rightType != None and leftType != None and leftType != rightType:
 				ErrorMsgHandler.typesAssignmentWrong(node, leftType, rightType)
@@ -38,30 +52,30 @@ class TypeChecker:
 		#=================================================================
 		# Type checking left side and right side of condition (if present)
 		#=================================================================
-		elif node.type == ASTNodeType.Condition:
+		elif nodeType == ASTNodeType.Condition:
 			currentNode = node.children[0]
 			if len(currentNode.children) == 1 and currentNode.children[0].type == ASTNodeType.Not:
 				# No checking needs to be done if it is not compared to anything
 				pass
 			elif len(currentNode.children) == 2:
-				leftType = TypeDeductor.deductType(currentNode.children[0], self.symbolTable)
-				rightType = TypeDeductor.deductType(currentNode.children[1], self.symbolTable)
+				leftType = TypeDeductor.deductType(currentNode.children[0])
+				rightType = TypeDeductor.deductType(currentNode.children[1])
 				if rightType != None and leftType != None and leftType != rightType:
 					ErrorMsgHandler.typesComparisonWrong(node, leftType, rightType)
 		
 		#=======================================================
 		# Type checking for arguments given with a function call
 		#=======================================================
-		elif node.type == ASTNodeType.FunctionCall:
+		elif nodeType == ASTNodeType.FunctionCall:
 			self.checkCallArguments(node)
 		
 		#==============================
 		# Type checking for return type
 		#==============================
-		elif node.type == ASTNodeType.Return:
+		elif nodeType == ASTNodeType.Return:
 			functionSymbol = self.getFirstFunctionSymbol(node)
-			functionReturnType = self.symbolTable.lookupSymbol(functionSymbol).type.returnType
-			returnType = TypeDeductor.deductType(node.children[0], self.symbolTable) if len(node.children) == 1 else VoidType()
+			functionReturnType = self.symbolTable.lookupFunction(functionSymbol).type.returnType
+			returnType = TypeDeductor.deductType(node.children[0]) if len(node.children) == 1 else VoidType()
 
 			if returnType != None and functionReturnType != None and functionReturnType != returnType:
 				ErrorMsgHandler.returnTypeWrong(node, functionSymbol, functionReturnType, returnType)
@@ -69,10 +83,10 @@ class TypeChecker:
 		#==================================
 		# Type checking for initializations
 		#==================================
-		elif node.type == ASTNodeType.Initialization:
+		elif nodeType == ASTNodeType.Initialization:
 			# Check between the parent node and the child node
-			leftType = self.symbolTable.lookupSymbol(node.parent.value).type
-			rightType = TypeDeductor.deductType(node.children[0], self.symbolTable)
+			leftType = node.parent.symbol.type
+			rightType = TypeDeductor.deductType(node.children[0])
 
 			if rightType != leftType:
 				ErrorMsgHandler.typeInitWrong(node, leftType, rightType)
@@ -80,22 +94,23 @@ class TypeChecker:
 		#======================================
 		# Type checking for array element index
 		#======================================
-		elif node.type == ASTNodeType.LValueArrayElement or node.type == ASTNodeType.RValueArrayElement:
-			indexType = TypeDeductor.deductType(node.children[0], self.symbolTable)
+		elif nodeType == ASTNodeType.LValueArrayElement or nodeType == ASTNodeType.RValueArrayElement:
+			indexType = TypeDeductor.deductType(node.children[0])
 			if indexType != IntType():
 				ErrorMsgHandler.arrayElementWrongAccess(node)
 
 		#=========================================
 		# Type checking for dereference operations
 		#=========================================
-		elif node.type == ASTNodeType.Dereference:
+		elif nodeType == ASTNodeType.Dereference:
 			"""
 				Requires 3 forms of checking:
 					* Contains at least one RValueID
 					* If expressions are present, only intvalues should be allowed (array element access)
 					* The pointer which is dereferenced has at least the same pointer count as dereference count
 			"""
-			TypeDeductor.checkDereferenceValidity(node, self.symbolTable)
+			# The checks are done while deducting the type
+			TypeDeductor.deductType(node)
 
 
 
@@ -105,7 +120,7 @@ class TypeChecker:
 			Checks the signature types of a function with the types of the given call arguments.
 		"""
 		arguments = node.children
-		functionSignature = self.symbolTable.lookupSymbol(node.value).type
+		functionSignature = node.symbol.type
 
 		amtArgumentsRequired = len(functionSignature.arguments)
 		amtArgumentsGiven = len(arguments)
@@ -117,9 +132,9 @@ class TypeChecker:
 			if type(argumentRequired) == ReferenceType and argumentGiven.type != ASTNodeType.RValueID:
 				ErrorMsgHandler.referenceArgumentInvalid(node, argumentRequired, arguments.index(argumentGiven) + 1)
 
-			elif argumentRequired != TypeDeductor.deductType(argumentGiven, self.symbolTable):
+			elif argumentRequired != TypeDeductor.deductType(argumentGiven):
 				ErrorMsgHandler.functionArgWrong(node, argumentRequired, \
-					TypeDeductor.deductType(argumentGiven, self.symbolTable), \
+					TypeDeductor.deductType(argumentGiven), \
 					arguments.index(argumentGiven) + 1)
 				
 			
@@ -1,8 +1,9 @@
 
 from src.py.AST.ASTNode import ASTNodeType
+from src.py.SA.AnalysisVisitor import AnalysisVisitor
 
 
-class UselessDecorator:
+class UselessDecorator(AnalysisVisitor):
 	def __init__(self):
 		self.nodeLevel = None
 
@@ -12,6 +13,9 @@ class UselessDecorator:
 			ASTNodeType.FunctionCall, ASTNodeType.Addition, ASTNodeType.Subtraction, ASTNodeType.Mul, \
 			ASTNodeType.Div, ASTNodeType.Dereference]
 
+	def enterNode(self, node, nodeLevel):
+		self.checkUselessness(node, nodeLevel)
+
 	def checkUselessness(self, node, nodeLevel):
 		"""Checks if a node is useless. If it is, adjust the node."""
 		if self.nodeLevel != None and nodeLevel <= self.nodeLevel:
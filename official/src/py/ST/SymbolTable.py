@@ -10,23 +10,31 @@ class Scope(Enum):
 class SymbolTable:
 	""" 
 		Class used to store the symbol table when constructing the program text.
-		Used implementation: tree like structure with hash tables for different scopes.
+		Used implementation: a hash table for the global scope, and for the local scopes a hash table that maps every name
+		on a stack of its bindings (innermost binding on top), together with a log of the names bound in every open scope.
+		Entering a scope, leaving it (per bound name) and looking up a symbol all take constant time.
 	"""
 	
 
 	
 	def __init__(self):
 		self.globalScopeTable = {}
-		self.localScopeTables = STTree()
-
 		self.nextGlobalAddress = 0
 
+		# Maps a name on a list of tuples (depth of the scope, SymbolMapping), the innermost binding is the last one
+		self.localBindings = {}
+		# For every open local scope: the names bound in it, used to undo the bindings when the scope is left
+		# The scope at depth 0 is the root scope, the scopes of functions and blocks are opened on top of it
+		self.scopeLog = [[]]
+		# For every open local scope: the address of the next symbol in that scope
+		self.nextAddresses = [0]
+
 	def insertEntry(self, symbol, _type, scope = Scope.LOCAL):
 		"""
 			Insert an entry into the symbol table, at the specified scope (GLOBAL or LOCAL).
 		"""
 		if (scope == Scope.LOCAL):
-			self.localScopeTables.addSymbol(symbol, _type)
+			self.addLocalSymbol(symbol, _type)
 		else:
 			self.globalScopeTable[symbol] = SymbolMapping(_type, self.nextGlobalAddress)
 			if not(type(_type) is FunctionType):
@@ -52,7 +60,7 @@ class SymbolTable:
 		"""
 			Looks up a function in the symbol table (equivalent of a normal lookup, but always in the global scope).
 		"""
-		return lookupSymbol(symbol, Scope.GLOBAL)
+		return self.lookupSymbol(symbol, Scope.GLOBAL)
 
 
 	def symbolExists(self, symbol, scope=None):
@@ -70,21 +78,65 @@ class SymbolTable:
 		"""
 			Enters a new scope.
 		"""
-		self.localScopeTables.enterScope()
+		self.scopeLog.append([])
+		# The new scope continues the addresses of the scope it is nested in
+		self.nextAddresses.append(self.nextAddresses[-1])
 
 	def leaveScope(self):
 		"""
 			Leaves the current local scope.
 		"""
-		self.localScopeTables.leaveScope()
+		assert len(self.scopeLog) > 1
+		for symbol in self.scopeLog.pop():
+			bindings = self.localBindings[symbol]
+			bindings.pop()
+			if len(bindings) == 0:
+				del self.localBindings[symbol]
+
+		nextAddress = self.nextAddresses.pop()
+		# The addresses are reused after leaving the scope of a function, not after leaving a block in a function
+		if len(self.nextAddresses) > 1:
+			self.nextAddresses[-1] = nextAddress
+
+
+	def addLocalSymbol(self, symbol, _type):
+		depth = len(self.scopeLog) - 1
+		mapping = SymbolMapping(_type, self.nextAddresses[-1])
+		if depth != 0:
+			self.nextAddresses[-1] += 1
+
+		if not(symbol in self.localBindings):
+			self.localBindings[symbol] = [(depth, mapping)]
+			self.scopeLog[-1].append(symbol)
+			return
 
+		bindings = self.localBindings[symbol]
+		if bindings[-1][0] == depth:
+			# Redefinition in the same scope replaces the old binding
+			bindings[-1] = (depth, mapping)
+		else:
+			bindings.append((depth, mapping))
+			self.scopeLog[-1].append(symbol)
 
 	def searchSymbolLocal(self, symbol, level=None):
 		"""
 			Searches for the symbol in the local symbol tables.
+			When a level is given, only the scope at depth level + 1 is searched.
 			Returns None if the symbol is not found.
 		"""
-		return self.localScopeTables.lookupSymbol(symbol, level)
+		if not(symbol in self.localBindings):
+			return None
+
+		bindings = self.localBindings[symbol]
+		if level == None:
+			return bindings[-1][1]
+
+		for (depth, mapping) in reversed(bindings):
+			if depth == level + 1:
+				return mapping
+			elif depth < level + 1:
+				break
+		return None
 
 	def searchSymbolGlobal(self, symbol):
 		"""
@@ -97,137 +149,20 @@ class SymbolTable:
 		return None
 
 	def getDefOcc(self, symbol):
-		localResult = self.localScopeTables.getDefOcc(symbol)
-		if localResult != None:
-			return localResult
+		"""
+			Returns the depth of the scope in which the visible binding of the symbol is defined (0 for the global scope).
+		"""
+		if symbol in self.localBindings:
+			return self.localBindings[symbol][-1][0]
 		elif self.symbolExists(symbol, Scope.GLOBAL):
 			return 0
 		return None
 
 	def getAppOcc(self):
-		return self.localScopeTables.getDeepestLevel()
-
-
-
-
-class STTree:
-	def __init__(self):
-		self.root = STSingleScope()
-
-	def addSymbol(self, symbol, _type):
-		#propagate to lowest level in symbol table
-		assert self.rootActive()
-		self.root.addSymbol(symbol, _type)
-
-	def lookupSymbol(self, symbol, level):
-		# Looks up the symbol in the symbol table
-		# @param forced: forces to look in all possible scopes
-		if level != None:
-			level += 1
-		return self.root.lookupSymbol(symbol, level)
-
-	def enterScope(self):
-		self.root.enterScope()
-
-	def leaveScope(self):
-		assert self.rootActive()
-		self.root.leaveScope()
-
-	def rootActive(self):
-		return self.root.childActive == True
-
-	def getDefOcc(self, symbol):
-		return self.root.getDefOcc(symbol)	
-	
-	def getDeepestLevel(self):
-		return self.root.getDeepestLevel()
-
-
-class STSingleScope:
-	"""
-		Class used to store the symbol table for a single scope segment, and all the scopes below it.
-	"""
-	def __init__(self, parent=None, nextAddress=0):
-		self.table = {}
-		self.subScopes = []
-		self.parent = parent
-		self.nextAddress = nextAddress
-
-		# Variable used to indicate wether the last child is 'active' --> used when adding new symbols
-		self.childActive = False 
-
-	def __str__(self):
-		return str(self.table)
-
-	def contains(self, symbol):
-		if symbol in self.table:
-			return True
-		if self.childActive == True:
-			return self.subScopes[-1].contains(symbol)
-		return False
-
-	def lookupSymbol(self, symbol, level):
-		if level != None:
-			if level == 0:
-				return self.table[symbol] if symbol in self.table else None
-			else:
-				assert self.childActive
-				return self.subScopes[-1].lookupSymbol(symbol, level - 1)
-		
-		mapping = None
-		# Give priority to subscopes if present
-		if self.childActive == True:
-			mapping = self.subScopes[-1].lookupSymbol(symbol, None)
-		
-		if (mapping == None) and (symbol in self.table):
-			mapping = self.table[symbol]
-		return mapping
-
-	def addSymbol(self, symbol, _type):
-		if self.childActive == True:
-			self.subScopes[-1].addSymbol(symbol, _type)
-			return
-		self.table[symbol] = SymbolMapping(_type, self.nextAddress)
-
-		if self.parent != None:
-			self.nextAddress += 1
-	
-	def getSymbolCount(self):
-		return len(self.table)
-
-	def enterScope(self):
-		if self.childActive == True:
-			self.subScopes[-1].enterScope()
-			return
-			
-		self.childActive = True
-		self.subScopes.append(STSingleScope(self, self.nextAddress))
-		
-	def leaveScope(self):
-		if self.childActive == True and self.subScopes[-1].childActive == True:
-			self.subScopes[-1].leaveScope()
-			return
-		self.childActive = False
-
-		if self.parent != None:
-			self.nextAddress = self.subScopes[-1].nextAddress
-
-	def getDefOcc(self, symbol, level=0):
-		lowerLevelOcc = None
-		if self.childActive:
-			lowerLevelOcc = self.subScopes[-1].getDefOcc(symbol, level+1)
-		
-		if lowerLevelOcc != None:
-			return lowerLevelOcc
-		elif self.contains(symbol):
-			return level
-		
-		return None
-
-	def getDeepestLevel(self, level=0):
-		if self.childActive:
-			return self.subScopes[-1].getDeepestLevel(level+1)
-		return level
+		"""
+			Returns the depth of the current scope.
+		"""
+		return len(self.scopeLog) - 1
 
 
 class SymbolMapping:
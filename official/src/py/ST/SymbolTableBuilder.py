@@ -12,22 +12,24 @@ class SymbolTableBuilder:
 
 
 	def processNode(self, node, nodeLevel):
+		nodeType = node.type
+
 		# If the node we are visiting now is on the same/higher level than the current working scope -> leave the scope/multiple scopes
 		# (with the exception of the global scope)
 		if (len(self.levelList) != 0) and (nodeLevel <= self.levelList[-1]):
 			self.leaveScopes(nodeLevel)
 
-		if (node.type == ASTNodeType.Block):
+		if (nodeType == ASTNodeType.Block):
 			self.enterScope(nodeLevel)
-		elif (node.type == ASTNodeType.IfTrue):
+		elif (nodeType == ASTNodeType.IfTrue):
 			self.enterScope(nodeLevel)
-		elif (node.type == ASTNodeType.IfFalse):
+		elif (nodeType == ASTNodeType.IfFalse):
 			self.enterScope(nodeLevel)
-		elif (node.type == ASTNodeType.WhileBody):
+		elif (nodeType == ASTNodeType.WhileBody):
 			self.enterScope(nodeLevel)
-		elif (node.type == ASTNodeType.For):
+		elif (nodeType == ASTNodeType.For):
 			self.enterScope(nodeLevel)
-		elif (node.type == ASTNodeType.Function):
+		elif (nodeType == ASTNodeType.Function):
 			self.enterScope(nodeLevel)
 			if (self.symbolTable.symbolExists(str(node.value), Scope.GLOBAL) == False):
 				self.addFunctionSignature(node, True)
@@ -84,36 +86,38 @@ class SymbolTableBuilder:
 		
 
 	def checkForDeclarations(self, node, nodeLevel):
+		nodeType = node.type
+
 		# Check to see if the declaration is a reference
 		isReferenceDecl = False
 		if nodeLevel != 0 and node.parent.type == ASTNodeType.ByReference:
 			isReferenceDecl = True
 
 
-		if node.type == ASTNodeType.FloatDecl:
+		if nodeType == ASTNodeType.FloatDecl:
 			self.addPrimitiveType(node, FloatType(), isReferenceDecl)
-		elif node.type == ASTNodeType.IntDecl:
+		elif nodeType == ASTNodeType.IntDecl:
 			self.addPrimitiveType(node, IntType(), isReferenceDecl)
-		elif node.type == ASTNodeType.CharDecl:
+		elif nodeType == ASTNodeType.CharDecl:
 			self.addPrimitiveType(node, CharType(), isReferenceDecl)
-		elif node.type == ASTNodeType.BoolDecl:
+		elif nodeType == ASTNodeType.BoolDecl:
 			self.addPrimitiveType(node, BoolType(), isReferenceDecl)			
-		elif node.type == ASTNodeType.FunctionDecl:
+		elif nodeType == ASTNodeType.FunctionDecl:
 			self.checkDuplicateDeclaration(node)
 			self.addFunctionSignature(node)
-		elif node.type == ASTNodeType.ArrayDecl:
+		elif nodeType == ASTNodeType.ArrayDecl:
 			self.checkDuplicateDeclaration(node)
 			arrayType = PointerType(mapNodeToVarType(node.children[0].value), node.children[0].value.ptrCount)
 			size = node.children[1].value
 			self.symbolTable.insertEntry(str(node.value), ArrayType(arrayType, size), Scope.GLOBAL if self.currentLevel == 0 else Scope.LOCAL)
-		elif type(node.type) is pointerType:
+		elif type(nodeType) is pointerType:
 			# Exception for functionDecls -> do not add the 'declared' symbols to the table
-			if self.isSignatureType(node.type.type):
+			if self.isSignatureType(nodeType.type):
 				return
 			
 			self.checkDuplicateDeclaration(node)			
 			# Type consists of the primitive type + optionally pointer operators
-			symbolType = PointerType(mapNodeToVarType(node.type), node.type.ptrCount)
+			symbolType = PointerType(mapNodeToVarType(nodeType), nodeType.ptrCount)
 			if isReferenceDecl:
 				symbolType = ReferenceType(symbolType)
 
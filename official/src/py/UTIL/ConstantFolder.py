@@ -0,0 +1,162 @@
+import codecs, math
+
+from src.py.AST.ASTNode import ASTNodeType, pointerType
+from src.py.AST.ASTWalker import ASTWalker, WalkEvent
+from src.py.UTIL.VarTypes import ReferenceType
+
+
+# The nodes that hold a constant, and the kind of value they hold
+valueNodes = {ASTNodeType.RValueInt: "i", ASTNodeType.RValueFloat: "r", ASTNodeType.RValueChar: "c", ASTNodeType.RValueBool: "b"}
+
+# The value nodes of the declarations that can be propagated
+declarationValueNodes = {ASTNodeType.IntDecl: ASTNodeType.RValueInt, ASTNodeType.FloatDecl: ASTNodeType.RValueFloat, \
+	ASTNodeType.CharDecl: ASTNodeType.RValueChar, ASTNodeType.BoolDecl: ASTNodeType.RValueBool}
+
+arithmeticOperators = {
+	ASTNodeType.Addition: lambda left, right: left + right,
+	ASTNodeType.Subtraction: lambda left, right: left - right,
+	ASTNodeType.Mul: lambda left, right: left * right,
+}
+
+comparisonOperators = {
+	ASTNodeType.Equals: lambda left, right: left == right,
+	ASTNodeType.NotEquals: lambda left, right: left != right,
+	ASTNodeType.Greater: lambda left, right: left > right,
+	ASTNodeType.GreaterOrEqual: lambda left, right: left >= right,
+	ASTNodeType.Less: lambda left, right: left < right,
+	ASTNodeType.LessOrEqual: lambda left, right: left <= right,
+}
+
+# The range of the integers of the p machine
+minInt = -2**31
+maxInt = 2**31 - 1
+
+
+class ConstantFolder:
+	"""
+		Computes the expressions of constants at compile time (-O), on the analysed AST: '(2 + 3) * 5' becomes 25.
+		Variables of a simple type that get a constant in their declaration, and are never assigned afterwards
+		or handed out by address or by reference, are replaced by that constant wherever they are read.
+		Folding only happens where the operands have the same type, so the result has the type the TypeDeductor gave the expression.
+		The nodes are changed in place, they keep their deduced type and whether they are useless.
+	"""
+	def __init__(self):
+		self.foldedNodes = 0
+		self.propagatedNodes = 0
+
+	def fold(self, ast):
+		"""
+			Folds the constants of the AST, propagating constant variables until nothing changes anymore.
+			Returns the amount of nodes that were folded or propagated.
+		"""
+		while True:
+			self.foldExpressions(ast)
+			if self.propagateConstants(ast) == 0:
+				break
+		return self.foldedNodes + self.propagatedNodes
+
+	def foldExpressions(self, ast):
+		# The children of a node are folded before the node itself
+		for (event, node, nodeLevel) in ASTWalker(ast).iterEvents():
+			if event == WalkEvent.Exit:
+				value = self.computeValue(node)
+				if value != None:
+					node.makeValue(*value)
+					self.foldedNodes += 1
+
+	def propagateConstants(self, ast):
+		"""
+			Replaces the reads of the constant variables by their constant, returns the amount of replaced reads.
+		"""
+		constants = {}
+		changedSymbols = set()
+		reads = []
+		for (node, nodeLevel) in ASTWalker(ast).iterDepthFirst():
+			nodeType = node.type
+			if isinstance(nodeType, pointerType):
+				if nodeType.ptrCount == 0 and nodeType.type in declarationValueNodes and len(node.children) != 0:
+					value = node.children[0].children[0]
+					if value.type == declarationValueNodes[nodeType.type]:
+						constants[node.symbol] = (value.type, value.value)
+			elif nodeType == ASTNodeType.RValueID:
+				reads.append(node)
+			elif nodeType == ASTNodeType.LValue or nodeType == ASTNodeType.LValueArrayElement:
+				# Assigned, or its address is taken
+				changedSymbols.add(node.symbol)
+			elif nodeType == ASTNodeType.FunctionCall:
+				for argument, argumentType in zip(node.children, node.symbol.type.arguments):
+					if isinstance(argumentType, ReferenceType):
+						changedSymbols.add(argument.symbol)
+
+		propagated = 0
+		for node in reads:
+			symbol = node.symbol
+			if symbol in constants and symbol not in changedSymbols and not isinstance(symbol.type, ReferenceType):
+				node.makeValue(*constants[symbol])
+				propagated += 1
+		self.propagatedNodes += propagated
+		return propagated
+
+	def computeValue(self, node):
+		"""
+			Returns (value node type, value) of the constant node can be replaced with, None if it isn't constant.
+		"""
+		nodeType = node.type
+		children = node.children
+		kinds = [valueNodes.get(child.type) for child in children]
+		if len(children) == 0 or None in kinds:
+			return None
+
+		if nodeType == ASTNodeType.Brackets:
+			return children[0].type, children[0].value
+
+		elif nodeType == ASTNodeType.Negate and (kinds[0] == "i" or kinds[0] == "r"):
+			return self.numberValue(children[0].type, -children[0].value)
+
+		elif nodeType == ASTNodeType.Not or nodeType == ASTNodeType.NegateBrackets:
+			if kinds[0] == "b":
+				return ASTNodeType.RValueBool, not children[0].value
+
+		elif len(children) != 2 or kinds[0] != kinds[1]:
+			return None
+
+		elif nodeType in arithmeticOperators and (kinds[0] == "i" or kinds[0] == "r"):
+			return self.numberValue(children[0].type, arithmeticOperators[nodeType](children[0].value, children[1].value))
+
+		elif nodeType == ASTNodeType.Div and (kinds[0] == "i" or kinds[0] == "r"):
+			left = children[0].value
+			right = children[1].value
+			if right == 0:
+				# Left for the p machine to fail on
+				return None
+			if kinds[0] == "i":
+				# C rounds towards zero
+				quotient = abs(left) // abs(right)
+				return self.numberValue(ASTNodeType.RValueInt, quotient if (left < 0) == (right < 0) else -quotient)
+			return self.numberValue(ASTNodeType.RValueFloat, left / right)
+
+		elif nodeType in comparisonOperators:
+			left, right = [self.comparableValue(kind, child.value) for kind, child in zip(kinds, children)]
+			return ASTNodeType.RValueBool, comparisonOperators[nodeType](left, right)
+
+		elif (nodeType == ASTNodeType.And or nodeType == ASTNodeType.Or) and kinds[0] == "b":
+			if nodeType == ASTNodeType.And:
+				return ASTNodeType.RValueBool, children[0].value and children[1].value
+			return ASTNodeType.RValueBool, children[0].value or children[1].value
+
+		return None
+
+	def numberValue(self, valueType, value):
+		if valueType == ASTNodeType.RValueInt and not(minInt <= value <= maxInt):
+			# Overflows are left to the p machine
+			return None
+		if valueType == ASTNodeType.RValueFloat and not math.isfinite(value):
+			# 'ldc r inf' isn't p code, the p machine computes it
+			return None
+		return valueType, value
+
+	def comparableValue(self, kind, value):
+		if kind == "c":
+			# A quoted character, maybe escaped: 'a', '\n'
+			return codecs.decode(value[1:-1], "unicode_escape")
+		return value
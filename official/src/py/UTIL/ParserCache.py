@@ -0,0 +1,168 @@
+"""
+	The lexer and parser only know how to predict an alternative quickly (with their DFA) once they have
+	seen a similar input. In a new process the DFA are empty, so the first compile spends most of its time
+	filling them. The cache stores the filled DFA of a warmed up process, so a new process can start where it left off.
+	The cache is loaded with pickle, so it has to be as trusted as the compiler itself: only point C2P_PARSER_CACHE
+	at files nobody else can write.
+"""
+import gc, glob, io, os, pickle, sys
+
+import antlr4
+from antlr4.PredictionContext import PredictionContext
+from antlr4.atn.ATNSimulator import ATNSimulator
+from antlr4.atn.ATNState import ATNState
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+from antlr4.atn.SemanticContext import SemanticContext
+
+from src.cGrammarLexer import cGrammarLexer
+from src.cGrammarParser import cGrammarParser
+from src.py.runCompiler import parseFile
+
+
+# The cache is kept next to the generated parser, C2P_PARSER_CACHE overrides it (an empty value turns it off)
+defaultCacheFilename = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "cGrammar.cache")
+
+# Objects of the runtime that are compared by identity, they can't be copied into the cache
+runtimeSingletons = {
+	"SemanticContext.NONE": SemanticContext.NONE,
+	"PredictionContext.EMPTY": PredictionContext.EMPTY,
+	"ATNSimulator.ERROR": ATNSimulator.ERROR,
+	"LexerATNSimulator.ERROR": LexerATNSimulator.ERROR,
+}
+
+
+class CachePickler(pickle.Pickler):
+	"""
+		Pickles DFA, with references to the ATN states instead of copies: the ATN is made anyway when the lexer and parser are imported.
+	"""
+	singletonNames = {id(singleton): name for name, singleton in runtimeSingletons.items()}
+
+	def persistent_id(self, obj):
+		if isinstance(obj, ATNState):
+			return obj.stateNumber
+		return CachePickler.singletonNames.get(id(obj))
+
+class CacheUnpickler(pickle.Unpickler):
+	def __init__(self, file, atn):
+		super().__init__(file)
+		self.atn = atn
+
+	def persistent_load(self, persistentID):
+		if type(persistentID) is int:
+			return self.atn.states[persistentID]
+		return runtimeSingletons[persistentID]
+
+
+def dumpDFA(dfa):
+	dfaFile = io.BytesIO()
+	CachePickler(dfaFile, pickle.HIGHEST_PROTOCOL).dump(dfa)
+	return dfaFile.getvalue()
+
+def loadDFA(pickledDFA, atn):
+	# The DFA are a lot of small objects, collecting garbage while they are made only slows down the loading
+	gc.disable()
+	try:
+		return CacheUnpickler(io.BytesIO(pickledDFA), atn).load()
+	finally:
+		gc.enable()
+
+
+class LazyDFAList(list):
+	"""
+		The DFA of the parser decisions, where every DFA is only unpickled when the parser needs it for the first time.
+		A small program only uses some of the decisions, so it doesn't pay for loading the others.
+	"""
+	def __init__(self, pickledDFA, atn):
+		super().__init__([None] * len(pickledDFA))
+		self.pickledDFA = pickledDFA
+		self.atn = atn
+
+	def __getitem__(self, decision):
+		dfa = super().__getitem__(decision)
+		if dfa == None:
+			dfa = loadDFA(self.pickledDFA[decision], self.atn)
+			self[decision] = dfa
+		return dfa
+
+
+def getCacheFilename():
+	return os.environ.get("C2P_PARSER_CACHE", defaultCacheFilename)
+
+def keyFilenames():
+	# The generated lexer and parser, and the runtime they run on
+	return [sys.modules[cGrammarLexer.__module__].__file__, sys.modules[cGrammarParser.__module__].__file__, antlr4.__file__]
+
+def cacheKey():
+	"""
+		Identifies the generated lexer and parser and the version of the runtime by the size and modification time of their files,
+		a cache made for another grammar or runtime is ignored. It's checked at every start, so it only takes a few stat calls.
+	"""
+	key = []
+	for filename in keyFilenames():
+		status = os.stat(filename)
+		key.append((status.st_size, status.st_mtime_ns))
+	return key
+
+def saveParserCache(filename=None):
+	"""
+		Writes the DFA of the lexer and parser, as far as they are filled in this process.
+	"""
+	filename = filename if filename != None else getCacheFilename()
+
+	# The DFA states are pickled recursively
+	recursionLimit = sys.getrecursionlimit()
+	sys.setrecursionlimit(max(recursionLimit, 100000))
+	# Written under another name first, so processes that start meanwhile never read half a cache
+	temporaryFilename = filename + "." + str(os.getpid())
+	try:
+		lexerDFA = dumpDFA([cGrammarLexer.decisionsToDFA[mode] for mode in range(len(cGrammarLexer.decisionsToDFA))])
+		parserDFA = [dumpDFA(cGrammarParser.decisionsToDFA[decision]) for decision in range(len(cGrammarParser.decisionsToDFA))]
+		with open(temporaryFilename, "wb") as cacheFile:
+			# The key is pickled on its own, so a cache for another grammar is rejected without loading the DFA
+			pickle.dump(cacheKey(), cacheFile, pickle.HIGHEST_PROTOCOL)
+			pickle.dump((lexerDFA, parserDFA), cacheFile, pickle.HIGHEST_PROTOCOL)
+		os.replace(temporaryFilename, filename)
+	finally:
+		sys.setrecursionlimit(recursionLimit)
+		if os.path.exists(temporaryFilename):
+			os.remove(temporaryFilename)
+
+def loadParserCache(filename=None):
+	"""
+		Gives the lexer and parser the DFA of the cache, if there is a cache for this grammar.
+		Has to be called before the first lexer or parser is made. Returns wether the cache was used.
+	"""
+	filename = filename if filename != None else getCacheFilename()
+	if filename == "" or not os.path.exists(filename):
+		return False
+
+	try:
+		with open(filename, "rb") as cacheFile:
+			if pickle.load(cacheFile) != cacheKey():
+				return False
+			lexerDFA, parserDFA = pickle.load(cacheFile)
+		lexerDFA = loadDFA(lexerDFA, cGrammarLexer.atn)
+	except Exception:
+		# An unreadable cache (e.g. made with another version of the runtime) is the same as no cache
+		return False
+
+	cGrammarLexer.decisionsToDFA = lexerDFA
+	cGrammarParser.decisionsToDFA = LazyDFAList(parserDFA, cGrammarParser.atn)
+	return True
+
+def warmParserCache(cFilenames):
+	"""
+		Parses cFilenames, so the DFA hold the predictions for them, and saves the cache.
+	"""
+	for cFilename in cFilenames:
+		try:
+			parseFile(cFilename)
+		except Exception:
+			# Files with syntax errors still teach the DFA something
+			pass
+	saveParserCache()
+
+
+if __name__ == '__main__':
+	# python -m src.py.UTIL.ParserCache [c files], warms up with the happy day tests by default
+	warmParserCache(sys.argv[1:] if len(sys.argv) > 1 else sorted(glob.glob("res/happyDayTests/*/*.c")))
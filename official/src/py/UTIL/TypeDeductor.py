@@ -1,7 +1,6 @@
 
 from src.py.AST.ASTNode import ASTNodeType, pointerType
 from src.py.AST.AST import AST
-from src.py.ST.SymbolTable import SymbolTable, SymbolMapping
 from src.py.UTIL.VarTypes import *
 from src.py.SA.ErrorMsgHandler import ErrorMsgHandler
 
@@ -9,78 +8,86 @@ from src.py.SA.ErrorMsgHandler import ErrorMsgHandler
 class TypeDeductor:
 	
 	@staticmethod
-	def deductType(node, symbolTable):
+	def deductType(node):
 		"""
 			Returns the type of the (rvalue) node.
+			The type is only deducted the first time, and then kept on the node.
 		"""
-		if node.type == ASTNodeType.RValueChar:
+		if node.deducedType == None:
+			node.deducedType = TypeDeductor.computeType(node)
+		return node.deducedType
+
+	@staticmethod
+	def computeType(node):
+		nodeType = node.type
+		if nodeType == ASTNodeType.RValueChar:
 			return CharType()
-		elif node.type == ASTNodeType.RValueInt:
+		elif nodeType == ASTNodeType.RValueInt:
 			return IntType()
-		elif node.type == ASTNodeType.RValueFloat:
+		elif nodeType == ASTNodeType.RValueFloat:
 			return FloatType()
-		elif node.type == ASTNodeType.RValueBool:
+		elif nodeType == ASTNodeType.RValueBool:
 			return BoolType()
-		elif node.type == ASTNodeType.RValueID:
-			nodeType = symbolTable.lookupSymbol(node.value).type
+		elif nodeType == ASTNodeType.RValueID:
+			nodeType = node.symbol.type
 			# Return the type, except if the ID references an array (without element access)
 			return nodeType if not(type(nodeType) is ArrayType) else nodeType.addressOf()
 
-		elif node.type == ASTNodeType.LValue:
-			nodeType = symbolTable.lookupSymbol(node.value).type
+		elif nodeType == ASTNodeType.LValue:
+			nodeType = node.symbol.type
 			return nodeType if not(type(nodeType) is ArrayType) else nodeType.addressOf()
 
-		elif node.type == ASTNodeType.Addition:
-			return TypeDeductor.checkTypeChildrenExpression(node.children, symbolTable)
-		elif node.type == ASTNodeType.Subtraction:
-			return TypeDeductor.checkTypeChildrenExpression(node.children, symbolTable)
-		elif node.type == ASTNodeType.Mul:
-			return TypeDeductor.checkTypeChildrenExpression(node.children, symbolTable)
-		elif node.type == ASTNodeType.Div:
-			return TypeDeductor.checkTypeChildrenExpression(node.children, symbolTable)
-
-		elif node.type == ASTNodeType.Brackets:
-			return TypeDeductor.deductType(node.children[0], symbolTable)
-		elif node.type == ASTNodeType.FunctionCall:
-			return symbolTable.lookupSymbol(node.value).type
-
-		elif node.type == ASTNodeType.RValueArrayElement:
-			return symbolTable.lookupSymbol(node.value).type.type
-		elif node.type == ASTNodeType.LValueArrayElement:
-			return symbolTable.lookupSymbol(node.value).type.type
-		elif node.type == ASTNodeType.RValueAddress:
-			return symbolTable.lookupSymbol(node.children[0].value).type.addressOf()
-		elif node.type == ASTNodeType.Dereference:
-			return TypeDeductor.checkDereferenceValidity(node, symbolTable)
-
-		elif node.type == ASTNodeType.Greater or \
-			node.type == ASTNodeType.GreaterOrEqual or \
-			node.type == ASTNodeType.Or or \
-			node.type == ASTNodeType.And or \
-			node.type == ASTNodeType.Equals or \
-			node.type == ASTNodeType.NotEquals or \
-			node.type == ASTNodeType.Less or \
-			node.type == ASTNodeType.LessOrEqual:
+		elif nodeType == ASTNodeType.Addition:
+			return TypeDeductor.checkTypeChildrenExpression(node.children)
+		elif nodeType == ASTNodeType.Subtraction:
+			return TypeDeductor.checkTypeChildrenExpression(node.children)
+		elif nodeType == ASTNodeType.Mul:
+			return TypeDeductor.checkTypeChildrenExpression(node.children)
+		elif nodeType == ASTNodeType.Div:
+			return TypeDeductor.checkTypeChildrenExpression(node.children)
+
+		elif nodeType == ASTNodeType.Brackets:
+			return TypeDeductor.deductType(node.children[0])
+		elif nodeType == ASTNodeType.FunctionCall:
+			return node.symbol.type
+
+		elif nodeType == ASTNodeType.RValueArrayElement:
+			return node.symbol.type.type
+		elif nodeType == ASTNodeType.LValueArrayElement:
+			return node.symbol.type.type
+		elif nodeType == ASTNodeType.RValueAddress:
+			return node.children[0].symbol.type.addressOf()
+		elif nodeType == ASTNodeType.Dereference:
+			return TypeDeductor.checkDereferenceValidity(node)
+
+		elif nodeType == ASTNodeType.Greater or \
+			nodeType == ASTNodeType.GreaterOrEqual or \
+			nodeType == ASTNodeType.Or or \
+			nodeType == ASTNodeType.And or \
+			nodeType == ASTNodeType.Equals or \
+			nodeType == ASTNodeType.NotEquals or \
+			nodeType == ASTNodeType.Less or \
+			nodeType == ASTNodeType.LessOrEqual:
 			# Check to see if the children are of equal type
-			return TypeDeductor.checkTypeChildrenExpression(node.children, symbolTable)
-		elif node.type == ASTNodeType.Not or \
-			node.type == ASTNodeType.Brackets or \
-			node.type == ASTNodeType.NegateBrackets:
-			return TypeDeductor.deductType(node.children[0], symbolTable)
-		elif node.type == ASTNodeType.Negate:
-			childType = TypeDeductor.deductType(node.children[0], symbolTable)
+			return TypeDeductor.checkTypeChildrenExpression(node.children)
+		elif nodeType == ASTNodeType.Not or \
+			nodeType == ASTNodeType.Brackets or \
+			nodeType == ASTNodeType.NegateBrackets:
+			return TypeDeductor.deductType(node.children[0])
+		elif nodeType == ASTNodeType.Negate:
+			childType = TypeDeductor.deductType(node.children[0])
 			if not(childType == IntType() or childType == FloatType()):
 				ErrorMsgHandler.negateInvalid(node, childType)
 			return childType
-		elif node.type == ASTNodeType.Condition:
+		elif nodeType == ASTNodeType.Condition:
 			# Don't need to typecheck further, handled later
 			return BoolType()
 		else:
-			raise Exception("Could not deduct type of node '" + str(node.type.name) + "'.")
+			raise Exception("Could not deduct type of node '" + str(nodeType.name) + "'.")
 
 
 	@staticmethod
-	def checkDereferenceValidity(node, symbolTable):
+	def checkDereferenceValidity(node):
 		"""
 			Checks the validity of dereferencing.
 			Returns the type after dereferencing.
@@ -112,7 +119,7 @@ class TypeDeductor:
 			if currentNode.type == ASTNodeType.Dereference:
 				pass
 			elif currentNode.type == ASTNodeType.RValueID or currentNode.type == ASTNodeType.RValueArrayElement or currentNode.type == ASTNodeType.FunctionCall:
-				newType = TypeDeductor.deductType(currentNode, symbolTable)
+				newType = TypeDeductor.deductType(currentNode)
 				if type(newType) is ArrayType:
 					newType = newType.addressOf()
 				elif type(newType) is ReferenceType:
@@ -144,7 +151,7 @@ class TypeDeductor:
 
 			else:
 				# All other nodes are part of an expression
-				rType = type(TypeDeductor.deductType(currentNode, symbolTable))
+				rType = type(TypeDeductor.deductType(currentNode))
 				if not(rType is IntType) and not(rType is PointerType):
 					ErrorMsgHandler.derefInvalidExpression(node)
 
@@ -152,13 +159,13 @@ class TypeDeductor:
 
 
 	@staticmethod
-	def checkTypeChildrenExpression(children, symbolTable):
+	def checkTypeChildrenExpression(children):
 		"""
 			Compares the types of the children. If the types differ: throw Exception.
 			Returns the type of the children if equal.
 		"""
-		type1 = TypeDeductor.deductType(children[0], symbolTable)
-		type2 = TypeDeductor.deductType(children[1], symbolTable)
+		type1 = TypeDeductor.deductType(children[0])
+		type2 = TypeDeductor.deductType(children[1])
 		if (type1 != type2):
 			ErrorMsgHandler.typesOperationWrong(children[0], type1, type2, children[0].parent)
 		return type1
\ No newline at end of file
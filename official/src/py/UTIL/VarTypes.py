@@ -8,6 +8,28 @@ def strictEqual(obj1, obj2):
 	return False
 		
 
+class InternedType(type):
+	"""
+		Metaclass that interns the instances of a type: creating a type with the same arguments twice returns the same object,
+		so equal types are usually the same object and are compared by identity first.
+		The types themselves are not hashable: their == tells whether types are compatible (int and int* are),
+		which is no equivalence that a hash could follow. The instances are found by the identity of the type arguments instead,
+		those are interned themselves.
+	"""
+	def __init__(cls, name, bases, namespace):
+		super().__init__(name, bases, namespace)
+		cls.instances = {}
+
+	def __call__(cls, *args):
+		# The arguments are kept alive by the instance, so their id can't be reused while it is in the table
+		key = tuple([id(arg) if isinstance(arg, VarType) else arg for arg in args])
+		instance = cls.instances.get(key)
+		if instance is None:
+			instance = super().__call__(*args)
+			cls.instances[key] = instance
+		return instance
+
+
 class VarType:
 	def __init__(self):
 		self.memorySize = 0
@@ -16,6 +38,8 @@ class VarType:
 		return str(self)
 
 	def __eq__(self, object):
+		if object is self:
+			return True
 		if type(object) == type(self):
 			return True
 		return False
@@ -32,12 +56,20 @@ class VarType:
 	def getPString(self):
 		return "default"
 
+	def __copy__(self):
+		return self
+
+	def __deepcopy__(self, memo):
+		return self
 
-class VoidType(VarType):
+
+class VoidType(VarType, metaclass=InternedType):
 	def __str__(self):
 		return "void"
 	
 	def __eq__(self, object):
+		if object is self:
+			return True
 		if type(object) is VoidType:
 			return True
 		elif type(object) is PointerType:
@@ -46,7 +78,7 @@ class VoidType(VarType):
 
 
 
-class IntType(VarType):
+class IntType(VarType, metaclass=InternedType):
 	def __init__(self):
 		self.memorySize = 1
 
@@ -54,6 +86,8 @@ class IntType(VarType):
 		return "int"
 	
 	def __eq__(self, object):
+		if object is self:
+			return True
 		if type(object) is PointerType:
 			return object == self
 		elif type(object) is ArrayType:
@@ -76,7 +110,7 @@ class IntType(VarType):
 		return "i"
 
 
-class FloatType(VarType):
+class FloatType(VarType, metaclass=InternedType):
 	def __init__(self):
 		self.memorySize = 1
 
@@ -84,6 +118,8 @@ class FloatType(VarType):
 		return "float"
 
 	def __eq__(self, object):
+		if object is self:
+			return True
 		if type(object) is PointerType:
 			return object == self
 		elif type(object) is ArrayType:
@@ -106,7 +142,7 @@ class FloatType(VarType):
 		return "r"
 
 
-class CharType(VarType):
+class CharType(VarType, metaclass=InternedType):
 	def __init__(self):
 		self.memorySize = 1
 
@@ -114,6 +150,8 @@ class CharType(VarType):
 		return "char"
 
 	def __eq__(self, object):
+		if object is self:
+			return True
 		if type(object) is PointerType:
 			return object == self
 		elif type(object) is ArrayType:
@@ -135,7 +173,7 @@ class CharType(VarType):
 	def getPString(self):
 		return "c"
 
-class BoolType(VarType):
+class BoolType(VarType, metaclass=InternedType):
 	def __init__(self):
 		self.memorySize = 1
 
@@ -143,6 +181,8 @@ class BoolType(VarType):
 		return "bool"
 
 	def __eq__(self, object):
+		if object is self:
+			return True
 		if type(object) is BoolType:
 			return True
 
@@ -165,7 +205,7 @@ class BoolType(VarType):
 	def getPString(self):
 		return "b"
 
-class ReferenceType(VarType):
+class ReferenceType(VarType, metaclass=InternedType):
 	def __init__(self, _type):
 		self.referencedType = _type
 
@@ -173,6 +213,8 @@ class ReferenceType(VarType):
 		return str(self.referencedType)
 
 	def __eq__(self, object):
+		if object is self:
+			return True
 		return object == self.referencedType
 
 	def addressOf(self):
@@ -185,7 +227,7 @@ class ReferenceType(VarType):
 		return self.referencedType.getPString()
 
 
-class PointerType(VarType):
+class PointerType(VarType, metaclass=InternedType):
 	def __init__(self, _type, ptrCount):
 		self.type = _type
 		self.ptrCount = ptrCount
@@ -195,6 +237,8 @@ class PointerType(VarType):
 		return str(self.type) + ''.join(["*" for i in range(self.ptrCount)])
 
 	def __eq__(self, object):
+		if object is self:
+			return True
 		if type(object) is ArrayType:
 			return object == self
 		elif type(object) is ReferenceType:
@@ -229,7 +273,7 @@ class PointerType(VarType):
 			return "a"
 
 
-class ArrayType(VarType):
+class ArrayType(VarType, metaclass=InternedType):
 	def __init__(self, _type, size):
 		self.type = _type
 		self.size = size
@@ -239,6 +283,8 @@ class ArrayType(VarType):
 		return str(self.type) + " [" + str(self.size) + "]"
 	
 	def __eq__(self, object):
+		if object is self:
+			return True
 		if type(object) == FunctionType:
 			return object == self
 		if type(object) == type(self) and type(self.type) == type(object.type):
@@ -260,6 +306,9 @@ class ArrayType(VarType):
 
 
 class FunctionType(VarType):
+	"""
+		Function types are not interned: every function has its own signature object that keeps track of its initialization and declared variables.
+	"""
 	def __init__(self, returnType, arguments, initialized = False):
 		self.returnType = returnType
 		self.arguments = arguments
@@ -271,6 +320,8 @@ class FunctionType(VarType):
 		return str(self.returnType) + " func(" + ",".join([str(i) for i in self.arguments]) + ")"
 
 	def __eq__(self, object):
+		if object is self:
+			return True
 		if type(object) is FunctionType:
 			return self.returnType == object.returnType
 		return self.returnType == object
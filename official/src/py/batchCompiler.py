@@ -0,0 +1,75 @@
+import multiprocessing, os
+from time import perf_counter
+
+from src.py.compileServer import compileRequest
+from src.py.UTIL.ParserCache import loadParserCache
+
+
+def collectFiles(paths, outputDirectory):
+	"""
+		Returns the compile requests (see compileServer) for paths, a list of c files and directories.
+		The c files in a directory are searched recursively, their output keeps the structure of the directory:
+		'dir/a/b.c' is compiled to 'outputDirectory/a/b.p'. A c file that is given itself is compiled to 'outputDirectory/b.p'.
+		Raises an Exception if two c files would be compiled to the same p file.
+	"""
+	requests = []
+	cFilenamesByOutput = {}
+	for path in paths:
+		if os.path.isdir(path):
+			cFilenames = []
+			for directory, subdirectories, filenames in os.walk(path):
+				cFilenames += [os.path.join(directory, filename) for filename in filenames if filename.endswith(".c")]
+			cFilenames.sort()
+			outputNames = [os.path.relpath(cFilename, path) for cFilename in cFilenames]
+		else:
+			cFilenames = [path]
+			outputNames = [os.path.basename(path)]
+
+		for cFilename, outputName in zip(cFilenames, outputNames):
+			outputName = os.path.join(outputDirectory, os.path.splitext(outputName)[0])
+			if outputName in cFilenamesByOutput:
+				raise Exception("'" + cFilenamesByOutput[outputName] + "' and '" + cFilename + "' would both be compiled to '" + outputName + ".p'.")
+			cFilenamesByOutput[outputName] = cFilename
+			requests.append({"cfile": cFilename, "pfile": outputName + ".p", "dotfile": outputName + ".dot"})
+	return requests
+
+def compileBatchRequest(request):
+	"""
+		Compiles one file in a worker, the worker keeps its lexer and parser for the next file.
+	"""
+	start = perf_counter()
+	os.makedirs(os.path.dirname(request["pfile"]) or ".", exist_ok=True)
+	response = compileRequest(request)
+	response["time"] = perf_counter() - start
+	return request, response
+
+def compileBatch(paths, outputDirectory="data", jobs=None, dot=False, report=print, optimize=False):
+	"""
+		Compiles all c files of paths (see collectFiles) with a pool of jobs worker processes, one per CPU by default.
+		Every worker starts with the parser cache and keeps its warmed up parser for all files it compiles.
+		optimize folds the constants and runs the PeepholeOptimizer on every program.
+		report is called with a line of text for every file as soon as it is compiled, and with a summary at the end.
+		Returns the number of files that failed to compile.
+	"""
+	requests = collectFiles(paths, outputDirectory)
+	for request in requests:
+		request["optimize"] = optimize
+		if not dot:
+			request["dotfile"] = None
+
+	failures = 0
+	start = perf_counter()
+	with multiprocessing.Pool(jobs, initializer=loadParserCache) as pool:
+		for request, response in pool.imap_unordered(compileBatchRequest, requests):
+			if response["status"] == "ok":
+				report("ok     " + request["cfile"] + " -> " + request["pfile"] + " (%.0f ms)" % (1000 * response["time"]))
+			else:
+				failures += 1
+				report("error  " + request["cfile"] + ": " + response["message"])
+			if response["stderr"] != "":
+				report(response["stderr"].rstrip("\n"))
+	seconds = perf_counter() - start
+
+	report("%d files compiled, %d failed, in %.2f s (%.1f files/s)" % \
+		(len(requests), failures, seconds, len(requests) / seconds if seconds > 0 else 0.0))
+	return failures
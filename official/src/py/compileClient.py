@@ -0,0 +1,41 @@
+import json, os, socket, sys, tempfile
+
+# Only the standard library is used here, so a client starts without loading the compiler
+
+
+def getDefaultSocketPath():
+	return os.path.join(tempfile.gettempdir(), "c2p-" + str(os.getuid()) + ".sock")
+
+def sendRequest(socketPath, request):
+	"""
+		Sends a request (a dict) to the compile server and returns its response.
+		The request and the response are a single line of JSON each.
+	"""
+	with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+		connection.connect(socketPath)
+		with connection.makefile("rw", encoding="utf-8") as stream:
+			stream.write(json.dumps(request) + "\n")
+			stream.flush()
+			return json.loads(stream.readline())
+
+def compileOnServer(socketPath, cFilename, pFilename, dotFilename=None, optimize=False):
+	"""
+		Compiles cFilename to pFilename on the compile server, like runCompiler.
+		Errors of the compiler are raised as an Exception with the same message.
+	"""
+	# The server has its own working directory
+	request = {
+		"cfile": os.path.abspath(cFilename),
+		"pfile": os.path.abspath(pFilename),
+		"dotfile": os.path.abspath(dotFilename) if dotFilename != None else None,
+		"optimize": optimize
+	}
+	response = sendRequest(socketPath, request)
+
+	# The messages the lexer writes while compiling
+	sys.stderr.write(response["stderr"])
+	if response["status"] == "error":
+		raise Exception(response["message"])
+
+def stopCompileServer(socketPath):
+	sendRequest(socketPath, {"command": "stop"})
@@ -0,0 +1,66 @@
+import io, json, os, socket, socketserver
+
+from src.py.runCompiler import runCompiler
+from src.py.CompileContext import CompileContext
+from src.py.UTIL.ParserCache import loadParserCache
+from src.py.compileClient import getDefaultSocketPath
+
+
+class CompileRequestHandler(socketserver.StreamRequestHandler):
+	"""
+		Handles the request of one client connection: a compilation, or stopping the server.
+	"""
+	def handle(self):
+		request = json.loads(self.rfile.readline().decode("utf-8"))
+		if request.get("command") == "stop":
+			self.server.stopping = True
+			response = {"status": "ok", "message": "", "stderr": ""}
+		else:
+			response = compileRequest(request)
+		self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+
+
+def compileRequest(request):
+	"""
+		Compiles the files of the request, and returns the response for the client:
+			status = "ok" or "error"
+			message = the message of the error
+			stderr = what the compiler wrote to stderr (e.g. the errors of the lexer)
+	"""
+	# A new context for every compilation, so the node IDs in the dot output are the same as in a new process
+	errorOutput = io.StringIO()
+	response = {"status": "ok", "message": ""}
+	try:
+		runCompiler(request["cfile"], request["pfile"], dotFilename=request["dotfile"], context=CompileContext(errorOutput), \
+			optimize=request.get("optimize", False))
+	except Exception as inst:
+		response = {"status": "error", "message": str(inst)}
+	response["stderr"] = errorOutput.getvalue()
+	return response
+
+
+def runCompileServer(socketPath=None):
+	"""
+		Compiles the requests of the clients (see compileClient) that connect to the Unix socket socketPath,
+		until a client stops the server. The lexer and parser stay in memory with their DFA,
+		so only the first compilation pays for loading and warming them up.
+		The requests are handled one at a time, in the order they arrive.
+	"""
+	socketPath = socketPath if socketPath != None else getDefaultSocketPath()
+	if os.path.exists(socketPath):
+		# The socket of a server that is still running, or of one that didn't stop cleanly
+		with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+			if connection.connect_ex(socketPath) == 0:
+				raise Exception("A compile server is already running on '" + socketPath + "'.")
+		os.remove(socketPath)
+
+	loadParserCache()
+
+	server = socketserver.UnixStreamServer(socketPath, CompileRequestHandler)
+	server.stopping = False
+	try:
+		while not server.stopping:
+			server.handle_request()
+	finally:
+		server.server_close()
+		os.remove(socketPath)
@@ -1,31 +1,151 @@
-import sys
+import io, sys
 from antlr4 import *
+from antlr4.error.ErrorStrategy import DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
 from src.cGrammarLexer import cGrammarLexer
 from src.cGrammarParser import cGrammarParser
-from src.py.AST.ASTCreator import ASTCreator
+from src.py.AST.AST import AST
+from src.py.AST.ASTCreator import ASTCreator, ASTParseListener
 from src.py.PTranslator import PTranslator
-from src.py.MyErrorListener import MyErrorListener
+from src.py.MyErrorListener import MyErrorListener, StreamErrorListener
+from src.py.CompileContext import CompileContext, getCompileContext
 
 
-def runCompiler(cFilename, pFilename):
-    input = FileStream(cFilename)
-    lexer = cGrammarLexer(input)
+def parseFile(cFilename, ASTbuilder=None):
+    """
+        Parses cFilename and returns the parse tree, see parseSource.
+    """
+    # Read as FileStream reads, without converting the line endings
+    with open(cFilename, 'rb') as cFile:
+        source = cFile.read().decode('ascii')
+    return parseSource(source, ASTbuilder)
+
+
+def parseSource(source, ASTbuilder=None):
+    """
+        Parses the program text source and returns the parse tree.
+        The program is parsed with the fast SLL prediction first, without error recovery.
+        Only if that fails it is parsed again with full LL prediction, which is slower but
+        always finds the right alternative, and reports the syntax errors with MyErrorListener.
+        If an ASTCreator is given, it builds the AST while the program is parsed (see ASTParseListener),
+        then the statements are removed from the parse tree as soon as they are in the AST.
+    """
+    context = getCompileContext()
+    lexer = cGrammarLexer(InputStream(source))
+    if context.errorOutput != None:
+        lexer.removeErrorListeners()
+        lexer.addErrorListener(StreamErrorListener(context.errorOutput))
     stream = CommonTokenStream(lexer)
     parser = cGrammarParser(stream)
-    parser._listeners = [MyErrorListener(cFilename)]
-    tree = parser.program()
+    parser.removeErrorListeners()
+    setParseMode(parser, BailErrorStrategy(), PredictionMode.SLL)
+    firstNodeID = context.nextNodeID
+    if ASTbuilder != None:
+        parser.addParseListener(ASTParseListener(ASTbuilder, parser))
+    try:
+        tree = parser.program()
+    except ParseCancellationException:
+        # Either a syntax error or an input SLL can't decide on, the LL parse tells which one
+        tree = None
+
+    if tree == None or stream.LA(1) != Token.EOF:
+        # The program rule also stops without error before trailing rubbish, the LL parse reports it
+        # (the parse listeners are removed first, reset() can't handle them)
+        parser.removeParseListeners()
+        parser.reset()
+        parser.removeErrorListeners()
+        setParseMode(parser, DefaultErrorStrategy(), PredictionMode.LL)
+        if ASTbuilder != None:
+            # Start the AST over, with the same node IDs
+            context.nextNodeID = firstNodeID
+            parseListener = ASTParseListener(ASTbuilder, parser)
+            parser.addParseListener(parseListener)
+            # Told about the syntax error before MyErrorListener raises it
+            parser.addErrorListener(parseListener)
+        parser.addErrorListener(MyErrorListener(source))
+        tree = parser.program()
+
+    return tree
+
+
+def setParseMode(parser, errorStrategy, predictionMode):
+    """
+        Makes parser handle syntax errors with errorStrategy, and predict the alternatives with predictionMode.
+    """
+    # The Python runtime has no setter for the error strategy, the generated parser reads it from _errHandler
+    parser._errHandler = errorStrategy
+    parser._interp.predictionMode = predictionMode
+
+
+def runCompiler(cFilename, pFilename, astClass=AST, dotFilename=None, context=None, optimize=False, arrayLoopSize=None):
+    """
+        Compiles cFilename to pFilename. Pass astClass=ArrayAST to hold the AST in arrays, for very big programs.
+        The AST is only written in dot format if a dotFilename is given. optimize folds the constants of the AST and runs the PeepholeOptimizer on the program.
+        The compilation runs in context, or in a new CompileContext, so it can run next to compilations on other threads.
+        Arrays with at least arrayLoopSize elements are initialized by a loop (see PTranslator.setArray).
+    """
+    with context if context != None else CompileContext():
+        # The AST is built while parsing, the parse tree isn't kept
+        ASTbuilder = ASTCreator(astClass)
+        parseFile(cFilename, ASTbuilder)
+
+        ast = ASTbuilder.getAST()
+        if dotFilename != None:
+            ASTbuilder.toDot(dotFilename)
+
+        translator = PTranslator(arrayLoopSize)
+        translator.translate(ast, True, optimize)
+        if optimize:
+            translator.optimizeProgram()
+
+        translator.saveProgram(pFilename)
+
 
-    ASTbuilder = ASTCreator(stream)
+class CompileResult:
+    """
+        The result of compileSource:
+            programText = the p code, None if the compilation failed
+            dotText = the AST in dot format, None if it wasn't requested or the compilation failed
+            diagnostics = the messages of the lexer, one per line
+            error = the message of the error that stopped the compilation, None if it succeeded
+    """
+    def __init__(self, programText, dotText, diagnostics, error):
+        self.programText = programText
+        self.dotText = dotText
+        self.diagnostics = diagnostics
+        self.error = error
 
-    walker = ParseTreeWalker()
-    walker.walk(ASTbuilder, tree)
 
-    ast = ASTbuilder.getAST()
-    ASTbuilder.toDot("data/output.dot")
+def compileSource(source, dot=False, astClass=AST, optimize=False, arrayLoopSize=None):
+    """
+        Compiles the program text source (str, or ascii encoded bytes like a c file) in memory, without touching the filesystem.
+        Returns a CompileResult, errors of the compiler end up in its error instead of being raised.
+        The compilation runs in a new CompileContext, so it can run next to compilations on other threads.
+        Arrays with at least arrayLoopSize elements are initialized by a loop (see PTranslator.setArray).
+    """
+    errorOutput = io.StringIO()
+    programText = None
+    dotText = None
+    error = None
+    with CompileContext(errorOutput):
+        try:
+            if isinstance(source, bytes):
+                source = source.decode('ascii')
 
-    translator = PTranslator()
-    translator.translate(ast, True)
+            ASTbuilder = ASTCreator(astClass)
+            parseSource(source, ASTbuilder)
 
-    translator.saveProgram(pFilename)
+            ast = ASTbuilder.getAST()
+            if dot:
+                dotText = str(ast)
 
+            translator = PTranslator(arrayLoopSize)
+            translator.translate(ast, True, optimize)
+            if optimize:
+                translator.optimizeProgram()
+            programText = translator.programText
+        except Exception as inst:
+            dotText = None
+            error = str(inst)
 
+    return CompileResult(programText, dotText, errorOutput.getvalue().splitlines(), error)
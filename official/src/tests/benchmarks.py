@@ -0,0 +1,707 @@
+"""
+	Benchmarks for the compiler, run them from the official directory:
+		python -m src.tests.benchmarks [name ...]
+	Without a name, all benchmarks are run.
+"""
+import glob, os, resource, subprocess, sys, tempfile, threading, tracemalloc
+from copy import deepcopy
+from time import perf_counter, sleep
+
+from antlr4 import *
+
+from src.cGrammarLexer import cGrammarLexer
+from src.cGrammarParser import cGrammarParser
+
+from src.py.MyErrorListener import MyErrorListener
+from src.py.PTranslator import PTranslator
+from src.py.runCompiler import parseFile
+from src.py.compileClient import compileOnServer, stopCompileServer
+from src.py.runCompiler import compileSource
+from src.tests.pmachine import runProgram, countInstructions, happyDayInputs, PMachineError
+from src.py.batchCompiler import compileBatch
+from src.py.AST.ASTNode import ASTNode
+from src.py.AST.ASTWalker import ASTWalker
+from src.py.AST.AST import AST
+from src.py.AST.ASTCreator import ASTCreator
+from src.py.AST.ArrayAST import ArrayAST
+from src.py.ST.SymbolTable import SymbolTable
+from src.py.UTIL.VarTypes import *
+from src.py.UTIL.TypeDeductor import TypeDeductor
+from src.py.UTIL.ConstantFolder import ConstantFolder
+
+
+def generateFunctions(amount):
+	"""
+		Generates a program with 'amount' small functions that are all called from main.
+	"""
+	lines = []
+	for i in range(amount):
+		lines.append("int f" + str(i) + "(int a) {")
+		lines.append("\tint b = a + " + str(i) + ";")
+		lines.append("\twhile (b > 3) {")
+		lines.append("\t\tb = b - 2 * a;")
+		lines.append("\t}")
+		lines.append("\treturn b;")
+		lines.append("}")
+	lines.append("int main() {")
+	lines.append("\tint x = 0;")
+	for i in range(amount):
+		lines.append("\tx = f" + str(i) + "(x);")
+	lines.append("}")
+	return "\n".join(lines) + "\n"
+
+def buildAST(source):
+	lexer = cGrammarLexer(InputStream(source))
+	stream = CommonTokenStream(lexer)
+	parser = cGrammarParser(stream)
+	tree = parser.program()
+
+	ASTbuilder = ASTCreator()
+	ParseTreeWalker().walk(ASTbuilder, tree)
+	return ASTbuilder.getAST()
+
+def replicateFunctions(ast, amount):
+	"""
+		Grows an AST whose first top-level node is a function "f0" to 'amount' functions f0, f1, ...
+		by copying that function. Parsing big programs is slow, this keeps the backend benchmarks fast.
+	"""
+	root = ast.root
+	function = root.children[0]
+	for i in range(1, amount):
+		copy = deepcopy(function, {id(root): root})
+		copy.value = "f" + str(i)
+		root.children.insert(i, copy)
+	return ast
+
+def replicateStatements(ast, amount):
+	"""
+		Grows the body of the first function of the AST to 'amount' copies of its second statement.
+	"""
+	body = ast.root.children[0].children[2]
+	statement = body.children[1]
+	for i in range(1, amount):
+		body.children.insert(1, deepcopy(statement, {id(body): body}))
+	return ast
+
+def toArrayAST(ast):
+	"""
+		Copies an AST of ASTNodes into an ArrayAST.
+	"""
+	arrayAST = ArrayAST()
+	stack = [(child, 0) for child in reversed(ast.root.children)]
+	while len(stack) != 0:
+		node, parent = stack.pop()
+		index = arrayAST.appendNode(node.type, node.position, parent, node.value)
+		stack.extend([(child, index) for child in reversed(node.children)])
+	return arrayAST
+
+def countNodes(ast):
+	return len(ASTWalker(ast).getNodesDepthFirst())
+
+def timeIt(function, *args):
+	start = perf_counter()
+	result = function(*args)
+	return perf_counter() - start, result
+
+def measure(function):
+	"""
+		Returns the time function takes, and the peak memory it allocates in a second run.
+	"""
+	elapsed, _ = timeIt(function)
+	tracemalloc.start()
+	function()
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return elapsed, peak
+
+def printRow(*columns):
+	print("".join([str(column).rjust(14) for column in columns]))
+
+
+#################################
+# Benchmarks                    #
+#################################
+
+def benchCodegen():
+	"""
+		P code generation for growing ASTs of up to 50k-100k nodes.
+		Both many small functions and one long function (a wide fringe in the translator) are measured.
+		With a linear translator, the time per node stays constant.
+	"""
+	template = generateFunctions(1)
+	for shape, replicate in [("functions", replicateFunctions), ("statements", replicateStatements)]:
+		printRow(shape, "nodes", "analysis (s)", "codegen (s)", "us/node")
+		for amount in [500, 1000, 2000, 4000]:
+			ast = replicate(buildAST(template), amount)
+			nodes = countNodes(ast)
+
+			analysisTime, _ = timeIt(PTranslator().translate, ast, False)
+			totalTime, _ = timeIt(PTranslator().translate, ast, True)
+			codegenTime = totalTime - analysisTime
+
+			printRow(amount, nodes, "%.3f" % analysisTime, "%.3f" % codegenTime, "%.2f" % (codegenTime / nodes * 1e6))
+
+
+def benchWalker():
+	"""
+		Pre-order traversal of growing ASTs, both materialized and consumed lazily.
+	"""
+	template = generateFunctions(1)
+	printRow("nodes", "list (s)", "generator (s)", "events (s)")
+	for amount in [500, 1000, 2000, 4000]:
+		ast = replicateStatements(buildAST(template), amount)
+		walker = ASTWalker(ast)
+
+		listTime, nodes = timeIt(walker.getNodesDepthFirst)
+		generatorTime, _ = timeIt(lambda: sum(1 for _ in walker.iterDepthFirst()))
+		eventsTime, _ = timeIt(lambda: sum(1 for _ in walker.iterEvents()))
+
+		printRow(len(nodes), "%.3f" % listTime, "%.3f" % generatorTime, "%.3f" % eventsTime)
+
+
+def benchSymbolTable():
+	"""
+		Symbol table operations in deeply nested blocks and in long functions.
+	"""
+	printRow("nesting", "ops", "time (s)", "us/op")
+	for depth in [10, 100, 1000, 4000]:
+		symbolTable = SymbolTable()
+		start = perf_counter()
+		for i in range(depth):
+			symbolTable.enterScope()
+			symbolTable.insertEntry("v" + str(i), IntType())
+			symbolTable.lookupSymbol("v0")
+			symbolTable.getDefOcc("v" + str(i // 2))
+			symbolTable.getAppOcc()
+		for i in range(depth):
+			symbolTable.leaveScope()
+		elapsed = perf_counter() - start
+		printRow(depth, depth * 6, "%.3f" % elapsed, "%.2f" % (elapsed / (depth * 6) * 1e6))
+
+	printRow("statements", "ops", "time (s)", "us/op")
+	for length in [1000, 10000, 100000]:
+		symbolTable = SymbolTable()
+		start = perf_counter()
+		symbolTable.enterScope()
+		for i in range(length):
+			symbolTable.insertEntry("v" + str(i), IntType())
+			symbolTable.lookupSymbol("v" + str(i // 2))
+			symbolTable.getDefOcc("v" + str(i // 3))
+			symbolTable.getAppOcc()
+		symbolTable.leaveScope()
+		elapsed = perf_counter() - start
+		printRow(length, length * 4 + 2, "%.3f" % elapsed, "%.2f" % (elapsed / (length * 4 + 2) * 1e6))
+
+
+def generateExpression(length):
+	"""
+		Generates a program with an assignment and a condition of 'length' additions each.
+	"""
+	expression = " + ".join(["x"] * length)
+	return "int main() {\n\tint x = 1;\n\tx = " + expression + ";\n\twhile (" + expression + " > 0) {\n\t\tx = 0;\n\t}\n}\n"
+
+def benchTypes():
+	"""
+		Type deduction for long expressions, counts how many times the type of a node is computed.
+	"""
+	computeType = TypeDeductor.computeType
+	computed = {}
+	def countingComputeType(node):
+		computed[node] = computed.get(node, 0) + 1
+		return computeType(node)
+	TypeDeductor.computeType = staticmethod(countingComputeType)
+
+	printRow("length", "nodes", "computations", "per node", "time (s)")
+	for length in [25, 50, 100, 200]:
+		ast = buildAST(generateExpression(length))
+		computed.clear()
+		elapsed, _ = timeIt(PTranslator().translate, ast, True)
+		computations = sum(computed.values())
+		printRow(length, countNodes(ast), computations, "%.2f" % (computations / len(computed)), "%.3f" % elapsed)
+
+	TypeDeductor.computeType = staticmethod(computeType)
+
+
+def benchVarTypes():
+	"""
+		Creation and comparison of the types used during type checking.
+	"""
+	printRow("operation", "amount", "time (s)", "us/op")
+	amount = 100000
+	pointer1 = PointerType(IntType(), 1)
+	pointer2 = PointerType(IntType(), 1)
+	array1 = ArrayType(PointerType(CharType(), 0), 10)
+	array2 = ArrayType(PointerType(CharType(), 0), 10)
+	operations = [
+		("create", lambda: (IntType(), PointerType(CharType(), 2), ArrayType(PointerType(IntType(), 0), 10))),
+		("pointer ==", lambda: pointer1 == pointer2),
+		("array ==", lambda: array1 == array2),
+		("int != float", lambda: IntType() != FloatType()),
+	]
+	for name, operation in operations:
+		start = perf_counter()
+		for i in range(amount):
+			operation()
+		elapsed = perf_counter() - start
+		printRow(name, amount, "%.3f" % elapsed, "%.2f" % (elapsed / amount * 1e6))
+
+
+def benchMemory():
+	"""
+		Memory footprint of the AST nodes, measured with tracemalloc while the AST grows.
+	"""
+	template = generateFunctions(1)
+	printRow("nodes", "memory (MB)", "bytes/node")
+	for amount in [1000, 4000, 16000]:
+		ast = buildAST(template)
+		before = countNodes(ast)
+
+		tracemalloc.start()
+		startMemory = tracemalloc.get_traced_memory()[0]
+		replicateStatements(ast, amount)
+		memory = tracemalloc.get_traced_memory()[0] - startMemory
+		tracemalloc.stop()
+
+		nodes = countNodes(ast) - before
+		printRow(nodes, "%.2f" % (memory / 1e6), "%.1f" % (memory / nodes))
+
+
+def benchArrayAST():
+	"""
+		Memory footprint and analysis/codegen time of the ArrayAST against the AST of ASTNodes.
+	"""
+	template = generateFunctions(1)
+	printRow("nodes", "backend", "bytes/node", "translate (s)")
+	for amount in [1000, 4000, 16000]:
+		for backend in ["ASTNode", "ArrayAST"]:
+			ast = buildAST(template)
+			if backend == "ArrayAST":
+				# Only the arrays are measured, not the ASTNodes they are copied from
+				ast = replicateStatements(ast, amount)
+
+			tracemalloc.start()
+			startMemory = tracemalloc.get_traced_memory()[0]
+			ast = replicateStatements(ast, amount) if backend == "ASTNode" else toArrayAST(ast)
+			memory = tracemalloc.get_traced_memory()[0] - startMemory
+			tracemalloc.stop()
+
+			nodes = countNodes(ast)
+			elapsed, _ = timeIt(PTranslator().translate, ast, True)
+			printRow(nodes, backend, "%.1f" % (memory / nodes), "%.3f" % elapsed)
+
+
+def recursiveDot(node):
+	"""
+		The dot representation as it was built before the streaming export, for comparison.
+	"""
+	return str(node.uniqueID) + ' [label="' + str(node.type.name) + ( (' \\n' + str(node.value)) if node.value != None else '') + '"];\n' \
+		+ ''.join([recursiveDot(child) for child in node.children]) \
+		+ ''.join([(str(node.uniqueID) + " -> " + str(child.uniqueID) + ";\n") for child in node.children])
+
+def benchDot():
+	"""
+		Writing the AST in dot format: building the whole string recursively against streaming it to the file.
+	"""
+	template = generateFunctions(1)
+	dotFilename = os.path.join(tempfile.gettempdir(), "benchmark.dot")
+	printRow("nodes", "recursive (s)", "peak (MB)", "streaming (s)", "peak (MB)")
+	for amount in [1000, 4000, 16000]:
+		ast = replicateStatements(buildAST(template), amount)
+
+		def writeRecursive():
+			with open(dotFilename, 'w') as dotFile:
+				dotFile.write("digraph AST {\n" + recursiveDot(ast.root) + "}")
+		def writeStreaming():
+			with open(dotFilename, 'w') as dotFile:
+				ast.writeDot(dotFile)
+
+		recursiveTime, recursivePeak = measure(writeRecursive)
+		streamingTime, streamingPeak = measure(writeStreaming)
+		printRow(countNodes(ast), "%.3f" % recursiveTime, "%.2f" % (recursivePeak / 1e6), "%.3f" % streamingTime, "%.2f" % (streamingPeak / 1e6))
+	os.remove(dotFilename)
+
+
+def generateLongFunction(length):
+	"""
+		Generates a main function with 'length' statements: declarations, with an assignment every 100 statements.
+	"""
+	lines = ["int main() {"]
+	for i in range(length):
+		if i % 100 == 99:
+			lines.append("\tv" + str(i - 1) + " = v" + str(i - 2) + " + 1;")
+		else:
+			lines.append("\tint v" + str(i) + ";")
+	lines.append("}")
+	return "\n".join(lines) + "\n"
+
+def benchStress():
+	"""
+		Compiles a function of 100k statements with the default recursion limit.
+	"""
+	recursionLimit = sys.getrecursionlimit()
+	sys.setrecursionlimit(1000)
+
+	printRow("statements", "parse (s)", "AST (s)", "translate (s)")
+	for length in [1000, 10000, 100000]:
+		stream = CommonTokenStream(cGrammarLexer(InputStream(generateLongFunction(length))))
+		parseTime, tree = timeIt(cGrammarParser(stream).program)
+
+		ASTbuilder = ASTCreator()
+		walkTime, _ = timeIt(ParseTreeWalker().walk, ASTbuilder, tree)
+		translateTime, _ = timeIt(PTranslator().translate, ASTbuilder.getAST(), True)
+		printRow(length, "%.3f" % parseTime, "%.3f" % walkTime, "%.3f" % translateTime)
+
+	sys.setrecursionlimit(recursionLimit)
+
+
+class CountingListener(ParseTreeListener):
+	"""
+		Counts the callbacks a listener gets while walking a parse tree.
+	"""
+	def __init__(self):
+		self.callbacks = 0
+
+	def enterEveryRule(self, ctx):
+		self.callbacks += 1
+
+	def exitEveryRule(self, ctx):
+		self.callbacks += 1
+
+def generateMixedExpression(operands):
+	"""
+		Generates a program with an assignment and a condition of 'operands' operands each, using all operators.
+	"""
+	values = ["a", "3", "-b", "*p", "(a + 1)", "f(a)"]
+	operators = [" + ", " * ", " - ", " / "]
+	expression = values[0]
+	for i in range(1, operands):
+		expression += operators[i % len(operators)] + values[i % len(values)]
+	condition = " && ".join(["(" + expression + ") < 2", "!a", "b == 1 || a"])
+	return "int main() {\n\tx = " + expression + ";\n\tif (" + condition + ") {\n\t}\n}\n"
+
+def benchParse():
+	"""
+		Parse time, parse tree size and listener callbacks for growing expressions.
+	"""
+	printRow("operands", "parse (s)", "contexts", "callbacks", "per operand")
+	for operands in [5, 10, 20, 40]:
+		stream = CommonTokenStream(cGrammarLexer(InputStream(generateMixedExpression(operands))))
+		parseTime, tree = timeIt(cGrammarParser(stream).program)
+
+		listener = CountingListener()
+		ParseTreeWalker().walk(listener, tree)
+		# Every operand appears twice in the program (assignment and condition)
+		printRow(operands, "%.3f" % parseTime, listener.callbacks // 2, listener.callbacks, "%.1f" % (listener.callbacks / (2 * operands)))
+
+def parseLL(cFilename):
+	"""
+		Parses cFilename with full LL prediction only, as runCompiler did before the two-stage parse.
+	"""
+	input = FileStream(cFilename)
+	parser = cGrammarParser(CommonTokenStream(cGrammarLexer(input)))
+	parser._listeners = [MyErrorListener(input.strdata)]
+	return parser.program()
+
+def benchPrediction():
+	"""
+		Parse time of full LL prediction against SLL first, with LL only as fallback.
+		Both are measured after a first parse, so the prediction caches are warm.
+	"""
+	corpus = sorted(glob.glob("res/happyDayTests/*/*.c"))
+	generated = [("statements", 1000, generateLongFunction(1000)), ("statements", 10000, generateLongFunction(10000)), \
+		("functions", 200, generateFunctions(200)), ("operands", 40, generateMixedExpression(40))]
+
+	with tempfile.TemporaryDirectory() as directory:
+		inputs = [("happyDayTests", len(corpus), corpus)]
+		for name, size, source in generated:
+			cFilename = os.path.join(directory, name + str(size) + ".c")
+			with open(cFilename, "w") as cFile:
+				cFile.write(source)
+			inputs.append((name, size, [cFilename]))
+
+		printRow("input", "size", "LL (s)", "SLL, LL (s)", "speedup")
+		for name, size, cFilenames in inputs:
+			times = []
+			for parse in [parseLL, parseFile]:
+				for cFilename in cFilenames:
+					parse(cFilename)
+				times.append(timeIt(lambda: [parse(cFilename) for cFilename in cFilenames])[0])
+			printRow(name, size, "%.3f" % times[0], "%.3f" % times[1], "%.2fx" % (times[0] / times[1]))
+
+def benchOnePass():
+	"""
+		Building the AST by walking the parse tree afterwards, against building it while parsing.
+		The peak memory includes the parse tree, the token stream and the AST.
+	"""
+	generated = [("statements", 1000, generateLongFunction(1000)), ("statements", 10000, generateLongFunction(10000)), \
+		("functions", 200, generateFunctions(200))]
+
+	with tempfile.TemporaryDirectory() as directory:
+		printRow("input", "size", "walk (s)", "peak (MB)", "one pass (s)", "peak (MB)")
+		for name, size, source in generated:
+			cFilename = os.path.join(directory, name + str(size) + ".c")
+			with open(cFilename, "w") as cFile:
+				cFile.write(source)
+
+			def walk():
+				ASTbuilder = ASTCreator()
+				ParseTreeWalker().walk(ASTbuilder, parseFile(cFilename))
+				return ASTbuilder.getAST()
+			def onePass():
+				ASTbuilder = ASTCreator()
+				parseFile(cFilename, ASTbuilder)
+				return ASTbuilder.getAST()
+
+			walkTime, walkPeak = measure(walk)
+			onePassTime, onePassPeak = measure(onePass)
+			printRow(name, size, "%.3f" % walkTime, "%.2f" % (walkPeak / 1e6), "%.3f" % onePassTime, "%.2f" % (onePassPeak / 1e6))
+
+def processTime(arguments, environment):
+	"""
+		CPU time (user and system) of running arguments as a new process.
+	"""
+	before = resource.getrusage(resource.RUSAGE_CHILDREN)
+	subprocess.run(arguments, env=environment, check=True)
+	after = resource.getrusage(resource.RUSAGE_CHILDREN)
+	return (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+
+def benchStartup():
+	"""
+		CPU time of a c2p.py process per happy day test, without and with the parser cache.
+		The runs with and without the cache take turns, and the fastest of 5 runs counts.
+	"""
+	corpus = sorted(glob.glob("res/happyDayTests/*/*.c"))
+	with tempfile.TemporaryDirectory() as directory:
+		pFilename = os.path.join(directory, "program.p")
+		cacheFilename = os.path.join(directory, "cGrammar.cache")
+		# The cache as 'make build' makes it
+		processTime([sys.executable, "-m", "src.py.UTIL.ParserCache"], dict(os.environ, C2P_PARSER_CACHE=cacheFilename))
+
+		importTime = min([processTime([sys.executable, "-c", "import src.py.runCompiler"], os.environ) for i in range(5)])
+		withoutCache = []
+		withCache = []
+		for cFilename in corpus:
+			times = {"": [], cacheFilename: []}
+			for i in range(5):
+				for cache in times:
+					environment = dict(os.environ, PYTHONPATH=".", C2P_PARSER_CACHE=cache)
+					times[cache].append(processTime([sys.executable, "res/runScript/c2p.py", cFilename, pFilename], environment))
+			withoutCache.append(min(times[""]))
+			withCache.append(min(times[cacheFilename]))
+
+	printRow("files", "imports (s)", "no cache (s)", "cache (s)", "speedup")
+	printRow(len(corpus), "%.3f" % importTime, "%.3f" % (sum(withoutCache) / len(corpus)), "%.3f" % (sum(withCache) / len(corpus)), \
+		"%.2fx" % (sum(withoutCache) / sum(withCache)))
+	slowest = withoutCache.index(max(withoutCache))
+	printRow("slowest", "", "%.3f" % withoutCache[slowest], "%.3f" % withCache[slowest], "%.2fx" % (withoutCache[slowest] / withCache[slowest]))
+
+def wallTime(arguments, environment):
+	start = perf_counter()
+	subprocess.run(arguments, env=environment, check=True)
+	return perf_counter() - start
+
+def benchServer():
+	"""
+		Latency per happy day test of a new c2p.py process (with the parser cache), of a c2pc.py process
+		that lets a running compile server compile, and of a request to the server without starting a client process.
+		This is wall time, the server does its work in another process. The fastest of 5 runs counts.
+	"""
+	corpus = sorted(glob.glob("res/happyDayTests/*/*.c"))
+	with tempfile.TemporaryDirectory() as directory:
+		pFilename = os.path.join(directory, "program.p")
+		cacheFilename = os.path.join(directory, "cGrammar.cache")
+		socketPath = os.path.join(directory, "c2p.sock")
+		environment = dict(os.environ, PYTHONPATH=".", C2P_PARSER_CACHE=cacheFilename)
+		processTime([sys.executable, "-m", "src.py.UTIL.ParserCache"], environment)
+
+		server = subprocess.Popen([sys.executable, "res/runScript/c2pd.py", socketPath], env=environment)
+		while server.poll() == None and not os.path.exists(socketPath):
+			sleep(0.01)
+
+		cold = []
+		client = []
+		request = []
+		try:
+			for cFilename in corpus:
+				times = {"cold": [], "client": [], "request": []}
+				for i in range(5):
+					times["cold"].append(wallTime([sys.executable, "res/runScript/c2p.py", cFilename, pFilename], environment))
+					times["client"].append(wallTime([sys.executable, "res/runScript/c2pc.py", "--socket=" + socketPath, cFilename, pFilename], environment))
+					start = perf_counter()
+					compileOnServer(socketPath, cFilename, pFilename)
+					times["request"].append(perf_counter() - start)
+				cold.append(min(times["cold"]))
+				client.append(min(times["client"]))
+				request.append(min(times["request"]))
+		finally:
+			stopCompileServer(socketPath)
+			server.wait()
+
+	printRow("files", "c2p.py (ms)", "c2pc.py (ms)", "request (ms)", "speedup")
+	printRow(len(corpus), "%.1f" % (1000 * sum(cold) / len(corpus)), "%.1f" % (1000 * sum(client) / len(corpus)), \
+		"%.1f" % (1000 * sum(request) / len(corpus)), "%.2fx / %.1fx" % (sum(cold) / sum(client), sum(cold) / sum(request)))
+	slowest = cold.index(max(cold))
+	printRow("slowest", "%.1f" % (1000 * cold[slowest]), "%.1f" % (1000 * client[slowest]), "%.1f" % (1000 * request[slowest]), \
+		"%.2fx / %.1fx" % (cold[slowest] / client[slowest], cold[slowest] / request[slowest]))
+
+def benchBatch():
+	"""
+		Throughput of the batch mode for the happy day tests and 40 generated programs, with 1 worker up to a worker per CPU.
+		The time includes starting the workers.
+	"""
+	with tempfile.TemporaryDirectory() as directory:
+		inputDirectory = os.path.join(directory, "input")
+		os.makedirs(inputDirectory)
+		for i in range(40):
+			with open(os.path.join(inputDirectory, "functions" + str(i) + ".c"), "w") as cFile:
+				cFile.write(generateFunctions(20 + i))
+		paths = ["res/happyDayTests", inputDirectory]
+		files = len(glob.glob("res/happyDayTests/*/*.c")) + 40
+
+		printRow("workers", "time (s)", "files/s")
+		jobs = 1
+		while True:
+			start = perf_counter()
+			compileBatch(paths, os.path.join(directory, "output"), jobs, report=lambda line: None)
+			seconds = perf_counter() - start
+			printRow(jobs, "%.2f" % seconds, "%.1f" % (files / seconds))
+			if jobs >= os.cpu_count():
+				break
+			jobs = min(2 * jobs, os.cpu_count())
+
+def benchPeephole():
+	"""
+		Instructions in the program and instructions executed by the p machine for every happy day test, without and with -O.
+		Programs that don't stop (for (;;) {}) only have their instructions counted.
+	"""
+	printRow("program", "instructions", "-O", "executed", "-O")
+	totals = [0, 0, 0, 0]
+	for cFilename in sorted(glob.glob("res/happyDayTests/*/*.c")):
+		name = os.path.relpath(cFilename, "res/happyDayTests")[:-len(".c")]
+		with open(cFilename) as cFile:
+			source = cFile.read()
+		program = compileSource(source).programText
+		optimized = compileSource(source, optimize=True).programText
+		row = [countInstructions(program), countInstructions(optimized)]
+		try:
+			row.append(runProgram(program, happyDayInputs.get(name, ""), 100000)[1])
+			row.append(runProgram(optimized, happyDayInputs.get(name, ""), 100000)[1])
+		except PMachineError:
+			row += ["-", "-"]
+		printRow(name.split("/")[-1][:14], *row)
+		for column in range(len(row)):
+			if row[column] != "-":
+				totals[column] += row[column]
+	printRow("total", *totals)
+	printRow("reduction", "", "%.1f%%" % (100 - 100 * totals[1] / totals[0]), "", "%.1f%%" % (100 - 100 * totals[3] / totals[2]))
+
+
+def peepholeOnly(source):
+	translator = PTranslator()
+	translator.translate(buildAST(source), True)
+	translator.optimizeProgram()
+	return translator.programText
+
+def benchFolding():
+	"""
+		Instructions in the program and instructions executed by the p machine for every happy day test,
+		with only the peephole optimizer and with constant folding before it (-O), and the time the folding takes.
+	"""
+	printRow("program", "instructions", "folded", "executed", "folded")
+	totals = [0, 0, 0, 0]
+	for cFilename in sorted(glob.glob("res/happyDayTests/*/*.c")):
+		name = os.path.relpath(cFilename, "res/happyDayTests")[:-len(".c")]
+		with open(cFilename) as cFile:
+			source = cFile.read()
+		program = peepholeOnly(source)
+		folded = compileSource(source, optimize=True).programText
+		row = [countInstructions(program), countInstructions(folded)]
+		try:
+			row.append(runProgram(program, happyDayInputs.get(name, ""), 100000)[1])
+			row.append(runProgram(folded, happyDayInputs.get(name, ""), 100000)[1])
+		except PMachineError:
+			row += ["-", "-"]
+		printRow(name.split("/")[-1][:14], *row)
+		for column in range(len(row)):
+			if row[column] != "-":
+				totals[column] += row[column]
+	printRow("total", *totals)
+	printRow("reduction", "", "%.1f%%" % (100 - 100 * totals[1] / totals[0]), "", "%.1f%%" % (100 - 100 * totals[3] / totals[2]))
+
+	ast = buildAST(generateFunctions(1000))
+	translator = PTranslator()
+	translator.translate(ast, False)
+	elapsed, folds = timeIt(ConstantFolder().fold, ast)
+	print("\nConstant folding of a program with 1000 functions (%d nodes folded): %.3f s" % (folds, elapsed))
+
+
+def benchArrays():
+	"""
+		Compile time, size of the p program and run time on the p machine of a program with a local and a global array,
+		with a store per element and with a loop per array.
+	"""
+	printRow("elements", "init", "compile (s)", "size (kB)", "executed", "run (s)")
+	for size in [100, 1000, 10000, 100001]:
+		source = "int g[" + str(size) + "];\nint main() {\n\tfloat a[" + str(size) + "];\n\ta[1] = 2.5;\n\tg[1] = 3;\n}\n"
+		for name, arrayLoopSize in [("unrolled", size + 1), ("loop", size)]:
+			compileTime, result = timeIt(compileSource, source, False, AST, False, arrayLoopSize)
+			runTime, (output, steps) = timeIt(runProgram, result.programText)
+			printRow(size, name, "%.3f" % compileTime, "%.1f" % (len(result.programText) / 1000), steps, "%.3f" % runTime)
+
+
+def generatePrintfs(amount):
+	"""
+		Generates a program that prints a report of 'amount' lines, with the same text on every line and a word of 16 characters.
+	"""
+	lines = ["#include <stdio.h>", "int main() {", "\tchar name[16];", "\tscanf(\"%s\", name);"]
+	for i in range(amount):
+		lines.append("\tprintf(\"Line %i of the report for %s: everything is fine.\\n\", " + str(i) + ", name);")
+	lines.append("}")
+	return "\n".join(lines) + "\n"
+
+def benchPrintf():
+	"""
+		Compile time, size of the p program and instructions executed by the p machine for programs with many printfs.
+	"""
+	printRow("printfs", "compile (s)", "size (kB)", "instructions", "executed")
+	for amount in [10, 100, 1000]:
+		compileTime, result = timeIt(compileSource, generatePrintfs(amount))
+		output, steps = runProgram(result.programText, "abcdefghijklmnop")
+		printRow(amount, "%.3f" % compileTime, "%.1f" % (len(result.programText) / 1000), countInstructions(result.programText), steps)
+
+
+benchmarks = {
+	"codegen": benchCodegen,
+	"walker": benchWalker,
+	"symboltable": benchSymbolTable,
+	"types": benchTypes,
+	"vartypes": benchVarTypes,
+	"memory": benchMemory,
+	"arrayast": benchArrayAST,
+	"dot": benchDot,
+	"stress": benchStress,
+	"parse": benchParse,
+	"prediction": benchPrediction,
+	"onepass": benchOnePass,
+	"startup": benchStartup,
+	"server": benchServer,
+	"batch": benchBatch,
+	"peephole": benchPeephole,
+	"folding": benchFolding,
+	"arrays": benchArrays,
+	"printf": benchPrintf,
+}
+
+def main(argv):
+	names = argv[1:] if len(argv) > 1 else list(benchmarks)
+	for name in names:
+		print("== " + name + " ==")
+		benchmarks[name]()
+
+if __name__ == '__main__':
+	# The parse tree of the grammar is deeply nested for big programs, so give the walkers some room
+	sys.setrecursionlimit(1000000)
+	threading.stack_size(512 * 1024 * 1024)
+	thread = threading.Thread(target=main, args=(sys.argv,))
+	thread.start()
+	thread.join()
@@ -0,0 +1,209 @@
+"""
+	Interpreter for the p code the compiler generates, used by the tests and benchmarks to check that
+	optimized programs still behave the same, and to count the instructions a program executes.
+"""
+import codecs, re
+
+
+# The standard input of the happy day tests that read it
+happyDayInputs = {
+	"functions/scanf1": "1 2 3 4x2.5",
+	"functions/scanf2": "abcde",
+	"miscellaneous/factorial": "5",
+}
+
+
+class PMachineError(Exception):
+	pass
+
+
+def parseConstant(type, text):
+	if type == "i" or type == "a":
+		return int(text)
+	elif type == "r":
+		return float(text)
+	elif type == "c":
+		# A quoted character, maybe escaped: 'a', '\n'
+		return codecs.decode(text[1:-1], "unicode_escape")
+	elif type == "b":
+		return text == "t"
+	raise PMachineError("Unknown type '" + type + "'")
+
+def countInstructions(text):
+	return len(loadProgram(text)[0])
+
+def loadProgram(text):
+	"""
+		Returns the instructions of the program text as lists of words, and the index of the instruction every label stands for.
+	"""
+	instructions = []
+	labels = {}
+	for line in text.split("\n"):
+		if line == "":
+			continue
+		if line.endswith(":") and " " not in line:
+			labels[line[:-1]] = len(instructions)
+		elif line.startswith("ldc "):
+			# The constant can contain spaces (ldc c ' ')
+			instructions.append(line.split(" ", 2))
+		else:
+			instructions.append(line.split(" "))
+	return instructions, labels
+
+
+def divide(type, left, right):
+	if right == 0:
+		raise PMachineError("Division by zero")
+	if type == "i":
+		# C rounds towards zero
+		quotient = abs(left) // abs(right)
+		return quotient if (left < 0) == (right < 0) else -quotient
+	return left / right
+
+binaryOperations = {
+	"add": lambda type, left, right: left + right,
+	"sub": lambda type, left, right: left - right,
+	"mul": lambda type, left, right: left * right,
+	"div": divide,
+	"equ": lambda type, left, right: left == right,
+	"neq": lambda type, left, right: left != right,
+	"grt": lambda type, left, right: left > right,
+	"geq": lambda type, left, right: left >= right,
+	"les": lambda type, left, right: left < right,
+	"leq": lambda type, left, right: left <= right,
+}
+
+conversions = {
+	("i", "r"): float,
+	("r", "i"): int,
+	("c", "i"): ord,
+	("i", "c"): chr,
+	("b", "i"): int,
+	("i", "a"): int,
+	("a", "i"): int,
+}
+
+numberPatterns = {
+	"i": re.compile(r"[-+]?[0-9]+"),
+	"r": re.compile(r"[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?"),
+}
+
+def formatValue(type, value):
+	if type == "c":
+		return value
+	elif type == "b":
+		return "t" if value else "f"
+	return str(value)
+
+
+def runProgram(text, input="", maxSteps=10000000):
+	"""
+		Runs the p code program text with input as the standard input.
+		Returns the output of the program and the number of instructions it executed.
+	"""
+	instructions, labels = loadProgram(text)
+	store = {}
+	output = []
+	inputPosition = 0
+	SP = -1
+	MP = 0
+	EP = 0
+	PC = 0
+	steps = 0
+
+	def base(p, address):
+		for i in range(p):
+			address = store[address + 1]
+		return address
+
+	while True:
+		if steps == maxSteps:
+			raise PMachineError("The program didn't stop after " + str(maxSteps) + " instructions")
+		if PC >= len(instructions):
+			raise PMachineError("The program ran past its last instruction")
+		words = instructions[PC]
+		opcode = words[0]
+		PC += 1
+		steps += 1
+
+		if opcode == "ldc":
+			SP += 1
+			store[SP] = parseConstant(words[1], words[2])
+		elif opcode == "lod":
+			SP += 1
+			store[SP] = store.get(base(int(words[2]), MP) + int(words[3]))
+		elif opcode == "str":
+			store[base(int(words[2]), MP) + int(words[3])] = store[SP]
+			SP -= 1
+		elif opcode == "lda":
+			SP += 1
+			store[SP] = base(int(words[1]), MP) + int(words[2])
+		elif opcode == "ind":
+			store[SP] = store.get(store[SP])
+		elif opcode == "sto":
+			store[store[SP - 1]] = store[SP]
+			SP -= 2
+		elif opcode == "ixa":
+			store[SP - 1] = store[SP - 1] + store[SP] * int(words[1])
+			SP -= 1
+		elif opcode in binaryOperations:
+			store[SP - 1] = binaryOperations[opcode](words[1], store[SP - 1], store[SP])
+			SP -= 1
+		elif opcode == "neg":
+			store[SP] = -store[SP]
+		elif opcode == "and":
+			store[SP - 1] = store[SP - 1] and store[SP]
+			SP -= 1
+		elif opcode == "or":
+			store[SP - 1] = store[SP - 1] or store[SP]
+			SP -= 1
+		elif opcode == "not":
+			store[SP] = not store[SP]
+		elif opcode == "conv":
+			store[SP] = conversions[(words[1], words[2])](store[SP])
+		elif opcode == "ujp":
+			PC = labels[words[1]]
+		elif opcode == "fjp":
+			if not store[SP]:
+				PC = labels[words[1]]
+			SP -= 1
+		elif opcode == "ssp":
+			SP = MP + int(words[1]) - 1
+		elif opcode == "sep":
+			EP = SP + int(words[1])
+		elif opcode == "mst":
+			store[SP + 2] = base(int(words[1]), MP)
+			store[SP + 3] = MP
+			store[SP + 4] = EP
+			SP += 5
+		elif opcode == "cup":
+			MP = SP - (int(words[1]) + 4)
+			store[MP + 4] = PC
+			PC = labels[words[2]]
+		elif opcode == "retf" or opcode == "retp":
+			SP = MP if opcode == "retf" else MP - 1
+			PC = store[MP + 4]
+			EP = store[MP + 3]
+			MP = store[MP + 2]
+		elif opcode == "in":
+			while words[1] != "c" and inputPosition < len(input) and input[inputPosition].isspace():
+				inputPosition += 1
+			if words[1] == "c":
+				value = input[inputPosition] if inputPosition < len(input) else "\0"
+				inputPosition += 1
+			else:
+				# As scanf, the number ends at the first character that can't be part of it
+				number = numberPatterns[words[1]].match(input, inputPosition)
+				if number == None:
+					raise PMachineError("No " + words[1] + " value in the input at position " + str(inputPosition))
+				value = parseConstant(words[1], number.group())
+				inputPosition = number.end()
+			SP += 1
+			store[SP] = value
+		elif opcode == "out":
+			output.append(formatValue(words[1], store[SP]))
+			SP -= 1
+		elif opcode == "hlt":
+			return "".join(output), steps
+		else:
+			raise PMachineError("Unknown instruction '" + " ".join(words) + "'")
@@ -1,4 +1,4 @@
-import os,sys,inspect
+import os,sys,inspect,glob,threading,time
 
 
 from antlr4 import *
@@ -10,71 +10,71 @@ from src.cGrammarParser import cGrammarParser
 
 from src.py.MyErrorListener import MyErrorListener
 from src.py.PTranslator import PTranslator
+from src.py.PCODE.PInstruction import PInstruction, PLabel, serializeProgram
+from src.py.PCODE.PeepholeOptimizer import PeepholeOptimizer
+from src.tests.pmachine import runProgram, countInstructions, happyDayInputs, PMachineError
+from src.py.runCompiler import parseFile, runCompiler, compileSource
+from src.py.UTIL.ParserCache import saveParserCache, loadParserCache
+from src.py.UTIL import ParserCache
+from src.py.compileServer import runCompileServer
+from src.py.compileClient import compileOnServer, stopCompileServer
+from src.py.batchCompiler import compileBatch, collectFiles
 from src.py.AST.ASTNode import *
+from src.py.AST.AST import AST
+from src.py.AST.ArrayAST import ArrayAST
 from src.py.AST.ASTCreator import ASTCreator
-from src.py.ST.SymbolTable import SymbolTable
+from src.py.CompileContext import CompileContext
+from src.py.UTIL.VarTypes import IntType, PointerType, ArrayType
 from src.py.SA.ErrorMsgHandler import ExType, determineExPrefix
 
 testdir = os.path.dirname(os.path.abspath(__file__))
 resdir = os.getcwd() + "/res"
 
-def parse(inputFile, dotSolution, pSolution, translate=True):
-	ASTNode.ID = 0
-	SymbolTable.AllocationAddress = 0
+def parse(inputFile, dotSolution, pSolution, translate=True, astClass=AST, onePass=False):
+	# Every test compiles in a new context, so the node IDs start at 0 like in the solutions
+	with CompileContext():
+		inputFilePath = str(resdir) + "/happyDayTests/" + inputFile
+		ASTbuilder = ASTCreator(astClass)
+		if onePass:
+			# The AST is built by the parser itself
+			parseFile(inputFilePath, ASTbuilder)
+		else:
+			tree = parseFile(inputFilePath)
 
-	inputFilePath = str(resdir) + "/happyDayTests/" + inputFile
-	input = FileStream(inputFilePath)
+		pResultPath = str(testdir) + "/program.p"
+		dotResultPath = str(testdir) + "/output.dot"
 
-	lexer = cGrammarLexer(input)
-	stream = CommonTokenStream(lexer)
-	parser = cGrammarParser(stream)
-	parser._listeners = [MyErrorListener(inputFilePath)]
-	tree = parser.program()
-
-	ASTbuilder = ASTCreator(stream)
-
-	pResultPath = str(testdir) + "/program.p"
-	dotResultPath = str(testdir) + "/output.dot"
-
-	pSolutionsPath = str(resdir) + "/solutions/" + pSolution
-	dotSolutionsPath = str(resdir) + "/solutions/" + dotSolution
+		pSolutionsPath = str(resdir) + "/solutions/" + pSolution
+		dotSolutionsPath = str(resdir) + "/solutions/" + dotSolution
 
 
-	try:
-		walker = ParseTreeWalker()
-		walker.walk(ASTbuilder, tree)
+		try:
+			if not onePass:
+				walker = ParseTreeWalker()
+				walker.walk(ASTbuilder, tree)
 
-		ast = ASTbuilder.getAST()
+			ast = ASTbuilder.getAST()
 
-		translator = PTranslator()
-		translator.translate(ast, translate=translate)
+			translator = PTranslator()
+			translator.translate(ast, translate=translate)
 
-		translator.saveProgram(pResultPath)
-		ASTbuilder.toDot(dotResultPath)
+			translator.saveProgram(pResultPath)
+			ASTbuilder.toDot(dotResultPath)
 
-	except Exception as inst:
-		fail("Failure for " + str(inputFile) + "\n" + str(inst))
+		except Exception as inst:
+			fail("Failure for " + str(inputFile) + "\n" + str(inst))
 	
-	assert(cmp(dotResultPath, dotSolutionsPath))
-	if translate:
-		assert(cmp(pResultPath, pSolutionsPath))
+		assert(cmp(dotResultPath, dotSolutionsPath))
+		if translate:
+			assert(cmp(pResultPath, pSolutionsPath))
 
 
 def parseNoCatch(inputFile, dotSolution, pSolution):
 	# For exception throwing purposes
 
 	try:
-		input = FileStream(str(resdir) + "/deathTests/" + inputFile)
-		lexer = cGrammarLexer(input)
-		stream = CommonTokenStream(lexer)
-		parser = cGrammarParser(stream)
-		parser._listeners = [MyErrorListener(str(resdir) + "/deathTests/" + inputFile)]
-		tree = parser.program()
-
-		ASTbuilder = ASTCreator(stream)
-
-		walker = ParseTreeWalker()
-		walker.walk(ASTbuilder, tree)
+		ASTbuilder = ASTCreator()
+		parseFile(str(resdir) + "/deathTests/" + inputFile, ASTbuilder)
 
 		ast = ASTbuilder.getAST()
 
@@ -270,6 +270,273 @@ def test_by_reference():
 
 
 
+def test_long_function():
+	# The statements of a function are a flat list in the parse tree, so long functions don't hit the recursion limit
+	source = "int main() {\n" + "".join(["\tint v" + str(i) + ";\n" for i in range(10000)]) + "}\n"
+	lexer = cGrammarLexer(InputStream(source))
+	stream = CommonTokenStream(lexer)
+	parser = cGrammarParser(stream)
+	tree = parser.program()
+
+	ASTbuilder = ASTCreator()
+	walker = ParseTreeWalker()
+	walker.walk(ASTbuilder, tree)
+
+	ast = ASTbuilder.getAST()
+	translator = PTranslator()
+	translator.translate(ast)
+
+	assert(len(ast.root.children[0].children[2].children) == 10000)
+	assert(translator.programText.count("\n") > 10000)
+
+
+def test_array_ast():
+	# The array backed AST has to give the same dot and p code as the AST of ASTNodes
+	for inputFilePath in sorted(glob.glob(str(resdir) + "/happyDayTests/*/*.c")):
+		inputFile = os.path.relpath(inputFilePath, str(resdir) + "/happyDayTests")
+		solution = inputFile[:-len(".c")]
+		parse(inputFile, solution + ".dot", solution + ".p", astClass=ArrayAST)
+
+
+def test_interned_types():
+	# Interned types are found by the identity of their arguments, not by the looser == of the types (int* == int)
+	assert(PointerType(IntType(), 1) is PointerType(IntType(), 1))
+	assert(ArrayType(IntType(), 5) is not ArrayType(PointerType(IntType(), 1), 5))
+	assert(PointerType(IntType(), 0) == IntType())
+	with raises(TypeError):
+		hash(IntType())
+
+
+def test_parse_listener():
+	# Building the AST while parsing has to give the same dot and p code as walking the parse tree
+	for inputFilePath in sorted(glob.glob(str(resdir) + "/happyDayTests/*/*.c")):
+		inputFile = os.path.relpath(inputFilePath, str(resdir) + "/happyDayTests")
+		solution = inputFile[:-len(".c")]
+		parse(inputFile, solution + ".dot", solution + ".p", onePass=True)
+
+
+def test_parser_cache(tmpdir, monkeypatch):
+	# The parser has to give the same results with the DFA of the cache as with the DFA it learned itself
+	cacheFilename = str(tmpdir.join("cGrammar.cache"))
+	saveParserCache(cacheFilename)
+	assert(loadParserCache(cacheFilename))
+	for inputFilePath in sorted(glob.glob(str(resdir) + "/happyDayTests/*/*.c")):
+		inputFile = os.path.relpath(inputFilePath, str(resdir) + "/happyDayTests")
+		solution = inputFile[:-len(".c")]
+		parse(inputFile, solution + ".dot", solution + ".p", onePass=True)
+
+	# A cache is ignored once the generated parser or the runtime is replaced
+	runtimeFilename = str(tmpdir.join("runtime.py"))
+	with open(runtimeFilename, "w") as runtimeFile:
+		runtimeFile.write("# 4.6")
+	monkeypatch.setattr(ParserCache, "keyFilenames", lambda: [runtimeFilename])
+	saveParserCache(cacheFilename)
+	assert(loadParserCache(cacheFilename))
+	with open(runtimeFilename, "w") as runtimeFile:
+		runtimeFile.write("# 4.13")
+	assert(not loadParserCache(cacheFilename))
+
+def test_compile_server(tmpdir):
+	# Compiling on the server has to give the same results as compiling in a new process
+	socketPath = str(tmpdir.join("c2p.sock"))
+	server = threading.Thread(target=runCompileServer, args=(socketPath,))
+	server.start()
+	while server.is_alive() and not os.path.exists(socketPath):
+		time.sleep(0.01)
+
+	try:
+		for inputFilePath in sorted(glob.glob(str(resdir) + "/happyDayTests/*/*.c")):
+			solution = str(resdir) + "/solutions/" + os.path.relpath(inputFilePath, str(resdir) + "/happyDayTests")[:-len(".c")]
+			compileOnServer(socketPath, inputFilePath, str(tmpdir.join("program.p")), str(tmpdir.join("output.dot")))
+			assert(cmp(str(tmpdir.join("program.p")), solution + ".p"))
+			assert(cmp(str(tmpdir.join("output.dot")), solution + ".dot"))
+
+		with raises(Exception) as error:
+			compileOnServer(socketPath, str(resdir) + "/deathTests/input_errors/error_braces1.c", str(tmpdir.join("program.p")))
+		assert(str(error.value) == "3:0: Error while/after parsing statement\n\n^\nBraces don't match")
+	finally:
+		stopCompileServer(socketPath)
+		server.join()
+	assert(not os.path.exists(socketPath))
+
+def test_concurrent_compiles(tmpdir):
+	# Compilations on different threads each have their own context, the node IDs of one don't leak into the other
+	inputFilePaths = sorted(glob.glob(str(resdir) + "/happyDayTests/*/*.c"))
+	def compileFiles(thread):
+		for inputFilePath in inputFilePaths:
+			outputName = str(tmpdir.join(str(thread) + "_" + os.path.basename(inputFilePath)[:-len(".c")]))
+			runCompiler(inputFilePath, outputName + ".p", dotFilename=outputName + ".dot")
+
+	threads = [threading.Thread(target=compileFiles, args=(thread,)) for thread in range(4)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+	for thread in range(len(threads)):
+		for inputFilePath in inputFilePaths:
+			solution = str(resdir) + "/solutions/" + os.path.relpath(inputFilePath, str(resdir) + "/happyDayTests")[:-len(".c")]
+			outputName = str(tmpdir.join(str(thread) + "_" + os.path.basename(inputFilePath)[:-len(".c")]))
+			assert(cmp(outputName + ".p", solution + ".p"))
+			assert(cmp(outputName + ".dot", solution + ".dot"))
+
+
+def test_compile_source():
+	# The in memory compilation has to give the same results as compiling the files
+	for inputFilePath in sorted(glob.glob(str(resdir) + "/happyDayTests/*/*.c")):
+		solution = str(resdir) + "/solutions/" + os.path.relpath(inputFilePath, str(resdir) + "/happyDayTests")[:-len(".c")]
+		with open(inputFilePath, "rb") as inputFile:
+			result = compileSource(inputFile.read(), dot=True)
+		assert(result.error == None)
+		assert(result.diagnostics == [])
+		with open(solution + ".p") as pSolution:
+			assert(result.programText == pSolution.read())
+		with open(solution + ".dot") as dotSolution:
+			assert(result.dotText == dotSolution.read())
+
+	# The lexer skips the character it doesn't know and reports it
+	result = compileSource("int main() {\n\tint a = 5;$\n}\n")
+	assert(result.error == None)
+	assert(result.diagnostics == ["line 2:11 token recognition error at: '$'"])
+
+	with open(str(resdir) + "/deathTests/input_errors/error_braces1.c") as inputFile:
+		result = compileSource(inputFile.read())
+	assert(result.error == "3:0: Error while/after parsing statement\n\n^\nBraces don't match")
+
+
+def test_error_order():
+	# All existence errors are reported before the type errors, wherever they are in the program
+	source = "int f() {\n\tint a = 'c';\n\treturn a;\n}\n\nint main() {\n\treturn b;\n}\n"
+	result = compileSource(source)
+	assert(result.error == determineExPrefix(ExType.error, (7, 8)) + "Variable 'b' referenced before declaration.")
+	result = compileSource(source.replace("return b;", "return 0;"))
+	assert(result.error == determineExPrefix(ExType.error, (2, 7)) + "Types for initialization don't match ('int' and 'char').")
+
+
+def test_p_instructions():
+	# The translator gives the program as instructions, serializing them gives the .p file
+	for inputFilePath in sorted(glob.glob(str(resdir) + "/happyDayTests/*/*.c")):
+		solution = str(resdir) + "/solutions/" + os.path.relpath(inputFilePath, str(resdir) + "/happyDayTests")[:-len(".c")]
+		ASTbuilder = ASTCreator()
+		parseFile(inputFilePath, ASTbuilder)
+		translator = PTranslator()
+		translator.translate(ASTbuilder.getAST())
+
+		with open(solution + ".p") as pSolution:
+			assert(serializeProgram(translator.program) == pSolution.read())
+		labels = {line.name for line in translator.program if isinstance(line, PLabel)}
+		assert(all([line.target in labels for line in translator.program if isinstance(line, PInstruction) and line.target != None]))
+
+	assert(PInstruction.fromOperands("lod", ["i", 0, 5]) == PInstruction("lod", "i", (0, 5)))
+	assert(str(PInstruction.fromOperands("conv", ["i", "a"])) == "conv i a")
+	assert(str(PInstruction.fromOperands("ldc", ["c", "' '"])) == "ldc c ' '")
+	assert(PInstruction("cup", None, (1, "label_f")).target == "label_f")
+
+
+def test_peephole_optimizer():
+	# The optimized programs have to do the same as the programs of the solutions, with fewer instructions
+	for inputFilePath in sorted(glob.glob(str(resdir) + "/happyDayTests/*/*.c")):
+		inputFile = os.path.relpath(inputFilePath, str(resdir) + "/happyDayTests")[:-len(".c")]
+		with open(str(resdir) + "/solutions/" + inputFile + ".p") as pSolution:
+			solution = pSolution.read()
+		with open(inputFilePath) as cFile:
+			result = compileSource(cFile.read(), optimize=True)
+		assert(countInstructions(result.programText) < countInstructions(solution) or inputFile == "functions/return_types1")
+
+		if inputFile == "flow_control/for":
+			# Never stops (for (;;) {})
+			with raises(PMachineError):
+				runProgram(result.programText, maxSteps=100000)
+			continue
+		output, steps = runProgram(solution, happyDayInputs.get(inputFile, ""))
+		optimizedOutput, optimizedSteps = runProgram(result.programText, happyDayInputs.get(inputFile, ""))
+		assert(optimizedOutput == output)
+		assert(optimizedSteps <= steps)
+
+	# Every rule at least once: a constant condition, unreachable code, a jump to the next label,
+	# an overwritten store, a self assignment, a conversion pair and a useless expression
+	program = [PInstruction.fromOperands(*line) if type(line) is tuple else PLabel(line) for line in [
+		("ssp", [7]), ("ldc", ["b", "f"]), ("fjp", ["a"]), ("ldc", ["i", 0]), ("str", ["i", 0, 5]),
+		"a", ("ldc", ["i", 0]), ("str", ["i", 0, 6]), ("lod", ["i", 0, 5]), ("ldc", ["i", 1]), ("add", ["i"]), ("str", ["i", 0, 6]),
+		("lod", ["i", 0, 6]), ("str", ["i", 0, 6]), ("conv", ["i", "a"]), ("conv", ["a", "i"]), ("lod", ["i", 0, 5]), ("ssp", [7]), ("hlt", [])]]
+	assert(serializeProgram(PeepholeOptimizer().optimize(program)) == \
+		"ssp 7\nlod i 0 5\nldc i 1\nadd i\nstr i 0 6\nssp 7\nhlt\n")
+
+	# Loads and stores of another type are left alone
+	program = [PInstruction.fromOperands(*line) for line in [("lod", ["i", 0, 5]), ("str", ["r", 0, 5]), ("ldc", ["i", 1]), \
+		("str", ["i", 0, 6]), ("ldc", ["r", 2.0]), ("str", ["r", 0, 6]), ("hlt", [])]]
+	assert(PeepholeOptimizer().optimize(program) == program)
+
+
+def test_constant_folder():
+	# Constants are computed at compile time, with the types of the expressions: C division and chars
+	source = "#include <stdio.h>\nint c = 4;\nint main() {\n\tint a = -7 / 2;\n\tint b = 3;\n\tfloat f = (2.5 + 1.5) * 2.0;\n" \
+		"\tif (!('b' <= 'a')) {\n\t\tb = b + 1;\n\t}\n\twhile (c == 5) {\n\t\tb = 0;\n\t}\n\tprintf(\"%i %i %f\", a + 10 * 4, b, f);\n}\n"
+	for astClass in [AST, ArrayAST]:
+		program = compileSource(source, astClass=astClass, optimize=True).programText
+		assert("ldc i -3\n" in program and "ldc r 8.0\n" in program and "ldc i 37\n" in program)
+		# b is assigned after its declaration, so it is read from memory
+		assert("lod i 0 6\n" in program)
+		# The conditions are constant, the peephole optimizer drops the jumps and the loop
+		assert("mul" not in program and "neg" not in program and "leq" not in program and "fjp" not in program)
+		assert(runProgram(program)[0] == "37 4 8.0")
+
+	# Division by zero is left to the p machine
+	assert("div i\n" in compileSource("int main() {\n\tint z = 1 / 0;\n}\n", optimize=True).programText)
+	# So are results that aren't finite, like float overflows
+	big = "1" + "0" * 300 + ".0"
+	assert("mul r\n" in compileSource("int main() {\n\tfloat f = " + big + " * " + big + ";\n}\n", optimize=True).programText)
+
+
+def test_array_loop(monkeypatch):
+	# Big arrays are filled by a loop, the elements get the same default values as with a store per element
+	source = "#include <stdio.h>\nchar g[300];\nint main() {\n\tfloat a[1000];\n\tint b[3];\n\ta[999] = 1.5;\n" \
+		"\tprintf(\"%f %f %i %c|\", a[0], a[999], b[2], g[299]);\n}\n"
+	unrolled = compileSource(source, arrayLoopSize=100000).programText
+	for optimize in [False, True]:
+		program = compileSource(source, optimize=optimize).programText
+		assert(countInstructions(program) < 200)
+		assert(runProgram(program)[0] == runProgram(unrolled)[0] == "0.0 1.5 0  |")
+	# A loop costs more instructions than storing 3 elements, that's why b stays below the threshold
+	assert(countInstructions(compileSource(source, arrayLoopSize=3).programText) > countInstructions(compileSource(source).programText))
+
+	# A threshold that isn't a positive number is reported as error
+	for arrayLoopSize in ["many", "-5", "0"]:
+		monkeypatch.setenv("C2P_ARRAY_LOOP_SIZE", arrayLoopSize)
+		assert(compileSource(source).error == "C2P_ARRAY_LOOP_SIZE should be a number of elements of at least 1, not '" + arrayLoopSize + "'.")
+	monkeypatch.setenv("C2P_ARRAY_LOOP_SIZE", "3")
+	assert(compileSource(source).programText == compileSource(source, arrayLoopSize=3).programText)
+
+
+def test_string_routines():
+	# Text that is printed more than once is stored once, big char arrays are printed and read by a shared loop
+	source = "#include <stdio.h>\nvoid show(int v) {\n\tprintf(\"The value is now: %i\\n\", v);\n}\nint main() {\n\tchar word[10];\n\tchar small[3];\n" \
+		"\tscanf(\"%s\", word);\n\tint i = 0;\n\twhile (i < 2) {\n\t\tprintf(\"The value is now: %i\\n\", i);\n\t\ti = i + 1;\n\t}\n" \
+		"\tprintf(\"Word: %s, small: %s|\", word, small);\n\tshow(i * 2);\n}\n"
+	for optimize in [False, True]:
+		program = compileSource(source, optimize=optimize).programText
+		assert(program.count("ldc c 'T'\n") == 1 and program.count("cup 2 print_chars\n") == 3 and program.count("cup 2 read_chars\n") == 1)
+		# The small array and the text that is printed once stay in place
+		assert(program.count("ind c\n") == 4 and "ldc c 'W'\nout c\n" in program)
+		assert(runProgram(program, "abcdefghijkl")[0] == "The value is now: 0\nThe value is now: 1\nWord: abcdefghij, small:    |The value is now: 4\n")
+
+
+def test_batch(tmpdir):
+	# Every worker of the pool compiles several files, they have to give the same results as a new process
+	report = []
+	failures = compileBatch([str(resdir) + "/happyDayTests", str(resdir) + "/deathTests/input_errors/error_braces1.c"], str(tmpdir), 2, True, report.append)
+	assert(failures == 1)
+	assert(report[-1].startswith("43 files compiled, 1 failed"))
+	for inputFilePath in sorted(glob.glob(str(resdir) + "/happyDayTests/*/*.c")):
+		inputFile = os.path.relpath(inputFilePath, str(resdir) + "/happyDayTests")[:-len(".c")]
+		assert(cmp(str(tmpdir.join(inputFile + ".p")), str(resdir) + "/solutions/" + inputFile + ".p"))
+		assert(cmp(str(tmpdir.join(inputFile + ".dot")), str(resdir) + "/solutions/" + inputFile + ".dot"))
+
+	# Files with the same name from different directories can't go to the same output file
+	with raises(Exception, match="would both be compiled to"):
+		collectFiles([str(resdir) + "/happyDayTests/functions/functions.c", str(resdir) + "/happyDayTests/functions", str(tmpdir)], str(tmpdir))
+
+
 def test_errors():
 	errorFiles = [
 		"input_errors/error_braces1.c",
@@ -293,7 +560,6 @@ def test_errors():
 	]
 	for i in range(len(errorFiles)):
 		try:
-			ASTNode.ID = 0
 			parseNoCatch(errorFiles[i], "", "")
 		except Exception as inst:
 			string = str(inst)
@@ -329,7 +595,6 @@ def test_types():
 	]
 	for i in range(len(errorFiles)):
 		try:
-			ASTNode.ID = 0
 			parseNoCatch(errorFiles[i], "", "")
 		except Exception as inst:
 			string = str(inst)
@@ -354,7 +619,6 @@ def test_existences():
 	]
 	for i in range(len(errorFiles)):
 		try:
-			ASTNode.ID = 0
 			parseNoCatch(errorFiles[i], "", "")
 		except Exception as inst:
 			string = str(inst)
@@ -371,7 +635,6 @@ def test_duplicate_declarations():
 	]
 	for i in range(len(errorFiles)):
 		try:
-			ASTNode.ID = 0
 			parseNoCatch(errorFiles[i], "", "")
 		except Exception as inst:
 			string = str(inst)
@@ -389,7 +652,6 @@ def test_wrong_returns():
 	]
 	for i in range(len(errorFiles)):
 		try:
-			ASTNode.ID = 0
 			parseNoCatch(errorFiles[i], "", "")
 		except Exception as inst:
 			string = str(inst)
@@ -407,7 +669,6 @@ def test_array_wrongAccess():
 	]
 	for i in range(len(errorFiles)):
 		try:
-			ASTNode.ID = 0
 			parseNoCatch(errorFiles[i], "", "")
 		except Exception as inst:
 			string = str(inst)
@@ -429,7 +690,6 @@ def test_derefences():
 	]
 	for i in range(len(errorFiles)):
 		try:
-			ASTNode.ID = 0
 			parseNoCatch(errorFiles[i], "", "")
 		except Exception as inst:
 			string = str(inst)
@@ -447,7 +707,6 @@ def test_noIncludes():
 	]
 	for i in range(len(errorFiles)):
 		try:
-			ASTNode.ID = 0
 			parseNoCatch(errorFiles[i], "", "")
 		except Exception as inst:
 			string = str(inst)
@@ -468,7 +727,6 @@ def test_formatString():
 	]
 	for i in range(len(errorFiles)):
 		try:
-			ASTNode.ID = 0
 			parseNoCatch(errorFiles[i], "", "")
 		except Exception as inst:
 			string = str(inst)
@@ -479,7 +737,6 @@ def test_noMain():
 	errorMessage = determineExPrefix(ExType.error, None) + "The program does not contain a 'main' function."
 
 	try:
-		ASTNode.ID = 0
 		parseNoCatch(errorFile, "", "")
 	except Exception as inst:
 		string = str(inst)